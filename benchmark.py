@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los motores de OptimizadorPortafolio sobre instancias sintéticas
+
+Genera las familias clásicas de instancias de la mochila (Pisinger) sobre una
+grilla de número de objetos y capacidad, mide cada motor con calentamiento y
+repeticiones y guarda tiempo, memoria máxima y celdas por segundo en JSON. Con
+--base compara contra una medición anterior y marca las regresiones:
+
+    python benchmark.py --base benchmark_base.json --guardar-base   # medir y guardar la base
+    python benchmark.py --base benchmark_base.json                  # comparar (sale con 1 si hay regresiones)
+"""
+
+import argparse
+import gc
+import math
+import json
+import logging
+import multiprocessing
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from catalogos import ObjetoCatalogo
+from optimizer import optimizador
+
+FAMILIAS = (
+    "no_correlacionadas",
+    "debilmente_correlacionadas",
+    "fuertemente_correlacionadas",
+    "inversas_fuertemente_correlacionadas",
+    "subset_sum",
+)
+
+# Grilla por defecto: termina en pocos minutos; las instancias mayores se piden con --n y --capacidades
+N_POR_DEFECTO = (100, 1000)
+CAPACIDADES_POR_DEFECTO = (10_000, 100_000)
+
+# Motores exactos: deben coincidir en la ganancia de cada instancia
+MOTORES_APROXIMADOS = ("fptas",)
+
+# Nanosegundos por celda de los motores en Python puro, para omitir los casos que no terminarían
+NS_POR_CELDA_PYTHON = {"dp_clasico": 1000, "dp_bitset": 500}
+
+# Cuánto más lenta es una ejecución con tracemalloc en el peor caso (motores en Python puro)
+FACTOR_TRACEMALLOC = 40
+
+# Diferencias menores que estas no se marcan como regresión aunque superen el umbral relativo
+MINIMO_SEGUNDOS_REGRESION = 0.005
+MINIMO_BYTES_REGRESION = 1024 * 1024
+
+VERSION_FORMATO = 1
+
+
+def generar_instancia(familia: str, n: int, capacidad: int, semilla: int = 0) -> List[ObjetoCatalogo]:
+    """
+    Genera una instancia de la familia indicada.
+    
+    Los pesos se toman de [1, R] con R = max(4 · capacidad / n, 10), de modo
+    que la suma de pesos ronda el doble de la capacidad y cabe cerca de la
+    mitad de los objetos:
+    
+    - no_correlacionadas: ganancia uniforme en [1, R]
+    - debilmente_correlacionadas: ganancia en [peso - R/10, peso + R/10], al menos 1
+    - fuertemente_correlacionadas: ganancia = peso + R/10
+    - inversas_fuertemente_correlacionadas: ganancia uniforme en [1, R] y peso = ganancia + R/10
+    - subset_sum: ganancia = peso
+    
+    Args:
+        familia: Una de FAMILIAS
+        n: Número de objetos
+        capacidad: Capacidad de la instancia
+        semilla: Semilla base; la instancia depende también de la familia, n y la capacidad
+    
+    Returns:
+        Objetos de la instancia
+    
+    Raises:
+        ValueError: Si la familia no existe
+    """
+    if familia not in FAMILIAS:
+        raise ValueError(f"Familia desconocida: {familia}. Disponibles: {', '.join(FAMILIAS)}")
+    
+    rng = np.random.default_rng([semilla, FAMILIAS.index(familia), n, capacidad])
+    rango = max(4 * capacidad // n, 10)
+    decimo = rango // 10
+    
+    pesos = rng.integers(1, rango + 1, n)
+    if familia == "no_correlacionadas":
+        ganancias = rng.integers(1, rango + 1, n)
+    elif familia == "debilmente_correlacionadas":
+        ganancias = np.maximum(pesos + rng.integers(-decimo, decimo + 1, n), 1)
+    elif familia == "fuertemente_correlacionadas":
+        ganancias = pesos + decimo
+    elif familia == "inversas_fuertemente_correlacionadas":
+        ganancias = rng.integers(1, rango + 1, n)
+        pesos = ganancias + decimo
+    else:
+        ganancias = pesos.copy()
+    
+    return [ObjetoCatalogo(f"o{i}", peso, ganancia)
+            for i, (peso, ganancia) in enumerate(zip(pesos.tolist(), ganancias.tolist()))]
+
+
+def motivo_para_omitir(motor: str, capacidad: int, objetos: List[ObjetoCatalogo],
+                       segundos_disponibles: float) -> Optional[str]:
+    """
+    Indica por qué no vale la pena medir un motor en una instancia, según su costo previsto.
+    
+    Los motores de tabla y el de núcleo usan el modelo de costo del
+    optimizador; los motores en Python puro, NS_POR_CELDA_PYTHON. dp_paralelo
+    usa el modelo de dp_numpy sin LIMITE_CELDAS_DP, porque está pensado para
+    tablas mayores. Los de búsqueda (branch and bound, Pareto) no tienen
+    modelo y quedan limitados por el tiempo límite.
+    
+    Returns:
+        Motivo, o None si el caso se puede medir
+    """
+    if motor in NS_POR_CELDA_PYTHON:
+        columnas = min(capacidad, sum(obj.peso for obj in objetos))
+        segundos = len(objetos) * (columnas + 1) * NS_POR_CELDA_PYTHON[motor] / 1e9
+    elif motor == "dp_paralelo":
+        costos = optimizador.estimar_costos(capacidad, objetos)
+        segundos = costos["dp_numpy"].segundos
+    else:
+        costos = optimizador.estimar_costos(capacidad, objetos, epsilon=optimizador.EPSILON_POR_DEFECTO)
+        if motor not in costos:
+            return None
+        if costos[motor].celdas > optimizador.LIMITE_CELDAS_DP:
+            return f"tabla de {costos[motor].celdas} celdas"
+        segundos = costos[motor].segundos
+    
+    if segundos > segundos_disponibles:
+        return f"~{segundos:.1f} s previstos por ejecución"
+    return None
+
+
+def medir_motor(capacidad: int, objetos: List[ObjetoCatalogo], motor: str, calentamiento: int,
+                repeticiones: int, segundos_memoria: float = math.inf) -> Dict[str, Any]:
+    """
+    Mide un motor sobre una instancia.
+    
+    El tiempo se toma sin trazar la memoria; la memoria máxima se mide en una
+    ejecución aparte con tracemalloc (incluye los arreglos de NumPy). Como
+    tracemalloc frena decenas de veces a los motores en Python puro, esa
+    ejecución se omite si no cabe en segundos_memoria.
+    
+    Returns:
+        Diccionario con los tiempos de cada repetición, su mediana y mínimo, la
+        memoria máxima (None si se omitió), las celdas calculadas, las celdas
+        por segundo, la ganancia, el motor que resolvió (distinto del pedido
+        con "auto") y, con dp_paralelo, los procesos que llenaron la tabla (1
+        si la instancia era chica y resolvió con dp_numpy)
+    """
+    for _ in range(calentamiento):
+        optimizador.optimizar(capacidad, objetos, motor=motor)
+    
+    segundos = []
+    for _ in range(repeticiones):
+        gc.collect()
+        celdas_inicio = optimizador.celdas_dp
+        inicio = time.perf_counter()
+        resultado = optimizador.optimizar(capacidad, objetos, motor=motor)
+        segundos.append(time.perf_counter() - inicio)
+        celdas = optimizador.celdas_dp - celdas_inicio
+    
+    mediana = statistics.median(segundos)
+    pico_bytes = None
+    if mediana * FACTOR_TRACEMALLOC <= segundos_memoria:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            optimizador.optimizar(capacidad, objetos, motor=motor)
+            _, pico_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    
+    medicion = {
+        "segundos": segundos,
+        "segundos_mediana": mediana,
+        "segundos_min": min(segundos),
+        "pico_bytes": pico_bytes,
+        "celdas": celdas,
+        "celdas_por_segundo": celdas / mediana if celdas and mediana else None,
+        "ganancia": resultado.ganancia_total,
+        "motor_usado": resultado.motor,
+    }
+    if motor == "dp_paralelo":
+        medicion["procesos"] = optimizador.procesos_dp_paralelo
+    return medicion
+
+
+def _medir_en_proceso(conexion, capacidad: int, objetos: List[ObjetoCatalogo], motor: str,
+                      calentamiento: int, repeticiones: int, fecha_limite: float):
+    """Punto de entrada del proceso que mide un caso; envía ("ok", medición) o ("error", mensaje)"""
+    logging.getLogger("optimizer").setLevel(logging.WARNING)
+    try:
+        # La memoria se mide solo si la ejecución con tracemalloc cabe antes de fecha_limite (time.time)
+        conexion.send(("ok", medir_motor(capacidad, objetos, motor, calentamiento, repeticiones,
+                                         fecha_limite - time.time())))
+    except Exception as e:
+        conexion.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conexion.close()
+
+
+def medir_caso(capacidad: int, objetos: List[ObjetoCatalogo], motor: str, calentamiento: int,
+               repeticiones: int, tiempo_limite: float) -> Tuple[str, Dict[str, Any]]:
+    """
+    Mide un caso en un proceso aparte y lo termina si supera el tiempo límite.
+    
+    Un proceso nuevo por caso aísla cada medición y permite cortar los motores
+    de búsqueda, que pueden tardar un tiempo exponencial en las familias
+    correlacionadas.
+    
+    Returns:
+        Tupla con (estado, medición): estado es "ok", "error" o "tiempo_agotado"
+    """
+    contexto = multiprocessing.get_context("spawn")
+    receptor, emisor = contexto.Pipe(duplex=False)
+    proceso = contexto.Process(
+        target=_medir_en_proceso,
+        args=(emisor, capacidad, objetos, motor, calentamiento, repeticiones, time.time() + tiempo_limite)
+    )
+    proceso.start()
+    emisor.close()
+    
+    try:
+        if receptor.poll(tiempo_limite):
+            estado, datos = receptor.recv()
+        else:
+            proceso.kill()
+            estado, datos = "tiempo_agotado", {}
+    except EOFError:
+        # El proceso murió sin responder (por ejemplo, por memoria)
+        estado, datos = "error", f"el proceso terminó con código {proceso.exitcode}"
+    finally:
+        proceso.join()
+        receptor.close()
+    
+    return (estado, datos) if estado == "ok" else (estado, {"detalle": datos} if datos else {})
+
+
+def ejecutar_benchmark(familias: List[str], lista_n: List[int], capacidades: List[int], motores: List[str],
+                       calentamiento: int, repeticiones: int, tiempo_limite: float,
+                       semilla: int) -> List[Dict[str, Any]]:
+    """
+    Mide todos los motores sobre la grilla de familias, número de objetos y capacidades.
+    
+    Returns:
+        Un caso por combinación, con familia, n, capacidad, motor, estado y la
+        medición de medir_motor si el estado es "ok"
+    """
+    casos = []
+    for familia in familias:
+        for n in lista_n:
+            for capacidad in capacidades:
+                objetos = generar_instancia(familia, n, capacidad, semilla)
+                ganancias_exactas = {}
+                
+                for motor in motores:
+                    caso = {"familia": familia, "n": n, "capacidad": capacidad, "motor": motor}
+                    motivo = motivo_para_omitir(motor, capacidad, objetos, tiempo_limite / (calentamiento + repeticiones))
+                    if motivo is not None:
+                        caso.update(estado="omitido", detalle=motivo)
+                    else:
+                        estado, medicion = medir_caso(capacidad, objetos, motor, calentamiento, repeticiones,
+                                                      tiempo_limite)
+                        caso.update(estado=estado, **medicion)
+                        if estado == "ok" and motor not in MOTORES_APROXIMADOS:
+                            ganancias_exactas[motor] = medicion["ganancia"]
+                    
+                    casos.append(caso)
+                    _imprimir_caso(caso)
+                
+                if len(set(ganancias_exactas.values())) > 1:
+                    print(f"❌ Los motores exactos no coinciden en {familia} n={n} capacidad={capacidad}: "
+                          f"{ganancias_exactas}", file=sys.stderr)
+    return casos
+
+
+def _clave(caso: Dict[str, Any]) -> Tuple[str, int, int, str]:
+    return caso["familia"], caso["n"], caso["capacidad"], caso["motor"]
+
+
+def comparar_con_base(casos: List[Dict[str, Any]], base: List[Dict[str, Any]], umbral: float) -> List[str]:
+    """
+    Compara una medición con la base y describe las regresiones.
+    
+    Es regresión que la mediana de tiempo o la memoria máxima crezcan más que
+    el umbral relativo (y más que MINIMO_SEGUNDOS_REGRESION o
+    MINIMO_BYTES_REGRESION en valor absoluto, para no marcar ruido en casos
+    de milisegundos), que un caso medido en la base ahora falle o agote el
+    tiempo, y que un motor exacto cambie la ganancia.
+    
+    Args:
+        casos: Casos de ejecutar_benchmark
+        base: Casos guardados de una ejecución anterior
+        umbral: Aumento relativo tolerado (0.2 = 20 %)
+    
+    Returns:
+        Una descripción por regresión
+    """
+    anteriores = {_clave(caso): caso for caso in base}
+    regresiones = []
+    
+    for caso in casos:
+        anterior = anteriores.get(_clave(caso))
+        if anterior is None or anterior["estado"] != "ok" or caso["estado"] == "omitido":
+            continue
+        
+        nombre = "{} n={} capacidad={} {}".format(*_clave(caso))
+        if caso["estado"] != "ok":
+            regresiones.append(f"{nombre}: {caso['estado']} (antes {anterior['segundos_mediana'] * 1000:.1f} ms)")
+            continue
+        
+        antes, ahora = anterior["segundos_mediana"], caso["segundos_mediana"]
+        if ahora > antes * (1 + umbral) and ahora - antes > MINIMO_SEGUNDOS_REGRESION:
+            regresiones.append(f"{nombre}: tiempo {antes * 1000:.1f} -> {ahora * 1000:.1f} ms "
+                               f"({ahora / antes - 1:+.0%})")
+        
+        antes, ahora = anterior["pico_bytes"], caso["pico_bytes"]
+        if antes and ahora and ahora > antes * (1 + umbral) and ahora - antes > MINIMO_BYTES_REGRESION:
+            regresiones.append(f"{nombre}: memoria {antes / 2**20:.1f} -> {ahora / 2**20:.1f} MiB "
+                               f"({ahora / antes - 1:+.0%})")
+        
+        if caso["motor"] not in MOTORES_APROXIMADOS and caso["ganancia"] != anterior["ganancia"]:
+            regresiones.append(f"{nombre}: ganancia {anterior['ganancia']} -> {caso['ganancia']}")
+    
+    return regresiones
+
+
+def _imprimir_caso(caso: Dict[str, Any]):
+    prefijo = f"{caso['familia']:<38} n={caso['n']:<7} C={caso['capacidad']:<10} {caso['motor']:<17}"
+    if caso["estado"] != "ok":
+        print(f"{prefijo} {caso['estado']} {caso.get('detalle', '')}".rstrip())
+        return
+    
+    celdas = caso["celdas_por_segundo"]
+    texto_celdas = f"{celdas / 1e6:9.1f} Mceldas/s" if celdas else " " * 19
+    pico = caso["pico_bytes"]
+    texto_pico = f"{pico / 2**20:9.2f} MiB" if pico is not None else " " * 13
+    texto_procesos = f" ({caso['procesos']} procesos)" if "procesos" in caso else ""
+    print(f"{prefijo} {caso['segundos_mediana'] * 1000:10.2f} ms {texto_pico} {texto_celdas} "
+          f"{caso['motor_usado']}{texto_procesos}")
+
+
+def _entorno() -> Dict[str, str]:
+    """Datos de la máquina guardados con cada medición: las bases solo se comparan en la misma"""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide los motores de optimización sobre instancias sintéticas")
+    parser.add_argument("--familias", nargs="+", choices=FAMILIAS, default=list(FAMILIAS),
+                        help="Familias de instancias")
+    parser.add_argument("--n", nargs="+", type=int, default=list(N_POR_DEFECTO), help="Números de objetos")
+    parser.add_argument("--capacidades", nargs="+", type=int, default=list(CAPACIDADES_POR_DEFECTO),
+                        help="Capacidades")
+    parser.add_argument("--motores", nargs="+", choices=["auto", *optimizador.motores],
+                        default=["auto", *optimizador.motores], help="Motores a medir")
+    parser.add_argument("--calentamiento", type=int, default=1, help="Ejecuciones descartadas antes de medir")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Ejecuciones medidas por caso")
+    parser.add_argument("--tiempo-limite", type=float, default=30.0,
+                        help="Segundos máximos por caso, incluidas todas las ejecuciones")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla de las instancias")
+    parser.add_argument("-o", "--salida", help="Archivo JSON donde guardar esta medición")
+    parser.add_argument("--base", help="Archivo JSON de una medición anterior con la que comparar")
+    parser.add_argument("--guardar-base", action="store_true",
+                        help="Guardar esta medición en --base en lugar de compararla")
+    parser.add_argument("--umbral", type=float, default=0.2,
+                        help="Aumento relativo de tiempo o memoria que se considera regresión")
+    args = parser.parse_args()
+    
+    if args.guardar_base and not args.base:
+        parser.error("--guardar-base requiere --base")
+    if args.repeticiones < 1:
+        parser.error("--repeticiones debe ser al menos 1")
+    
+    logging.getLogger("optimizer").setLevel(logging.WARNING)
+    
+    casos = ejecutar_benchmark(args.familias, args.n, args.capacidades, args.motores, args.calentamiento,
+                               args.repeticiones, args.tiempo_limite, args.semilla)
+    medicion = {
+        "version": VERSION_FORMATO,
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "entorno": _entorno(),
+        "parametros": {
+            "calentamiento": args.calentamiento,
+            "repeticiones": args.repeticiones,
+            "tiempo_limite": args.tiempo_limite,
+            "semilla": args.semilla,
+        },
+        "casos": casos,
+    }
+    
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(medicion, archivo, indent=2)
+    
+    if args.guardar_base:
+        with open(args.base, "w", encoding="utf-8") as archivo:
+            json.dump(medicion, archivo, indent=2)
+        print(f"💾 Base guardada en {args.base} ({len(casos)} casos)")
+    elif args.base:
+        with open(args.base, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        if base.get("entorno") != medicion["entorno"]:
+            print(f"⚠️ La base se midió en otro entorno: {base.get('entorno')}", file=sys.stderr)
+        
+        regresiones = comparar_con_base(casos, base["casos"], args.umbral)
+        for regresion in regresiones:
+            print(f"❌ {regresion}")
+        print(f"📊 {len(casos)} casos, {len(regresiones)} regresiones respecto de {args.base} "
+              f"(umbral {args.umbral:.0%})")
+        sys.exit(1 if regresiones else 0)
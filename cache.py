@@ -0,0 +1,197 @@
+"""
+Caché de resultados de optimización direccionada por contenido
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Tuple
+
+import numpy as np
+
+from models import Objeto, ResultadoOptimizacion
+
+logger = logging.getLogger(__name__)
+
+
+def clave_solicitud(capacidad: int, objetos: List[Objeto], **opciones) -> str:
+    """
+    Calcula la clave canónica de una solicitud.
+    
+    Es el SHA-256 de la capacidad, el multiconjunto de (nombre, peso, ganancia)
+    ordenado y las opciones que cambian el resultado, por lo que el orden de los
+    objetos no influye.
+    
+    Args:
+        capacidad: Límite presupuestario total
+        objetos: Lista de objetos de la solicitud
+        **opciones: Parámetros adicionales de la optimización (epsilon, tiempo_max_ms...)
+        
+    Returns:
+        Clave hexadecimal
+    """
+    return _clave(capacidad, sorted((obj.nombre, obj.peso, obj.ganancia) for obj in objetos), opciones)
+
+
+def clave_columnas(capacidad: int, nombres: List[str], pesos: np.ndarray, ganancias: np.ndarray, **opciones) -> str:
+    """
+    Calcula la clave de una solicitud columnar; coincide con la de clave_solicitud para los mismos objetos.
+    
+    Los nombres son únicos, así que ordenar por nombre equivale a ordenar las tuplas.
+    """
+    orden = np.argsort(np.asarray(nombres))
+    tuplas = list(zip(np.asarray(nombres)[orden].tolist(), pesos[orden].tolist(), ganancias[orden].tolist()))
+    return _clave(capacidad, tuplas, opciones)
+
+
+def _clave(capacidad: int, tuplas: List[Tuple[str, int, int]], opciones: Dict[str, Any]) -> str:
+    contenido = {
+        "capacidad": capacidad,
+        "objetos": tuplas,
+        "opciones": {k: v for k, v in sorted(opciones.items()) if v is not None}
+    }
+    serializado = json.dumps(contenido, separators=(",", ":"))
+    return hashlib.sha256(serializado.encode()).hexdigest()
+
+
+class CacheResultados:
+    """
+    Caché LRU con expiración de resultados de optimización.
+    
+    El nivel en memoria guarda hasta max_entradas resultados y descarta el
+    menos usado recientemente. Si se indica ruta_disco, los resultados también
+    se guardan en SQLite y sobreviven a reinicios; un fallo en memoria consulta
+    el disco y, si acierta, promueve la entrada a memoria.
+    
+    El nivel en memoria solo se usa desde el event loop. Las consultas a
+    SQLite se hacen en un hilo (asyncio.to_thread) bajo un lock, y las
+    entradas expiradas se borran cada PODA_CADA inserciones, en tandas de
+    PODA_TANDA filas por el índice de creado.
+    """
+    
+    PODA_CADA = 256
+    PODA_TANDA = 1000
+    
+    def __init__(self, max_entradas: int, ttl_segundos: float, ruta_disco: Optional[str] = None):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self._entradas: "OrderedDict[str, Tuple[float, ResultadoOptimizacion]]" = OrderedDict()
+        
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.expiradas = 0
+        
+        self._disco = None
+        self._bloqueo_disco = threading.Lock()
+        self._inserciones = 0
+        if ruta_disco:
+            self._disco = sqlite3.connect(ruta_disco, check_same_thread=False)
+            self._disco.execute(
+                "CREATE TABLE IF NOT EXISTS resultados (clave TEXT PRIMARY KEY, resultado TEXT, creado REAL)"
+            )
+            self._disco.execute("CREATE INDEX IF NOT EXISTS resultados_creado ON resultados (creado)")
+            self._disco.commit()
+            logger.info(f"💾 Caché en disco habilitada: {ruta_disco}")
+    
+    async def obtener(self, clave: str) -> Optional[ResultadoOptimizacion]:
+        """Devuelve el resultado guardado para la clave, o None si no existe o expiró"""
+        ahora = time.time()
+        
+        entrada = self._entradas.get(clave)
+        if entrada is not None:
+            creado, resultado = entrada
+            if ahora - creado <= self.ttl_segundos:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return resultado
+            del self._entradas[clave]
+            self.expiradas += 1
+        
+        if self._disco is not None:
+            fila = await asyncio.to_thread(self._leer_disco, clave)
+            if fila is not None and ahora - fila[1] <= self.ttl_segundos:
+                resultado = ResultadoOptimizacion(**json.loads(fila[0]))
+                self._guardar_en_memoria(clave, resultado, fila[1])
+                self.aciertos_disco += 1
+                return resultado
+        
+        self.fallos += 1
+        return None
+    
+    async def guardar(self, clave: str, resultado: ResultadoOptimizacion):
+        """Guarda un resultado en memoria y, si está habilitado, en disco"""
+        creado = time.time()
+        self._guardar_en_memoria(clave, resultado, creado)
+        
+        if self._disco is not None:
+            self._inserciones += 1
+            podar = self._inserciones % self.PODA_CADA == 0
+            await asyncio.to_thread(self._escribir_disco, clave, resultado.json(), creado, podar)
+    
+    def _leer_disco(self, clave: str) -> Optional[Tuple[str, float]]:
+        with self._bloqueo_disco:
+            if self._disco is None:
+                return None
+            return self._disco.execute(
+                "SELECT resultado, creado FROM resultados WHERE clave = ?", (clave,)
+            ).fetchone()
+    
+    def _escribir_disco(self, clave: str, serializado: str, creado: float, podar: bool):
+        with self._bloqueo_disco:
+            if self._disco is None:
+                return
+            self._disco.execute(
+                "INSERT OR REPLACE INTO resultados (clave, resultado, creado) VALUES (?, ?, ?)",
+                (clave, serializado, creado)
+            )
+            self._disco.commit()
+            if podar:
+                self._podar_disco(creado - self.ttl_segundos)
+    
+    def _podar_disco(self, limite: float):
+        """Borra las entradas creadas antes de limite, en tandas para no retener el lock de SQLite"""
+        while True:
+            borradas = self._disco.execute(
+                "DELETE FROM resultados WHERE rowid IN "
+                "(SELECT rowid FROM resultados WHERE creado < ? LIMIT ?)",
+                (limite, self.PODA_TANDA)
+            ).rowcount
+            self._disco.commit()
+            if borradas < self.PODA_TANDA:
+                return
+    
+    def _guardar_en_memoria(self, clave: str, resultado: ResultadoOptimizacion, creado: float):
+        self._entradas[clave] = (creado, resultado)
+        self._entradas.move_to_end(clave)
+        
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+            self.expulsiones += 1
+    
+    def cerrar(self):
+        """Cierra la conexión al nivel en disco"""
+        with self._bloqueo_disco:
+            if self._disco is not None:
+                self._disco.close()
+                self._disco = None
+    
+    def estadisticas(self) -> Dict[str, Any]:
+        """Contadores de uso de la caché"""
+        return {
+            "entradas": len(self._entradas),
+            "max_entradas": self.max_entradas,
+            "ttl_segundos": self.ttl_segundos,
+            "aciertos": self.aciertos,
+            "aciertos_disco": self.aciertos_disco,
+            "fallos": self.fallos,
+            "expulsiones": self.expulsiones,
+            "expiradas": self.expiradas,
+            "disco": self._disco is not None
+        }
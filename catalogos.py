@@ -0,0 +1,243 @@
+"""
+Catálogos de objetos guardados en el servidor en formato columnar y mapeado en memoria
+"""
+
+import bisect
+import hashlib
+import logging
+import os
+import re
+import struct
+from typing import List, Optional, Dict, Any, NamedTuple
+
+import numpy as np
+
+from configuracion import CATALOGOS_DIR
+from models import Objeto
+
+logger = logging.getLogger(__name__)
+
+# Cabecera: magia, versión, número de objetos y bytes de la tabla de nombres (relleno hasta 32 bytes)
+_CABECERA = struct.Struct("<4sIQQ")
+_TAMANO_CABECERA = 32
+_MAGIA = b"CATP"
+_VERSION = 1
+
+_PATRON_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class CatalogoNoEncontrado(Exception):
+    """El catálogo pedido no existe"""
+
+
+class ObjetoCatalogo(NamedTuple):
+    """Objeto de un catálogo, con la misma interfaz que Objeto para los motores"""
+    nombre: str
+    peso: int
+    ganancia: int
+
+
+class Catalogo:
+    """
+    Catálogo abierto con un solo mmap de solo lectura.
+    
+    El archivo contiene, tras la cabecera, los pesos y las ganancias como
+    arreglos int64 paralelos, los desplazamientos de cada nombre (n + 1 int64)
+    y los nombres concatenados en UTF-8, ordenados alfabéticamente. Todas las
+    columnas son vistas NumPy sobre el mismo mapa: abrir un catálogo no crea
+    objetos Python por elemento y los procesos del pool comparten las páginas
+    a través de la caché del sistema operativo.
+    """
+    
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._mapa = np.memmap(ruta, dtype=np.uint8, mode="r")
+        
+        magia, version, n, bytes_nombres = _CABECERA.unpack_from(self._mapa, 0)
+        if magia != _MAGIA or version != _VERSION:
+            raise ValueError(f"{ruta} no es un catálogo válido")
+        
+        inicio = _TAMANO_CABECERA
+        self.pesos = self._mapa[inicio:inicio + 8 * n].view(np.int64)
+        inicio += 8 * n
+        self.ganancias = self._mapa[inicio:inicio + 8 * n].view(np.int64)
+        inicio += 8 * n
+        self.desplazamientos = self._mapa[inicio:inicio + 8 * (n + 1)].view(np.int64)
+        inicio += 8 * (n + 1)
+        self._nombres = self._mapa[inicio:inicio + bytes_nombres]
+        
+        self.n = n
+    
+    def nombre(self, i: int) -> str:
+        """Nombre del objeto en la posición i"""
+        return self._nombres[self.desplazamientos[i]:self.desplazamientos[i + 1]].tobytes().decode()
+    
+    def indice(self, nombre: str) -> Optional[int]:
+        """Posición del objeto con ese nombre (búsqueda binaria), o None si no existe"""
+        i = bisect.bisect_left(_VistaNombres(self), nombre)
+        return i if i < self.n and self.nombre(i) == nombre else None
+    
+    def objetos(self, indices: np.ndarray) -> List[ObjetoCatalogo]:
+        """Crea los objetos de las posiciones indicadas (solo los candidatos de una optimización)"""
+        return [
+            ObjetoCatalogo(self.nombre(i), peso, ganancia)
+            for i, peso, ganancia in zip(indices.tolist(), self.pesos[indices].tolist(), self.ganancias[indices].tolist())
+        ]
+    
+    def resumen(self, id_catalogo: str) -> Dict[str, Any]:
+        """Datos generales del catálogo"""
+        return {
+            "id": id_catalogo,
+            "objetos": self.n,
+            "peso_total": int(self.pesos.sum()),
+            "ganancia_total": int(self.ganancias.sum()),
+            "bytes": int(self._mapa.size)
+        }
+
+
+class _VistaNombres:
+    """Secuencia perezosa de los nombres de un catálogo, para bisect"""
+    
+    def __init__(self, catalogo: Catalogo):
+        self._catalogo = catalogo
+    
+    def __len__(self):
+        return self._catalogo.n
+    
+    def __getitem__(self, i: int) -> str:
+        return self._catalogo.nombre(i)
+
+
+# Catálogos abiertos en este proceso
+_abiertos: Dict[str, Catalogo] = {}
+
+
+def _ruta(id_catalogo: str, directorio: str) -> str:
+    if not _PATRON_ID.match(id_catalogo):
+        raise CatalogoNoEncontrado(f"Identificador de catálogo inválido: {id_catalogo}")
+    return os.path.join(directorio, f"{id_catalogo}.cat")
+
+
+def guardar_catalogo(objetos: List[Objeto], directorio: str = CATALOGOS_DIR) -> str:
+    """
+    Escribe un catálogo y devuelve su identificador.
+    
+    El identificador es un hash del contenido, así que subir dos veces el
+    mismo conjunto de objetos (en cualquier orden) devuelve el mismo catálogo.
+    
+    Args:
+        objetos: Objetos del catálogo, con nombres únicos
+        directorio: Carpeta donde se guardan los catálogos
+    
+    Returns:
+        Identificador hexadecimal del catálogo
+    """
+    ordenados = sorted(objetos, key=lambda obj: obj.nombre)
+    n = len(ordenados)
+    
+    nombres = [obj.nombre.encode() for obj in ordenados]
+    desplazamientos = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum([len(nombre) for nombre in nombres], out=desplazamientos[1:])
+    tabla_nombres = b"".join(nombres)
+    
+    contenido = b"".join([
+        _CABECERA.pack(_MAGIA, _VERSION, n, len(tabla_nombres)).ljust(_TAMANO_CABECERA, b"\0"),
+        np.fromiter((obj.peso for obj in ordenados), dtype=np.int64, count=n).tobytes(),
+        np.fromiter((obj.ganancia for obj in ordenados), dtype=np.int64, count=n).tobytes(),
+        desplazamientos.tobytes(),
+        tabla_nombres
+    ])
+    
+    id_catalogo = hashlib.sha256(contenido).hexdigest()[:32]
+    ruta = _ruta(id_catalogo, directorio)
+    
+    if not os.path.exists(ruta):
+        os.makedirs(directorio, exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+        logger.info(f"🗂️ Catálogo {id_catalogo} guardado: {n} objetos, {len(contenido)} bytes")
+    
+    return id_catalogo
+
+
+def abrir_catalogo(id_catalogo: str, directorio: str = CATALOGOS_DIR) -> Catalogo:
+    """
+    Abre un catálogo, reutilizando el mapa si este proceso ya lo abrió.
+    
+    Raises:
+        CatalogoNoEncontrado: Si el catálogo no existe o fue eliminado
+    """
+    ruta = _ruta(id_catalogo, directorio)
+    
+    if not os.path.exists(ruta):
+        _abiertos.pop(id_catalogo, None)
+        raise CatalogoNoEncontrado(f"El catálogo '{id_catalogo}' no existe")
+    
+    catalogo = _abiertos.get(id_catalogo)
+    if catalogo is None:
+        catalogo = _abiertos[id_catalogo] = Catalogo(ruta)
+    return catalogo
+
+
+def eliminar_catalogo(id_catalogo: str, directorio: str = CATALOGOS_DIR):
+    """
+    Elimina un catálogo del disco.
+    
+    Raises:
+        CatalogoNoEncontrado: Si el catálogo no existe
+    """
+    ruta = _ruta(id_catalogo, directorio)
+    _abiertos.pop(id_catalogo, None)
+    
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        raise CatalogoNoEncontrado(f"El catálogo '{id_catalogo}' no existe")
+    logger.info(f"🗂️ Catálogo {id_catalogo} eliminado")
+
+
+def filtrar_catalogo(catalogo: Catalogo, capacidad: int, filtro: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """
+    Calcula con NumPy las posiciones de los objetos que cumplen el filtro y caben en la capacidad.
+    
+    Args:
+        catalogo: Catálogo abierto
+        capacidad: Límite presupuestario; los objetos más pesados se descartan
+        filtro: Diccionario con incluir, excluir (listas de nombres), peso_maximo y ganancia_minima
+    
+    Returns:
+        Posiciones de los objetos candidatos
+    
+    Raises:
+        ValueError: Si algún nombre de incluir o excluir no está en el catálogo
+    """
+    filtro = filtro or {}
+    mascara = catalogo.pesos <= capacidad
+    
+    if filtro.get("peso_maximo") is not None:
+        mascara &= catalogo.pesos <= filtro["peso_maximo"]
+    if filtro.get("ganancia_minima") is not None:
+        mascara &= catalogo.ganancias >= filtro["ganancia_minima"]
+    
+    for clave, incluir in (("incluir", True), ("excluir", False)):
+        nombres = filtro.get(clave)
+        if nombres is None:
+            continue
+        
+        indices = []
+        for nombre in nombres:
+            i = catalogo.indice(nombre)
+            if i is None:
+                raise ValueError(f"El objeto '{nombre}' no existe en el catálogo")
+            indices.append(i)
+        
+        if incluir:
+            seleccion = np.zeros(catalogo.n, dtype=bool)
+            seleccion[indices] = True
+            mascara &= seleccion
+        else:
+            mascara[indices] = False
+    
+    return np.flatnonzero(mascara)
@@ -0,0 +1,133 @@
+"""
+Formato columnar de solicitudes: arreglos paralelos de nombres, pesos y ganancias
+"""
+
+import re
+import struct
+from typing import List, Tuple, Optional
+
+import numpy as np
+
+from configuracion import MAX_OBJETOS
+from catalogos import ObjetoCatalogo
+from models import validar_ganancia_total
+
+# Todos los nombres unidos por saltos de línea se validan con una sola pasada
+_PATRON_NOMBRE = re.compile(r"[a-zA-Z0-9_-]{1,50}")
+_PATRON_NOMBRES = re.compile(r"(?:[a-zA-Z0-9_-]{1,50}\n)*[a-zA-Z0-9_-]{1,50}")
+
+# Codificación binaria: magia, versión, número de objetos y capacidad, seguidos de
+# pesos y ganancias (int64 little endian) y los nombres en ASCII separados por "\n"
+_CABECERA = struct.Struct("<4sIQq")
+_MAGIA = b"COLS"
+_VERSION = 1
+
+
+def validar_columnas(nombres: List[str], pesos, ganancias,
+                     texto_nombres: Optional[str] = None) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Valida en bloque una solicitud columnar con las mismas reglas que Objeto.
+    
+    Args:
+        nombres: Nombre de cada objeto
+        pesos: Peso de cada objeto (lista o arreglo)
+        ganancias: Ganancia de cada objeto (lista o arreglo)
+        texto_nombres: Nombres ya unidos por "\\n", si se tienen (evita volver a unirlos)
+    
+    Returns:
+        Tupla con (nombres, pesos, ganancias) como arreglos int64
+    
+    Raises:
+        ValueError: Si las columnas no tienen el mismo largo, algún valor no es
+            positivo, las ganancias suman MAX_GANANCIA_TOTAL o más, algún nombre
+            es inválido o hay nombres duplicados
+    """
+    n = len(nombres)
+    if not 1 <= n <= MAX_OBJETOS:
+        raise ValueError(f"Debe haber entre 1 y {MAX_OBJETOS} objetos (recibidos: {n})")
+    
+    if len(pesos) != n or len(ganancias) != n:
+        raise ValueError(f"nombres, pesos y ganancias deben tener el mismo largo "
+                         f"({n}, {len(pesos)}, {len(ganancias)})")
+    
+    try:
+        pesos = np.asarray(pesos, dtype=np.int64)
+        ganancias = np.asarray(ganancias, dtype=np.int64)
+    except OverflowError:
+        raise ValueError("Los pesos y ganancias deben caber en un entero de 64 bits")
+    
+    for columna, valores in (("peso", pesos), ("ganancia", ganancias)):
+        no_positivos = valores <= 0
+        if no_positivos.any():
+            i = int(np.argmax(no_positivos))
+            raise ValueError(f"El {columna} del objeto {i} debe ser mayor que 0")
+    
+    # La suma en int64 podría desbordar: se hace con enteros de Python
+    validar_ganancia_total(ganancias.tolist())
+    
+    if texto_nombres is None:
+        texto_nombres = "\n".join(nombres)
+    if texto_nombres.count("\n") != n - 1 or not _PATRON_NOMBRES.fullmatch(texto_nombres):
+        # Solo en el caso de error se recorre nombre por nombre para informar cuál falla
+        i = next((i for i, nombre in enumerate(nombres) if not _PATRON_NOMBRE.fullmatch(nombre)), 0)
+        raise ValueError(f"Nombre inválido en el objeto {i}: el nombre debe tener entre 1 y 50 caracteres "
+                         f"y solo puede contener letras, números, guiones y guiones bajos")
+    
+    if len(set(nombres)) != n:
+        raise ValueError("No puede haber nombres duplicados en los objetos")
+    
+    return nombres, pesos, ganancias
+
+
+def decodificar_binario(contenido: bytes) -> Tuple[int, List[str], np.ndarray, np.ndarray]:
+    """
+    Decodifica y valida una solicitud columnar binaria.
+    
+    Los pesos y ganancias se leen sin copiar con np.frombuffer.
+    
+    Args:
+        contenido: Cuerpo binario generado con codificar_binario
+    
+    Returns:
+        Tupla con (capacidad, nombres, pesos, ganancias)
+    
+    Raises:
+        ValueError: Si el contenido está mal formado o no pasa validar_columnas
+    """
+    if len(contenido) < _CABECERA.size:
+        raise ValueError("Contenido binario demasiado corto")
+    
+    magia, version, n, capacidad = _CABECERA.unpack_from(contenido, 0)
+    if magia != _MAGIA or version != _VERSION:
+        raise ValueError("El contenido no es una solicitud columnar binaria válida")
+    
+    inicio_nombres = _CABECERA.size + 16 * n
+    if len(contenido) < inicio_nombres:
+        raise ValueError(f"Contenido binario truncado: se esperaban {n} pesos y ganancias")
+    
+    pesos = np.frombuffer(contenido, dtype="<i8", count=n, offset=_CABECERA.size)
+    ganancias = np.frombuffer(contenido, dtype="<i8", count=n, offset=_CABECERA.size + 8 * n)
+    
+    try:
+        texto_nombres = contenido[inicio_nombres:].decode("ascii")
+    except UnicodeDecodeError:
+        raise ValueError("Los nombres deben estar en ASCII")
+    nombres = texto_nombres.split("\n") if n else []
+    
+    nombres, pesos, ganancias = validar_columnas(nombres, pesos, ganancias, texto_nombres)
+    return capacidad, nombres, pesos, ganancias
+
+
+def codificar_binario(capacidad: int, nombres: List[str], pesos, ganancias) -> bytes:
+    """Codifica una solicitud en el formato columnar binario"""
+    return b"".join([
+        _CABECERA.pack(_MAGIA, _VERSION, len(nombres), capacidad),
+        np.asarray(pesos, dtype="<i8").tobytes(),
+        np.asarray(ganancias, dtype="<i8").tobytes(),
+        "\n".join(nombres).encode("ascii")
+    ])
+
+
+def objetos_de_columnas(nombres: List[str], pesos: np.ndarray, ganancias: np.ndarray) -> List[ObjetoCatalogo]:
+    """Objetos ligeros para los motores, sin crear modelos Objeto"""
+    return list(map(ObjetoCatalogo, nombres, pesos.tolist(), ganancias.tolist()))
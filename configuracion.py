@@ -0,0 +1,70 @@
+"""
+Parámetros configurables del servicio, leídos de variables de entorno
+"""
+
+import os
+
+# Número máximo de objetos aceptados en una solicitud de optimización
+MAX_OBJETOS = int(os.getenv("MAX_OBJETOS", "100000"))
+
+# Suma máxima (exclusiva) de las ganancias de una instancia: las tablas de los motores
+# son int64 y con este margen ninguna suma parcial ni centinela desborda
+MAX_GANANCIA_TOTAL = 2 ** 62
+
+# Número máximo de solicitudes en un lote de /optimizar/lote
+MAX_LOTE = int(os.getenv("MAX_LOTE", "10000"))
+
+# Procesos del pool que resuelve las optimizaciones (por defecto, uno por núcleo)
+POOL_PROCESOS = int(os.getenv("POOL_PROCESOS", str(os.cpu_count() or 1)))
+
+# Procesos del motor dp_paralelo por optimización. El motor solo se usa si se pide por nombre
+# desde la biblioteca o benchmark.py: en los procesos (daemon) del pool resuelve con dp_numpy
+DP_PARALELO_PROCESOS = int(os.getenv("DP_PARALELO_PROCESOS", str(os.cpu_count() or 1)))
+
+# Optimizaciones en curso o en cola admitidas antes de responder 503
+POOL_MAX_PENDIENTES = int(os.getenv("POOL_MAX_PENDIENTES", str(4 * POOL_PROCESOS)))
+
+# Caché de resultados de /optimizar
+CACHE_MAX_ENTRADAS = int(os.getenv("CACHE_MAX_ENTRADAS", "1024"))
+CACHE_TTL_SEGUNDOS = float(os.getenv("CACHE_TTL_SEGUNDOS", "300"))
+
+# Ruta del archivo SQLite del nivel en disco de la caché; vacío lo desactiva
+CACHE_RUTA_DISCO = os.getenv("CACHE_RUTA_DISCO", "")
+
+# Máximo de capacidades por consulta a /optimizar/capacidades
+MAX_CAPACIDADES = int(os.getenv("MAX_CAPACIDADES", "10000"))
+
+# Sesiones de re-optimización incremental abiertas a la vez
+SESIONES_MAX = int(os.getenv("SESIONES_MAX", "100"))
+
+# Memoria total de las sesiones (bytes)
+SESIONES_MAX_BYTES = int(os.getenv("SESIONES_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Tiempo de inactividad tras el que una sesión expira (segundos)
+SESIONES_TTL_SEGUNDOS = float(os.getenv("SESIONES_TTL_SEGUNDOS", "1800"))
+
+# Carpeta donde se guardan los catálogos de objetos
+CATALOGOS_DIR = os.getenv("CATALOGOS_DIR", "catalogos")
+
+# Máximo de objetos por catálogo
+MAX_OBJETOS_CATALOGO = int(os.getenv("MAX_OBJETOS_CATALOGO", "1000000"))
+
+# Optimizaciones simultáneas por flujo NDJSON (/optimizar/ndjson y flujo_ndjson.py)
+NDJSON_CONCURRENCIA = int(os.getenv("NDJSON_CONCURRENCIA", str(POOL_PROCESOS)))
+
+# Tamaño máximo de una línea NDJSON
+NDJSON_MAX_BYTES_LINEA = int(os.getenv("NDJSON_MAX_BYTES_LINEA", str(16 * 1024 * 1024)))
+
+# Presupuesto de CPU (segundos) y memoria (bytes) por optimización según el modelo de costo
+PRESUPUESTO_SEGUNDOS = float(os.getenv("PRESUPUESTO_SEGUNDOS", "30"))
+PRESUPUESTO_BYTES = int(os.getenv("PRESUPUESTO_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# Si las solicitudes que superan el presupuesto se degradan a búsqueda con tiempo máximo (1) o se rechazan (0)
+ADMISION_DEGRADAR = os.getenv("ADMISION_DEGRADAR", "1") == "1"
+
+# Si se admite perfilar solicitudes individuales con cProfile o tracemalloc (X-Perfil o ?perfil=).
+# Desactivado por defecto: cualquier cliente podría activarlo con un encabezado
+PERFILADO_HABILITADO = os.getenv("PERFILADO_HABILITADO", "0") == "1"
+
+# Funciones o líneas informadas en el perfil de una solicitud
+PERFIL_TOP = int(os.getenv("PERFIL_TOP", "20"))
@@ -0,0 +1,221 @@
+"""
+Tabla de programación dinámica en memoria compartida, llenada por varios procesos
+"""
+
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Los tramos empiezan en múltiplos de 512 columnas: 4 KiB de cada fila int64 y 64 bytes
+# de decisiones, así dos procesos nunca escriben en la misma línea de caché
+ALINEACION_COLUMNAS = 512
+
+# Columnas mínimas por proceso: con menos, la barrera de cada objeto pesa más que el tramo
+MIN_COLUMNAS_POR_PROCESO = 100_000
+
+# Celdas mínimas para repartir la tabla: por debajo no compensa crear los procesos (~0,2 s)
+MIN_CELDAS_PARALELO = 50_000_000
+
+
+def procesos_para(n: int, columnas: int, maximo: int) -> int:
+    """
+    Procesos que conviene usar para una tabla de n filas y el número de columnas dado.
+    
+    Un proceso daemon (por ejemplo, de multiprocessing.Pool) no puede crear
+    procesos, así que desde él la tabla siempre se llena en un solo proceso.
+    """
+    if maximo <= 1 or n * columnas < MIN_CELDAS_PARALELO or multiprocessing.current_process().daemon:
+        return 1
+    return max(1, min(maximo, columnas // MIN_COLUMNAS_POR_PROCESO))
+
+
+def limites_tramos(columnas: int, procesos: int) -> List[int]:
+    """
+    Reparte las columnas 0..columnas-1 en tramos contiguos de tamaño parecido.
+    
+    Returns:
+        Lista de procesos + 1 límites: el tramo k es [limites[k], limites[k + 1])
+    """
+    bloques = -(-columnas // ALINEACION_COLUMNAS)
+    limites = [min(bloques * k // procesos * ALINEACION_COLUMNAS, columnas) for k in range(procesos)]
+    return limites + [columnas]
+
+
+def _llenar_tramo(filas: np.ndarray, seleccion: np.ndarray, pesos: np.ndarray, ganancias: np.ndarray,
+                  inicio: int, fin: int, barrera=None) -> int:
+    """
+    Aplica todos los objetos a las columnas [inicio, fin) de la tabla.
+    
+    Cada objeto lee la fila anterior y escribe la otra (doble búfer), de modo
+    que ningún tramo pisa valores que otro proceso todavía necesita. Tras
+    cada objeto se espera en la barrera: la fila nueva queda completa antes
+    de que alguien la lea como anterior. Las decisiones del tramo se
+    empaquetan en los bytes inicio // 8.. de la fila del objeto, que no
+    comparte con ningún otro tramo. Los objetos que no caben no cambian la
+    fila ni esperan en la barrera, igual en todos los procesos.
+    
+    Returns:
+        Índice (0 o 1) de la fila con el resultado final
+    """
+    capacidad = filas.shape[1] - 1
+    largo = fin - inicio
+    incluyendo = np.empty(largo, dtype=np.int64)
+    decision = np.empty(largo, dtype=bool)
+    origen = 0
+    
+    for i, (peso, ganancia) in enumerate(zip(pesos.tolist(), ganancias.tolist())):
+        if peso > capacidad:
+            continue
+        
+        anterior, nueva = filas[origen], filas[1 - origen]
+        
+        # Columnas del tramo donde el objeto no cabe: se copia la fila anterior
+        corte = min(max(peso, inicio), fin)
+        nueva[inicio:corte] = anterior[inicio:corte]
+        decision[:corte - inicio] = False
+        
+        # Resto del tramo: misma comparación estricta que _avanzar_fila_dp
+        m = fin - corte
+        np.add(anterior[corte - peso:fin - peso], ganancia, out=incluyendo[:m])
+        np.greater(incluyendo[:m], anterior[corte:fin], out=decision[corte - inicio:])
+        np.maximum(anterior[corte:fin], incluyendo[:m], out=nueva[corte:fin])
+        seleccion[i, inicio >> 3:(fin + 7) >> 3] = np.packbits(decision, bitorder="little")
+        
+        origen = 1 - origen
+        if barrera is not None:
+            barrera.wait()
+    
+    return origen
+
+
+def _trabajador(nombre_memoria: str, n: int, capacidad: int, pesos: np.ndarray, ganancias: np.ndarray,
+                inicio: int, fin: int, barrera):
+    """Proceso que llena un tramo de la tabla compartida"""
+    memoria = shared_memory.SharedMemory(name=nombre_memoria)
+    try:
+        filas, seleccion = _vistas(memoria, n, capacidad)
+        _llenar_tramo(filas, seleccion, pesos, ganancias, inicio, fin, barrera)
+    except BaseException:
+        # Los demás procesos dejan de esperar en la barrera y terminan también
+        barrera.abort()
+        raise
+    finally:
+        filas = seleccion = None
+        memoria.close()
+
+
+def _vistas(memoria: shared_memory.SharedMemory, n: int, capacidad: int):
+    """Las dos filas de ganancias (2 x capacidad + 1 int64) y la matriz de decisiones empaquetadas"""
+    columnas = capacidad + 1
+    filas = np.ndarray((2, columnas), dtype=np.int64, buffer=memoria.buf)
+    seleccion = np.ndarray((n, (capacidad >> 3) + 1), dtype=np.uint8, buffer=memoria.buf, offset=filas.nbytes)
+    return filas, seleccion
+
+
+def _esperar(procesos: List[multiprocessing.Process]):
+    """
+    Espera a que terminen todos los procesos; si alguno falla, termina al resto.
+    
+    No basta con romper la barrera: si un proceso muere mientras tiene
+    tomado el lock interno de la barrera, abort() no volvería nunca.
+    
+    Raises:
+        RuntimeError: Si algún proceso termina con un código distinto de 0
+    """
+    pendientes = {proceso.sentinel: proceso for proceso in procesos}
+    while pendientes:
+        for sentinela in wait(list(pendientes)):
+            proceso = pendientes.pop(sentinela)
+            proceso.join()
+            if proceso.exitcode != 0:
+                for otro in pendientes.values():
+                    otro.kill()
+                raise RuntimeError(f"Un proceso del motor paralelo terminó con el código {proceso.exitcode}")
+
+
+class TablaCompartida:
+    """
+    Tabla de decisiones de la mochila 0/1 en un segmento de memoria compartida.
+    
+    El segmento tiene dos filas de ganancias (la anterior y la nueva de cada
+    objeto) y la matriz de decisiones con el mismo formato que
+    _tabla_dp_numpy: n x ceil((capacidad + 1) / 8) bytes, un bit por celda.
+    Los procesos que la llenan se conectan por nombre, sin copiar nada.
+    Se debe cerrar con cerrar(); las vistas filas y seleccion dejan de ser
+    válidas y no deben guardarse fuera del objeto.
+    """
+    
+    def __init__(self, n: int, capacidad: int):
+        self.n = n
+        self.capacidad = capacidad
+        bytes_totales = 2 * 8 * (capacidad + 1) + n * ((capacidad >> 3) + 1)
+        self._memoria = shared_memory.SharedMemory(create=True, size=bytes_totales)
+        self.filas, self.seleccion = _vistas(self._memoria, n, capacidad)
+        self.fila_final = 0
+    
+    def llenar(self, pesos: np.ndarray, ganancias: np.ndarray, procesos: int):
+        """
+        Aplica todos los objetos repartiendo las columnas entre procesos.
+        
+        Con un solo proceso la tabla se llena aquí; si no, se crea un proceso
+        por tramo y este solo los supervisa. El segmento se crea en cero, así
+        que las decisiones de los objetos que no caben quedan en cero; la
+        tabla se llena una sola vez.
+        
+        Args:
+            pesos: Pesos de los objetos (int64), en el orden de las filas
+            ganancias: Ganancias de los objetos (int64)
+            procesos: Procesos entre los que se reparten las columnas
+            
+        Raises:
+            RuntimeError: Si algún proceso falla antes de terminar
+        """
+        if procesos == 1:
+            self.fila_final = _llenar_tramo(self.filas, self.seleccion, pesos, ganancias, 0, self.capacidad + 1)
+            return
+        
+        limites = limites_tramos(self.capacidad + 1, procesos)
+        contexto = multiprocessing.get_context("spawn")
+        barrera = contexto.Barrier(procesos)
+        trabajadores = [
+            contexto.Process(
+                target=_trabajador,
+                args=(self._memoria.name, self.n, self.capacidad, pesos, ganancias,
+                      limites[k], limites[k + 1], barrera)
+            )
+            for k in range(procesos)
+        ]
+        
+        try:
+            for trabajador in trabajadores:
+                trabajador.start()
+            _esperar(trabajadores)
+        finally:
+            for trabajador in trabajadores:
+                if trabajador.is_alive():
+                    trabajador.kill()
+                if trabajador.pid is not None:
+                    trabajador.join()
+        
+        # Cada objeto que cabe alterna la fila de destino
+        self.fila_final = int((pesos <= self.capacidad).sum()) % 2
+    
+    def ganancia(self, capacidad: Optional[int] = None) -> int:
+        """Ganancia máxima para la capacidad indicada (por defecto, la de la tabla)"""
+        return int(self.filas[self.fila_final, self.capacidad if capacidad is None else capacidad])
+    
+    def cerrar(self):
+        """Libera el segmento de memoria compartida"""
+        self.filas = self.seleccion = None
+        self._memoria.unlink()
+        try:
+            self._memoria.close()
+        except BufferError:
+            # Quedan vistas vivas (por ejemplo, en el traceback de un error): el mapa se libera con ellas
+            pass
@@ -0,0 +1,325 @@
+"""
+Ejecución de las optimizaciones en un pool de procesos, fuera del event loop
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial, wraps
+from typing import List, Optional, Dict, Any, Callable, Tuple, NamedTuple
+
+import numpy as np
+from pydantic import ValidationError
+
+from configuracion import PRESUPUESTO_SEGUNDOS, PRESUPUESTO_BYTES, ADMISION_DEGRADAR
+from models import Objeto, ResultadoOptimizacion, DepuracionOptimizacion
+from optimizer import optimizador, PlanOptimizacion, InstanciaResuelta
+from catalogos import abrir_catalogo, filtrar_catalogo
+from columnar import objetos_de_columnas
+from metricas import MetricasServicio, rss_pico_bytes
+from perfilado import ejecutar_perfilado
+
+logger = logging.getLogger(__name__)
+
+
+class ServicioSaturado(Exception):
+    """Se alcanzó el máximo de optimizaciones pendientes"""
+
+
+class DiagnosticoProceso(NamedTuple):
+    """Datos que un proceso del pool devuelve junto con cada resultado"""
+    instancias: List[InstanciaResuelta]
+    rss_pico_bytes: Optional[int]
+    fases: Dict[str, float]
+    segundos: float
+    perfil: Optional[Dict[str, Any]] = None
+
+
+def _con_diagnostico(funcion: Callable) -> Callable:
+    """
+    Devuelve (resultado, DiagnosticoProceso) con las optimizaciones resueltas en la tarea.
+    
+    Acepta además el argumento perfil ("cpu" o "memoria") para ejecutar la tarea
+    bajo ejecutar_perfilado. Las fases incluyen "otros": el tiempo de la tarea
+    que no corresponde a ninguna fase del optimizador.
+    """
+    @wraps(funcion)
+    def envoltura(*args, perfil: Optional[str] = None, **kwargs):
+        # Descartar lo que haya dejado una tarea anterior que falló
+        optimizador.extraer_instancias()
+        optimizador.extraer_fases()
+        
+        inicio = time.perf_counter()
+        if perfil is None:
+            resultado, informe = funcion(*args, **kwargs), None
+        else:
+            resultado, informe = ejecutar_perfilado(partial(funcion, *args, **kwargs), perfil)
+        segundos = time.perf_counter() - inicio
+        
+        fases = optimizador.extraer_fases()
+        fases["otros"] = max(segundos - sum(fases.values()), 0.0)
+        return resultado, DiagnosticoProceso(
+            optimizador.extraer_instancias(), rss_pico_bytes(), fases, segundos, informe
+        )
+    return envoltura
+
+
+def _errores_serializables(funcion: Callable) -> Callable:
+    """
+    Convierte los ValidationError de pydantic en ValueError dentro del proceso del pool.
+    
+    ValidationError no se puede reconstruir con pickle; si cruzara al proceso
+    principal rompería el pool entero en lugar de fallar solo esta tarea.
+    """
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        try:
+            return funcion(*args, **kwargs)
+        except ValidationError as e:
+            raise ValueError(str(e)) from None
+    return envoltura
+
+
+def _optimizar_admitida(capacidad: int, objetos: List[Objeto], epsilon: Optional[float],
+                        tiempo_max_ms: Optional[int]) -> Tuple[ResultadoOptimizacion, PlanOptimizacion]:
+    """Resuelve aplicando el control de admisión con los presupuestos configurados"""
+    return optimizador.optimizar_con_presupuesto(
+        capacidad, objetos, PRESUPUESTO_SEGUNDOS, PRESUPUESTO_BYTES, degradar=ADMISION_DEGRADAR,
+        epsilon=epsilon, tiempo_max_ms=tiempo_max_ms
+    )
+
+
+@_errores_serializables
+@_con_diagnostico
+def _resolver(capacidad: int, objetos: List[Objeto], epsilon: Optional[float],
+              tiempo_max_ms: Optional[int]) -> Tuple[ResultadoOptimizacion, PlanOptimizacion]:
+    """Punto de entrada ejecutado dentro de cada proceso del pool"""
+    return _optimizar_admitida(capacidad, objetos, epsilon, tiempo_max_ms)
+
+
+@_errores_serializables
+@_con_diagnostico
+def _resolver_capacidades(capacidades: List[int], objetos: List[Objeto]) -> List[ResultadoOptimizacion]:
+    """Resuelve varias capacidades con una sola tabla dentro de un proceso del pool, con el presupuesto configurado"""
+    return optimizador.optimizar_capacidades(
+        capacidades, objetos, PRESUPUESTO_SEGUNDOS, PRESUPUESTO_BYTES, degradar=ADMISION_DEGRADAR
+    )
+
+
+@_errores_serializables
+@_con_diagnostico
+def _resolver_frontera(objetos: List[Objeto], capacidades: Optional[List[int]]
+                       ) -> Tuple[List[ResultadoOptimizacion], List[Tuple[int, int]]]:
+    """Calcula la frontera y las capacidades pedidas con una sola tabla dentro de un proceso del pool"""
+    return optimizador.optimizar_frontera(objetos, capacidades, PRESUPUESTO_SEGUNDOS, PRESUPUESTO_BYTES)
+
+
+@_errores_serializables
+@_con_diagnostico
+def _resolver_catalogo(id_catalogo: str, capacidad: int, filtro: Optional[Dict[str, Any]],
+                       epsilon: Optional[float], tiempo_max_ms: Optional[int]
+                       ) -> Tuple[ResultadoOptimizacion, PlanOptimizacion]:
+    """Resuelve sobre un catálogo mapeado en memoria dentro de un proceso del pool"""
+    catalogo = abrir_catalogo(id_catalogo)
+    indices = filtrar_catalogo(catalogo, capacidad, filtro)
+    if len(indices) == 0:
+        raise ValueError("Ningún objeto del catálogo cumple el filtro y cabe en la capacidad")
+    
+    return _optimizar_admitida(capacidad, catalogo.objetos(indices), epsilon, tiempo_max_ms)
+
+
+@_errores_serializables
+@_con_diagnostico
+def _resolver_columnar(capacidad: int, nombres: List[str], pesos: np.ndarray, ganancias: np.ndarray,
+                       epsilon: Optional[float], tiempo_max_ms: Optional[int]
+                       ) -> Tuple[ResultadoOptimizacion, PlanOptimizacion]:
+    """Resuelve una solicitud columnar ya validada dentro de un proceso del pool"""
+    objetos = objetos_de_columnas(nombres, pesos, ganancias)
+    return _optimizar_admitida(capacidad, objetos, epsilon, tiempo_max_ms)
+
+
+class EjecutorOptimizacion:
+    """
+    Envía las optimizaciones a un ProcessPoolExecutor y limita las pendientes.
+    
+    El cálculo es intensivo en CPU; ejecutarlo en otros procesos evita bloquear
+    el event loop de uvicorn y permite usar todos los núcleos del contenedor.
+    Cuando hay max_pendientes optimizaciones en curso o en cola, las nuevas se
+    rechazan de inmediato con ServicioSaturado. Si se indican métricas, se les
+    pasa el diagnóstico que cada proceso devuelve junto con el resultado.
+    """
+    
+    def __init__(self, procesos: int, max_pendientes: int, metricas: Optional[MetricasServicio] = None):
+        self.procesos = procesos
+        self.max_pendientes = max_pendientes
+        self.metricas = metricas
+        self.pendientes = 0
+        self.completadas = 0
+        self.rechazadas = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    def iniciar(self):
+        """Crea el pool de procesos"""
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.procesos,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"⚙️ Pool de optimización iniciado: {self.procesos} procesos, "
+                    f"máximo {self.max_pendientes} pendientes")
+    
+    def detener(self):
+        """Cierra el pool esperando las optimizaciones en curso"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            logger.info("⚙️ Pool de optimización detenido")
+    
+    async def optimizar(self, capacidad: int, objetos: List[Objeto], epsilon: Optional[float] = None,
+                        tiempo_max_ms: Optional[int] = None, depurar: bool = False,
+                        perfil: Optional[str] = None) -> Tuple[ResultadoOptimizacion, PlanOptimizacion]:
+        """
+        Resuelve una optimización en el pool sin bloquear el event loop.
+        
+        Args:
+            depurar: Si se agrega al resultado el bloque depuracion con los tiempos por fase
+            perfil: "cpu" o "memoria" para perfilar esta optimización (implica depurar)
+        
+        Returns:
+            Tupla con (resultado, plan del control de admisión)
+        
+        Raises:
+            ServicioSaturado: Si ya hay max_pendientes optimizaciones pendientes
+            CostoExcedido: Si supera el presupuesto y ADMISION_DEGRADAR está desactivado
+            RuntimeError: Si el pool no está iniciado
+        """
+        tarea = partial(_resolver, capacidad, objetos, epsilon, tiempo_max_ms, perfil=perfil)
+        return await self._ejecutar_depurable(tarea, depurar or perfil is not None)
+    
+    async def optimizar_capacidades(self, capacidades: List[int], objetos: List[Objeto]) -> List[ResultadoOptimizacion]:
+        """
+        Resuelve varias capacidades sobre los mismos objetos en un solo proceso del pool.
+        
+        Raises:
+            ServicioSaturado: Si ya hay max_pendientes optimizaciones pendientes
+            CostoExcedido: Si alguna capacidad supera el presupuesto y ADMISION_DEGRADAR está desactivado
+            RuntimeError: Si el pool no está iniciado
+        """
+        return await self._ejecutar(partial(_resolver_capacidades, capacidades, objetos))
+    
+    async def optimizar_frontera(self, objetos: List[Objeto], capacidades: Optional[List[int]] = None
+                                 ) -> Tuple[List[ResultadoOptimizacion], List[Tuple[int, int]]]:
+        """
+        Calcula la frontera ganancia-presupuesto en un proceso del pool.
+        
+        Raises:
+            ServicioSaturado: Si ya hay max_pendientes optimizaciones pendientes
+            CostoExcedido: Si la tabla de la frontera supera el presupuesto
+            RuntimeError: Si el pool no está iniciado
+        """
+        return await self._ejecutar(partial(_resolver_frontera, objetos, capacidades))
+    
+    async def optimizar_catalogo(self, id_catalogo: str, capacidad: int, filtro: Optional[Dict[str, Any]] = None,
+                                 epsilon: Optional[float] = None,
+                                 tiempo_max_ms: Optional[int] = None, depurar: bool = False,
+                                 perfil: Optional[str] = None
+                                 ) -> Tuple[ResultadoOptimizacion, PlanOptimizacion]:
+        """
+        Resuelve una optimización sobre un catálogo guardado en un proceso del pool.
+        
+        depurar y perfil funcionan como en optimizar.
+        
+        Raises:
+            ServicioSaturado: Si ya hay max_pendientes optimizaciones pendientes
+            CatalogoNoEncontrado: Si el catálogo no existe
+            CostoExcedido: Si supera el presupuesto y ADMISION_DEGRADAR está desactivado
+            RuntimeError: Si el pool no está iniciado
+        """
+        tarea = partial(_resolver_catalogo, id_catalogo, capacidad, filtro, epsilon, tiempo_max_ms, perfil=perfil)
+        return await self._ejecutar_depurable(tarea, depurar or perfil is not None)
+    
+    async def optimizar_columnar(self, capacidad: int, nombres: List[str], pesos: np.ndarray,
+                                 ganancias: np.ndarray, epsilon: Optional[float] = None,
+                                 tiempo_max_ms: Optional[int] = None, depurar: bool = False,
+                                 perfil: Optional[str] = None
+                                 ) -> Tuple[ResultadoOptimizacion, PlanOptimizacion]:
+        """
+        Resuelve una solicitud columnar en el pool; las columnas viajan como arreglos.
+        
+        depurar y perfil funcionan como en optimizar.
+        
+        Raises:
+            ServicioSaturado: Si ya hay max_pendientes optimizaciones pendientes
+            CostoExcedido: Si supera el presupuesto y ADMISION_DEGRADAR está desactivado
+            RuntimeError: Si el pool no está iniciado
+        """
+        tarea = partial(_resolver_columnar, capacidad, nombres, pesos, ganancias, epsilon, tiempo_max_ms,
+                        perfil=perfil)
+        return await self._ejecutar_depurable(tarea, depurar or perfil is not None)
+    
+    async def _ejecutar_depurable(self, tarea: Callable[[], Any], depurar: bool
+                                  ) -> Tuple[ResultadoOptimizacion, PlanOptimizacion]:
+        """
+        Ejecuta una tarea que devuelve (resultado, plan) y, si se pide, agrega el bloque depuracion.
+        
+        A las fases medidas en el proceso se antepone "pool": el tiempo entre el
+        envío y la respuesta que no se pasó resolviendo (espera en la cola y
+        serialización de los argumentos y del resultado).
+        """
+        inicio = time.perf_counter()
+        (resultado, plan), diagnostico = await self._ejecutar(tarea, con_diagnostico=True)
+        if depurar:
+            pool = max(time.perf_counter() - inicio - diagnostico.segundos, 0.0)
+            fases = {"pool": pool, **diagnostico.fases}
+            resultado.depuracion = DepuracionOptimizacion(
+                fases_ms={nombre: segundos * 1000 for nombre, segundos in fases.items()},
+                perfil=diagnostico.perfil
+            )
+        return resultado, plan
+    
+    async def _ejecutar(self, tarea: Callable[[], Any], con_diagnostico: bool = False) -> Any:
+        """
+        Envía una tarea al pool respetando el límite de pendientes.
+        
+        Devuelve el resultado de la tarea, o (resultado, DiagnosticoProceso) si con_diagnostico.
+        """
+        if self._pool is None:
+            raise RuntimeError("El pool de optimización no está iniciado")
+        
+        if self.pendientes >= self.max_pendientes:
+            self.rechazadas += 1
+            raise ServicioSaturado(f"Hay {self.pendientes} optimizaciones pendientes")
+        
+        self.pendientes += 1
+        pool = self._pool
+        try:
+            loop = asyncio.get_running_loop()
+            resultado, diagnostico = await loop.run_in_executor(pool, tarea)
+            self.completadas += 1
+            if self.metricas is not None:
+                self.metricas.registrar_instancias(diagnostico.instancias)
+                self.metricas.registrar_rss_pool(diagnostico.rss_pico_bytes)
+            return (resultado, diagnostico) if con_diagnostico else resultado
+        except BrokenProcessPool:
+            # Un proceso murió (por ejemplo, por memoria): se recrea el pool para las siguientes.
+            # Todas las tareas del pool roto fallan a la vez; solo la primera lo reemplaza
+            if self._pool is pool:
+                logger.error("❌ El pool de optimización se rompió; recreándolo")
+                # Sus procesos ya terminaron o se están terminando: no se espera en el event loop
+                pool.shutdown(wait=False, cancel_futures=True)
+                self.iniciar()
+            raise
+        finally:
+            self.pendientes -= 1
+    
+    def estadisticas(self) -> Dict[str, Any]:
+        """Estado actual del pool"""
+        return {
+            "procesos": self.procesos,
+            "max_pendientes": self.max_pendientes,
+            "pendientes": self.pendientes,
+            "completadas": self.completadas,
+            "rechazadas": self.rechazadas
+        }
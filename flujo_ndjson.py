@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Procesamiento en flujo de escenarios NDJSON: una solicitud de optimización por línea.
+
+Las líneas se leen a medida que llegan y se resuelven con concurrencia acotada;
+cada resultado se emite como una línea JSON en cuanto termina, así que la memoria
+no depende del tamaño del archivo y los primeros resultados salen enseguida.
+
+Uso como script:
+    python flujo_ndjson.py escenarios.jsonl -o resultados.jsonl --concurrencia 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from configuracion import NDJSON_CONCURRENCIA, NDJSON_MAX_BYTES_LINEA, POOL_PROCESOS
+from models import SolicitudOptimizacion, ResultadoOptimizacion, ErrorResponse
+from optimizer import CostoExcedido
+
+logger = logging.getLogger(__name__)
+
+
+class LineaDemasiadoLarga(Exception):
+    """Una línea supera NDJSON_MAX_BYTES_LINEA"""
+
+
+async def lineas_de_bloques(bloques: AsyncIterator[bytes],
+                            max_bytes: int = NDJSON_MAX_BYTES_LINEA) -> AsyncIterator[bytes]:
+    """
+    Divide un flujo de bloques de bytes en líneas.
+    
+    Solo se divide cada bloque nuevo: la línea sin terminar se guarda como
+    lista de trozos y se une una vez, al llegar su salto de línea, así que
+    una línea repartida en muchos bloques no se vuelve a copiar con cada uno.
+    
+    Args:
+        bloques: Bloques de bytes, por ejemplo request.stream()
+        max_bytes: Tamaño máximo de una línea
+        
+    Yields:
+        Cada línea sin el salto de línea final
+        
+    Raises:
+        LineaDemasiadoLarga: Si una línea supera max_bytes
+    """
+    pendiente: List[bytes] = []
+    largo_pendiente = 0
+    async for bloque in bloques:
+        primera, *lineas = bloque.split(b"\n")
+        if lineas:
+            # El bloque termina la línea pendiente; el último trozo empieza la siguiente
+            pendiente.append(primera)
+            yield b"".join(pendiente)
+            *completas, primera = lineas
+            for linea in completas:
+                yield linea
+            pendiente, largo_pendiente = [], 0
+        if primera:
+            pendiente.append(primera)
+            largo_pendiente += len(primera)
+        if largo_pendiente > max_bytes:
+            raise LineaDemasiadoLarga(f"Línea de más de {max_bytes} bytes")
+    if pendiente:
+        yield b"".join(pendiente)
+
+
+async def lineas_de_archivo(archivo: Iterable[bytes]) -> AsyncIterator[bytes]:
+    """Adapta un archivo abierto en modo binario a un iterador asíncrono de líneas"""
+    for linea in archivo:
+        yield linea.rstrip(b"\n")
+        await asyncio.sleep(0)
+
+
+async def procesar_ndjson(
+    lineas: AsyncIterator[bytes],
+    resolver: Callable[[SolicitudOptimizacion], Awaitable[ResultadoOptimizacion]],
+    traducir_error: Callable[[Exception], ErrorResponse],
+    concurrencia: int = NDJSON_CONCURRENCIA
+) -> AsyncIterator[str]:
+    """
+    Resuelve las solicitudes de un flujo NDJSON con concurrencia acotada.
+    
+    Cada línea de salida contiene el número de línea de entrada (desde 1), el
+    campo "id" de la solicitud si lo tenía y "resultado" o "error". Las salidas
+    se emiten en orden de finalización, no de entrada. Si una línea supera el
+    tamaño máximo se deja de leer: se emiten las solicitudes en curso y, al
+    final, una línea de error LINE_TOO_LONG.
+    
+    Args:
+        lineas: Líneas de entrada, una solicitud JSON por línea (las vacías se ignoran)
+        resolver: Función asíncrona que resuelve una solicitud validada
+        traducir_error: Convierte una excepción del resolver en ErrorResponse
+        concurrencia: Máximo de solicitudes resolviéndose a la vez
+        
+    Yields:
+        Líneas JSON terminadas en salto de línea
+    """
+    pendientes: Set["asyncio.Task[str]"] = set()
+    
+    async def resolver_linea(numero: int, identificador, solicitud: SolicitudOptimizacion) -> str:
+        try:
+            resultado = await resolver(solicitud)
+            salida = {"linea": numero, "id": identificador, "resultado": resultado.dict()}
+        except Exception as e:
+            salida = {"linea": numero, "id": identificador, "error": traducir_error(e).dict()}
+        return json.dumps(salida) + "\n"
+    
+    def error_de_linea(numero: int, identificador, codigo: str, detalle: str) -> str:
+        error = ErrorResponse(error="Línea inválida", detalle=detalle, codigo=codigo)
+        return json.dumps({"linea": numero, "id": identificador, "error": error.dict()}) + "\n"
+    
+    numero = 0
+    error_final = None
+    try:
+        try:
+            async for linea in lineas:
+                numero += 1
+                if not linea.strip():
+                    continue
+                
+                identificador = None
+                try:
+                    datos = json.loads(linea)
+                    if isinstance(datos, dict):
+                        identificador = datos.get("id")
+                    solicitud = SolicitudOptimizacion(**datos)
+                except json.JSONDecodeError as e:
+                    yield error_de_linea(numero, identificador, "INVALID_JSON", str(e))
+                    continue
+                except (ValidationError, TypeError) as e:
+                    yield error_de_linea(numero, identificador, "VALIDATION_ERROR", str(e))
+                    continue
+                
+                pendientes.add(asyncio.ensure_future(resolver_linea(numero, identificador, solicitud)))
+                
+                # Con el cupo lleno, esperar a que termine alguna antes de leer más
+                if len(pendientes) >= concurrencia:
+                    terminadas, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+                    for tarea in terminadas:
+                        yield tarea.result()
+        except LineaDemasiadoLarga as e:
+            # El resto del cuerpo no se puede dividir en líneas: se avisa después de las que están en curso
+            error_final = error_de_linea(numero + 1, None, "LINE_TOO_LONG", str(e))
+        
+        while pendientes:
+            terminadas, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+            for tarea in terminadas:
+                yield tarea.result()
+        
+        if error_final is not None:
+            yield error_final
+    finally:
+        # Si el consumidor abandona el flujo (p. ej. el cliente se desconecta) no dejar tareas huérfanas
+        for tarea in pendientes:
+            tarea.cancel()
+
+
+def _traducir_error_cli(e: Exception) -> ErrorResponse:
+    """Traducción de errores para la línea de comandos"""
+    if isinstance(e, CostoExcedido):
+        return ErrorResponse(error="Costo excesivo", detalle=str(e), codigo="COST_LIMIT_EXCEEDED")
+    if isinstance(e, ValueError):
+        return ErrorResponse(error="Error de validación", detalle=str(e), codigo="VALIDATION_ERROR")
+    return ErrorResponse(error="Error de optimización", detalle=str(e), codigo="OPTIMIZATION_ERROR")
+
+
+async def _main_cli(entrada: str, salida: Optional[str], concurrencia: int, procesos: int) -> Tuple[int, int]:
+    """Procesa un archivo NDJSON con un pool de procesos local"""
+    from ejecutor import EjecutorOptimizacion
+    
+    ejecutor = EjecutorOptimizacion(procesos, max_pendientes=concurrencia)
+    ejecutor.iniciar()
+    
+    async def resolver(solicitud: SolicitudOptimizacion) -> ResultadoOptimizacion:
+        resultado, _ = await ejecutor.optimizar(
+            solicitud.capacidad, solicitud.objetos,
+            epsilon=solicitud.epsilon, tiempo_max_ms=solicitud.tiempo_max_ms
+        )
+        return resultado
+    
+    procesadas = errores = 0
+    archivo_entrada = sys.stdin.buffer if entrada == "-" else open(entrada, "rb")
+    archivo_salida = sys.stdout if salida is None else open(salida, "w")
+    
+    try:
+        async for linea in procesar_ndjson(lineas_de_archivo(archivo_entrada), resolver,
+                                           _traducir_error_cli, concurrencia):
+            archivo_salida.write(linea)
+            archivo_salida.flush()
+            procesadas += 1
+            errores += "error" in json.loads(linea)
+    finally:
+        ejecutor.detener()
+        if archivo_entrada is not sys.stdin.buffer:
+            archivo_entrada.close()
+        if archivo_salida is not sys.stdout:
+            archivo_salida.close()
+    
+    return procesadas, errores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resuelve un archivo NDJSON de solicitudes de optimización")
+    parser.add_argument("entrada", help="Archivo NDJSON de entrada ('-' para la entrada estándar)")
+    parser.add_argument("-o", "--salida", help="Archivo NDJSON de salida (por defecto, la salida estándar)")
+    parser.add_argument("--concurrencia", type=int, default=NDJSON_CONCURRENCIA,
+                        help="Solicitudes resolviéndose a la vez")
+    parser.add_argument("--procesos", type=int, default=POOL_PROCESOS, help="Procesos del pool")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    procesadas, errores = asyncio.run(_main_cli(args.entrada, args.salida, args.concurrencia, args.procesos))
+    print(f"📊 {procesadas} líneas procesadas, {errores} con error", file=sys.stderr)
@@ -1,18 +1,46 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response, Body, Query, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from fastapi.routing import APIRoute
 from contextlib import asynccontextmanager
 import time
 import logging
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple, NamedTuple
+from pydantic import ValidationError
 
 from models import (
     SolicitudOptimizacion, 
     ResultadoOptimizacion, 
     ErrorResponse, 
-    MensajeExito
+    MensajeExito,
+    ResultadoLote,
+    ResultadoLoteItem,
+    SolicitudCapacidades,
+    ResultadoCapacidades,
+    PuntoFrontera,
+    SolicitudSesion,
+    CambiosSesion,
+    ResultadoSesion,
+    SolicitudCatalogo,
+    InfoCatalogo,
+    SolicitudOptimizacionCatalogo,
+    SolicitudColumnar
 )
-from optimizer import optimizador
+from configuracion import (
+    MAX_LOTE, POOL_PROCESOS, POOL_MAX_PENDIENTES,
+    CACHE_MAX_ENTRADAS, CACHE_TTL_SEGUNDOS, CACHE_RUTA_DISCO,
+    SESIONES_MAX, SESIONES_MAX_BYTES, SESIONES_TTL_SEGUNDOS, PERFILADO_HABILITADO
+)
+from ejecutor import EjecutorOptimizacion, ServicioSaturado
+from optimizer import CostoExcedido, PlanOptimizacion
+from metricas import MetricasServicio, ruta_de_scope
+from perfilado import MODOS_PERFIL, encabezado_server_timing
+from cache import CacheResultados, clave_solicitud, clave_columnas
+from columnar import validar_columnas, decodificar_binario
+from flujo_ndjson import procesar_ndjson, lineas_de_bloques
+from sesiones import GestorSesiones, SesionOptimizacion, extraer_instancias as extraer_instancias_sesiones
+from catalogos import guardar_catalogo, abrir_catalogo, eliminar_catalogo, CatalogoNoEncontrado
 
 # Configurar logging
 logging.basicConfig(
@@ -21,6 +49,70 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Momento de arranque del servicio, para el uptime
+inicio_servicio = time.time()
+
+# Número de optimizaciones resueltas por cada motor
+uso_motores: Dict[str, int] = {}
+
+# Métricas expuestas en /metrics
+metricas = MetricasServicio()
+
+# Pool de procesos donde se resuelven las optimizaciones
+ejecutor = EjecutorOptimizacion(POOL_PROCESOS, POOL_MAX_PENDIENTES, metricas)
+
+# Caché de resultados de /optimizar
+cache = CacheResultados(CACHE_MAX_ENTRADAS, CACHE_TTL_SEGUNDOS, CACHE_RUTA_DISCO or None)
+
+# Sesiones de re-optimización incremental
+sesiones = GestorSesiones(SESIONES_MAX, SESIONES_MAX_BYTES, SESIONES_TTL_SEGUNDOS)
+
+# Optimizaciones en curso por clave de solicitud, para unificar solicitudes idénticas
+optimizaciones_en_curso: Dict[str, "asyncio.Task"] = {}
+solicitudes_coalescidas = 0
+
+# Indicadores de los componentes, leídos de sus estadísticas en cada consulta a /metrics
+metricas.agregar_indicador(
+    "portafolio_pool_procesos", "Procesos del pool de optimización", lambda: {(): ejecutor.procesos}
+)
+metricas.agregar_indicador(
+    "portafolio_pool_pendientes", "Optimizaciones en curso o en cola en el pool", lambda: {(): ejecutor.pendientes}
+)
+metricas.agregar_indicador(
+    "portafolio_pool_tareas_total", "Tareas del pool por resultado",
+    lambda: {("completada",): ejecutor.completadas, ("rechazada",): ejecutor.rechazadas},
+    ("resultado",), tipo="counter"
+)
+metricas.agregar_indicador(
+    "portafolio_cache_entradas", "Resultados guardados en la caché en memoria", lambda: {(): cache.estadisticas()["entradas"]}
+)
+metricas.agregar_indicador(
+    "portafolio_cache_consultas_total", "Consultas a la caché por resultado",
+    lambda: {
+        ("acierto",): cache.aciertos, ("acierto_disco",): cache.aciertos_disco, ("fallo",): cache.fallos
+    },
+    ("resultado",), tipo="counter"
+)
+metricas.agregar_indicador(
+    "portafolio_cache_descartes_total", "Entradas de la caché descartadas por motivo",
+    lambda: {("expulsion",): cache.expulsiones, ("expiracion",): cache.expiradas},
+    ("motivo",), tipo="counter"
+)
+metricas.agregar_indicador(
+    "portafolio_sesiones_abiertas", "Sesiones de re-optimización abiertas",
+    lambda: {(): sesiones.estadisticas()["abiertas"]}
+)
+metricas.agregar_indicador(
+    "portafolio_sesiones_memoria_bytes", "Memoria de las sesiones abiertas", lambda: {(): sesiones.memoria_bytes()}
+)
+metricas.agregar_indicador(
+    "portafolio_coalescencia_en_curso", "Optimizaciones en curso compartidas por solicitudes idénticas",
+    lambda: {(): len(optimizaciones_en_curso)}
+)
+metricas.agregar_indicador(
+    "portafolio_uptime_segundos", "Tiempo desde el arranque del servicio", lambda: {(): time.time() - inicio_servicio}
+)
+
 # Configuración de la aplicación
 app_config = {
     "title": "Microservicio de Optimización de Portafolio de Inversiones",
@@ -36,8 +128,17 @@ app_config = {
     
     ## Endpoints
     * `POST /optimizar` - Optimiza la selección de inversiones
+    * `POST /optimizar/lote` - Optimiza un lote de solicitudes en paralelo
+    * `POST /optimizar/columnar` - Optimiza una solicitud con columnas paralelas de nombres, pesos y ganancias
+    * `POST /optimizar/capacidades` - Optimiza varios presupuestos o calcula la frontera con una sola tabla
+    * `POST /sesiones` - Crea una sesión de re-optimización incremental
+    * `PATCH /sesiones/{id}` - Agrega, modifica o elimina objetos y devuelve la nueva selección
+    * `POST /catalogos` - Guarda un catálogo de objetos para reutilizarlo en varias optimizaciones
+    * `POST /catalogos/{id}/optimizar` - Optimiza sobre un catálogo guardado, con filtro opcional
+    * `POST /optimizar/ndjson` - Optimiza un flujo NDJSON, una solicitud por línea
     * `GET /health` - Verifica el estado del servicio
     * `GET /stats` - Obtiene estadísticas del servicio
+    * `GET /metrics` - Métricas en formato Prometheus
     """,
     "version": "1.0.0",
     "contact": {
@@ -57,12 +158,15 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Iniciando Microservicio de Optimización de Portafolio")
     logger.info(f"📊 Versión: {app_config['version']}")
+    ejecutor.iniciar()
     logger.info("✅ Servicio listo para recibir solicitudes")
     
     yield
     
     # Shutdown
     logger.info("🛑 Cerrando Microservicio de Optimización de Portafolio")
+    ejecutor.detener()
+    cache.cerrar()
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -83,27 +187,57 @@ app.add_middleware(
 )
 
 # Middleware para logging de requests
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Middleware para logging de requests y medición de tiempo"""
-    start_time = time.time()
-    
-    # Log del request
-    logger.info(f"📥 {request.method} {request.url.path} - Cliente: {request.client.host}")
-    
-    # Procesar request
-    response = await call_next(request)
-    
-    # Calcular tiempo de respuesta
-    process_time = time.time() - start_time
+class MiddlewareLogging:
+    """
+    Middleware ASGI para logging de requests y medición de tiempo.
     
-    # Log de la respuesta
-    logger.info(f"📤 {request.method} {request.url.path} - Status: {response.status_code} - Tiempo: {process_time:.4f}s")
+    Se implementa sobre ASGI en lugar de con @app.middleware("http") porque
+    BaseHTTPMiddleware escucha la desconexión del cliente consumiendo receive()
+    mientras se transmite la respuesta, y descarta fragmentos del cuerpo que
+    /optimizar/ndjson todavía está leyendo.
+    """
     
-    # Agregar header de tiempo de procesamiento
-    response.headers["X-Process-Time"] = str(process_time)
+    def __init__(self, app):
+        self.app = app
     
-    return response
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.time()
+        # Inicio para la fase "validacion" del bloque de depuración (request.state.inicio_solicitud)
+        scope.setdefault("state", {})["inicio_solicitud"] = time.perf_counter()
+        metodo, ruta = scope["method"], scope["path"]
+        cliente = scope["client"][0] if scope.get("client") else None
+        
+        # Log del request
+        logger.info(f"📥 {metodo} {ruta} - Cliente: {cliente}")
+        
+        estado = 500
+        
+        async def send_con_tiempo(message):
+            nonlocal estado
+            if message["type"] == "http.response.start":
+                # Calcular tiempo de respuesta
+                process_time = time.time() - start_time
+                estado = message["status"]
+                
+                # Log de la respuesta
+                logger.info(f"📤 {metodo} {ruta} - Status: {message['status']} - Tiempo: {process_time:.4f}s")
+                
+                # Agregar header de tiempo de procesamiento
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-process-time", str(process_time).encode())]
+            await send(message)
+        
+        # Procesar request; la latencia del histograma incluye el envío completo del cuerpo
+        try:
+            await self.app(scope, receive, send_con_tiempo)
+        finally:
+            metricas.registrar_solicitud(metodo, ruta_de_scope(scope), estado, time.time() - start_time)
+
+app.add_middleware(MiddlewareLogging)
 
 # Exception handler global
 @app.exception_handler(Exception)
@@ -120,6 +254,121 @@ async def global_exception_handler(request: Request, exc: Exception):
         ).dict()
     )
 
+async def _resolver_y_guardar(clave: str, solicitud: SolicitudOptimizacion
+                              ) -> Tuple[ResultadoOptimizacion, PlanOptimizacion]:
+    """Resuelve la solicitud en el pool y guarda el resultado en la caché"""
+    resultado, plan = await ejecutor.optimizar(
+        solicitud.capacidad, solicitud.objetos,
+        epsilon=solicitud.epsilon, tiempo_max_ms=solicitud.tiempo_max_ms
+    )
+    
+    # Una solución cortada por tiempo (pedido o impuesto por la admisión) podría mejorar: no se guarda
+    if resultado.optimo or plan.tiempo_max_ms is None:
+        await cache.guardar(clave, resultado)
+    uso_motores[resultado.motor] = uso_motores.get(resultado.motor, 0) + 1
+    
+    return resultado, plan
+
+def _encabezados_costo(response: Response, resultado: ResultadoOptimizacion,
+                       plan: Optional[PlanOptimizacion] = None):
+    """
+    Informa en los encabezados el motor usado y la estimación del control de admisión.
+    
+    Las respuestas servidas desde la caché no tienen plan: solo llevan el motor.
+    """
+    response.headers["X-Motor"] = resultado.motor or ""
+    if plan is not None:
+        response.headers["X-Estimacion-Motor"] = plan.estimacion.motor
+        response.headers["X-Estimacion-Segundos"] = f"{plan.estimacion.segundos:.6f}"
+        response.headers["X-Estimacion-Bytes"] = str(plan.estimacion.bytes)
+        response.headers["X-Admision"] = "degradada" if plan.degradada else "admitida"
+
+class OpcionesDepuracion(NamedTuple):
+    """Depuración y perfil pedidos para una solicitud"""
+    depurar: bool
+    perfil: Optional[str]
+    inicio: float
+    
+    @property
+    def activa(self) -> bool:
+        """Si la respuesta lleva el bloque depuracion"""
+        return self.depurar or self.perfil is not None
+
+def opciones_depuracion(
+    request: Request,
+    depurar: bool = Query(False, description="Incluir los tiempos por fase (también con el encabezado X-Depurar: 1)"),
+    perfil: Optional[str] = Query(None, description="Perfilar la optimización: cpu o memoria (también X-Perfil)"),
+    x_depurar: Optional[str] = Header(None, include_in_schema=False),
+    x_perfil: Optional[str] = Header(None, include_in_schema=False)
+) -> OpcionesDepuracion:
+    """
+    Lee la depuración y el perfil pedidos por parámetro de consulta o encabezado.
+    
+    Raises:
+        HTTPException: 400 si el modo de perfil no existe, 403 si el perfilado está desactivado
+    """
+    perfil = perfil or x_perfil
+    if perfil is not None:
+        if perfil not in MODOS_PERFIL:
+            raise HTTPException(
+                status_code=400,
+                detail=ErrorResponse(
+                    error="Datos de entrada inválidos",
+                    detalle=f"Modo de perfil desconocido: {perfil}. Disponibles: {', '.join(MODOS_PERFIL)}",
+                    codigo="VALIDATION_ERROR"
+                ).dict()
+            )
+        if not PERFILADO_HABILITADO:
+            raise HTTPException(
+                status_code=403,
+                detail=ErrorResponse(
+                    error="Perfilado desactivado",
+                    detalle="El perfilado de solicitudes está desactivado (habilítelo con PERFILADO_HABILITADO=1)",
+                    codigo="PROFILING_DISABLED"
+                ).dict()
+            )
+    
+    depurar = depurar or (x_depurar or "").lower() in ("1", "true")
+    inicio = getattr(request.state, "inicio_solicitud", time.perf_counter())
+    return OpcionesDepuracion(depurar, perfil, inicio)
+
+def _encabezados_depuracion(response: Response, resultado: ResultadoOptimizacion, validacion: float):
+    """
+    Antepone la fase "validacion" al bloque depuracion y lo informa en Server-Timing.
+    
+    validacion es el tiempo desde que llegó la solicitud hasta que se envió al
+    pool: recepción del cuerpo, validación del esquema y de las reglas.
+    """
+    if resultado.depuracion is None:
+        return
+    
+    fases_ms = {"validacion": validacion * 1000, **resultado.depuracion.fases_ms}
+    resultado.depuracion.fases_ms = fases_ms
+    response.headers["Server-Timing"] = encabezado_server_timing(fases_ms)
+
+async def optimizar_una_vez(clave: str, solicitud: SolicitudOptimizacion
+                            ) -> Tuple[ResultadoOptimizacion, PlanOptimizacion]:
+    """
+    Resuelve la solicitud una sola vez aunque lleguen varias idénticas a la vez.
+    
+    La primera solicitud crea una tarea independiente; las idénticas que llegan
+    mientras está en curso esperan la misma tarea y reciben el mismo resultado
+    (o el mismo error). La tarea no depende de ninguna solicitud concreta, por
+    lo que si el primer cliente se desconecta el resto sigue esperando.
+    """
+    global solicitudes_coalescidas
+    
+    tarea = optimizaciones_en_curso.get(clave)
+    if tarea is not None:
+        solicitudes_coalescidas += 1
+        logger.info(f"🔗 Solicitud unida a una optimización en curso ({clave[:12]})")
+    else:
+        tarea = asyncio.ensure_future(_resolver_y_guardar(clave, solicitud))
+        optimizaciones_en_curso[clave] = tarea
+        tarea.add_done_callback(lambda _: optimizaciones_en_curso.pop(clave, None))
+    
+    return await asyncio.shield(tarea)
+
 # Endpoints de la API
 
 @app.get("/", tags=["Información"])
@@ -131,8 +380,15 @@ async def root() -> Dict[str, Any]:
         "documentacion": "/docs",
         "endpoints": {
             "optimizar": "/optimizar",
+            "optimizar_lote": "/optimizar/lote",
+            "optimizar_columnar": "/optimizar/columnar",
+            "optimizar_capacidades": "/optimizar/capacidades",
+            "optimizar_ndjson": "/optimizar/ndjson",
+            "sesiones": "/sesiones",
+            "catalogos": "/catalogos",
             "health": "/health",
-            "stats": "/stats"
+            "stats": "/stats",
+            "metrics": "/metrics"
         }
     }
 
@@ -149,16 +405,39 @@ async def health_check() -> Dict[str, Any]:
 @app.get("/stats", tags=["Monitoreo"])
 async def get_stats() -> Dict[str, Any]:
     """Obtiene estadísticas del servicio"""
+    rutas = [ruta for ruta in app.routes if isinstance(ruta, APIRoute)]
     return {
         "service": "portfolio-optimizer",
         "version": app_config["version"],
-        "uptime": time.time(),
+        "uptime": time.time() - inicio_servicio,
         "endpoints": {
-            "total": 4,
-            "documented": 4
+            "total": len(rutas),
+            "documented": sum(1 for ruta in rutas if ruta.include_in_schema)
+        },
+        "motores": dict(uso_motores),
+        "pool": ejecutor.estadisticas(),
+        "cache": cache.estadisticas(),
+        "sesiones": sesiones.estadisticas(),
+        "coalescencia": {
+            "en_curso": len(optimizaciones_en_curso),
+            "solicitudes_coalescidas": solicitudes_coalescidas
         }
     }
 
+@app.get("/metrics", tags=["Monitoreo"], response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Métricas en el formato de texto de Prometheus.
+    
+    Incluye histogramas de latencia por ruta y estado, optimizaciones y celdas
+    de programación dinámica por motor, distribución de objetos, capacidad y
+    celdas por optimización, indicadores de caché, pool y sesiones, y la
+    memoria residente máxima del proceso principal y del pool.
+    """
+    # Las sesiones se resuelven en este proceso: sus instancias se recogen aquí
+    metricas.registrar_instancias(extraer_instancias_sesiones())
+    return PlainTextResponse(metricas.exponer(), media_type="text/plain; version=0.0.4")
+
 @app.post("/optimizar", 
           response_model=ResultadoOptimizacion,
           tags=["Optimización"],
@@ -168,6 +447,19 @@ async def get_stats() -> Dict[str, Any]:
           sin exceder la capacidad presupuestaria.
           
           Utiliza un algoritmo de programación dinámica para garantizar la solución óptima.
+          Si se indica `epsilon`, usa un esquema de aproximación (FPTAS) que garantiza una
+          ganancia de al menos (1 - epsilon) veces el óptimo e informa la cota superior en
+          `cota_superior`. Si se indica `tiempo_max_ms`, devuelve la mejor solución encontrada
+          dentro de ese tiempo junto con `optimo` y `brecha`.
+          
+          El costo previsto se informa en los encabezados `X-Estimacion-*`; si supera el
+          presupuesto configurado, la solicitud se degrada a búsqueda con tiempo máximo
+          (`X-Admision: degradada`) o se rechaza con `422` (`COST_LIMIT_EXCEEDED`).
+          
+          Con `?depurar=true` (o `X-Depurar: 1`) la respuesta incluye `depuracion` con los
+          milisegundos de cada fase, también en el encabezado `Server-Timing`; con
+          `?perfil=cpu` o `?perfil=memoria` (o `X-Perfil`) incluye además el perfil de esa
+          optimización. Estas solicitudes no pasan por la caché.
           """,
           responses={
               200: {
@@ -177,7 +469,8 @@ async def get_stats() -> Dict[str, Any]:
                           "example": {
                               "seleccionados": ["B", "C"],
                               "ganancia_total": 7500,
-                              "peso_total": 9000
+                              "peso_total": 9000,
+                              "motor": "dp_numpy"
                           }
                       }
                   }
@@ -194,6 +487,18 @@ async def get_stats() -> Dict[str, Any]:
                       }
                   }
               },
+              503: {
+                  "description": "Servicio saturado",
+                  "content": {
+                      "application/json": {
+                          "example": {
+                              "error": "Servicio saturado",
+                              "detalle": "Hay demasiadas optimizaciones en curso. Por favor, intente nuevamente en unos segundos.",
+                              "codigo": "SERVICE_OVERLOADED"
+                          }
+                      }
+                  }
+              },
               422: {
                   "description": "Error de validación de esquema",
                   "content": {
@@ -211,12 +516,14 @@ async def get_stats() -> Dict[str, Any]:
                   }
               }
           })
-async def optimizar_portafolio(solicitud: SolicitudOptimizacion) -> ResultadoOptimizacion:
+async def optimizar_portafolio(solicitud: SolicitudOptimizacion, response: Response,
+                               opciones: OpcionesDepuracion = Depends(opciones_depuracion)) -> ResultadoOptimizacion:
     """
     Optimiza la selección de inversiones para maximizar la ganancia total.
     
     Args:
         solicitud: Solicitud de optimización con capacidad y objetos
+        opciones: Depuración y perfil pedidos
         
     Returns:
         Resultado de la optimización con objetos seleccionados y métricas
@@ -240,35 +547,625 @@ async def optimizar_portafolio(solicitud: SolicitudOptimizacion) -> ResultadoOpt
                 ).dict()
             )
         
-        # Realizar optimización
-        resultado = optimizador.optimizar(solicitud.capacidad, solicitud.objetos)
+        if opciones.activa:
+            # Se mide una resolución real: sin caché ni coalescencia, y el resultado no se guarda
+            validacion = time.perf_counter() - opciones.inicio
+            resultado, plan = await ejecutor.optimizar(
+                solicitud.capacidad, solicitud.objetos,
+                epsilon=solicitud.epsilon, tiempo_max_ms=solicitud.tiempo_max_ms,
+                depurar=opciones.depurar, perfil=opciones.perfil
+            )
+            uso_motores[resultado.motor] = uso_motores.get(resultado.motor, 0) + 1
+            _encabezados_depuracion(response, resultado, validacion)
+        else:
+            # Consultar la caché antes de optimizar
+            clave = clave_solicitud(
+                solicitud.capacidad, solicitud.objetos,
+                epsilon=solicitud.epsilon, tiempo_max_ms=solicitud.tiempo_max_ms
+            )
+            resultado = await cache.obtener(clave)
+            if resultado is not None:
+                logger.info(f"♻️ Resultado obtenido de la caché ({clave[:12]})")
+                _encabezados_costo(response, resultado)
+                return resultado
+            
+            # Realizar optimización (una sola vez por grupo de solicitudes idénticas)
+            resultado, plan = await optimizar_una_vez(clave, solicitud)
+        _encabezados_costo(response, resultado, plan)
         
         logger.info(f"✅ Optimización completada exitosamente: "
                    f"{len(resultado.seleccionados)} objetos seleccionados, "
-                   f"ganancia: {resultado.ganancia_total}, peso: {resultado.peso_total}")
+                   f"ganancia: {resultado.ganancia_total}, peso: {resultado.peso_total}, "
+                   f"motor: {resultado.motor}")
         
         return resultado
         
-    except ValueError as e:
-        logger.warning(f"⚠️ Error de validación: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        error = _http_de_excepcion(e)
+        if error.status_code == 500:
+            logger.error(f"❌ Error durante la optimización: {str(e)}")
+        else:
+            logger.warning(f"⚠️ Optimización rechazada ({error.detail['codigo']}): {str(e)}")
+        raise error
+
+# Estado HTTP de cada código de ErrorResponse de optimización; los demás son 500
+CODIGOS_HTTP = {"SERVICE_OVERLOADED": 503, "VALIDATION_ERROR": 400, "COST_LIMIT_EXCEEDED": 422}
+
+def _error_de_excepcion(e: Exception) -> ErrorResponse:
+    """Traduce una excepción de optimización al ErrorResponse que usaría /optimizar"""
+    if isinstance(e, ServicioSaturado):
+        return ErrorResponse(
+            error="Servicio saturado",
+            detalle="Hay demasiadas optimizaciones en curso. Por favor, intente nuevamente en unos segundos.",
+            codigo="SERVICE_OVERLOADED"
+        )
+    if isinstance(e, CostoExcedido):
+        return ErrorResponse(error="Costo excesivo", detalle=str(e), codigo="COST_LIMIT_EXCEEDED")
+    if isinstance(e, ValueError):
+        return ErrorResponse(error="Error de validación", detalle=str(e), codigo="VALIDATION_ERROR")
+    return ErrorResponse(
+        error="Error interno del servidor",
+        detalle="Ocurrió un error durante la optimización. Por favor, intente nuevamente.",
+        codigo="OPTIMIZATION_ERROR"
+    )
+
+def _http_de_excepcion(e: Exception) -> HTTPException:
+    """HTTPException con el ErrorResponse de _error_de_excepcion y el estado de CODIGOS_HTTP"""
+    error = _error_de_excepcion(e)
+    return HTTPException(status_code=CODIGOS_HTTP.get(error.codigo, 500), detail=error.dict())
+
+@app.post("/optimizar/lote",
+          response_model=ResultadoLote,
+          tags=["Optimización"],
+          summary="Optimizar un lote de solicitudes",
+          description="""
+          Recibe una lista de solicitudes con el mismo formato que `/optimizar` y las resuelve
+          en paralelo en el pool de procesos. Cada solicitud obtiene su resultado o su error
+          (con el formato de `ErrorResponse`) sin que falle el lote completo.
+          
+          Las solicitudes con el mismo conjunto de objetos que solo difieren en la capacidad
+          se resuelven con una sola tabla de programación dinámica.
+          """)
+async def optimizar_lote(solicitudes: List[Any] = Body(..., description="Lista de solicitudes de optimización")) -> ResultadoLote:
+    """
+    Optimiza un lote de solicitudes en paralelo.
+    
+    Args:
+        solicitudes: Lista de solicitudes sin validar; cada una se valida por separado
+        
+    Returns:
+        Resultado o error de cada solicitud, con totales y tiempo del lote
+    """
+    inicio = time.perf_counter()
+    
+    if not solicitudes or len(solicitudes) > MAX_LOTE:
         raise HTTPException(
             status_code=400,
             detail=ErrorResponse(
-                error="Error de validación",
-                detalle=str(e),
-                codigo="VALIDATION_ERROR"
+                error="Tamaño de lote inválido",
+                detalle=f"El lote debe tener entre 1 y {MAX_LOTE} solicitudes (recibidas: {len(solicitudes)})",
+                codigo="INVALID_BATCH_SIZE"
+            ).dict()
+        )
+    
+    logger.info(f"📦 Iniciando lote de {len(solicitudes)} solicitudes")
+    
+    items: List[Optional[ResultadoLoteItem]] = [None] * len(solicitudes)
+    validas: Dict[int, SolicitudOptimizacion] = {}
+    
+    # Validar cada solicitud por separado para no rechazar el lote completo
+    for indice, datos in enumerate(solicitudes):
+        try:
+            solicitud = SolicitudOptimizacion(**datos)
+        except (ValidationError, TypeError) as e:
+            items[indice] = ResultadoLoteItem(indice=indice, error=ErrorResponse(
+                error="Datos de entrada inválidos", detalle=str(e), codigo="VALIDATION_ERROR"
+            ))
+            continue
+        
+        peso_minimo = min(obj.peso for obj in solicitud.objetos)
+        if solicitud.capacidad < peso_minimo:
+            items[indice] = ResultadoLoteItem(indice=indice, error=ErrorResponse(
+                error="Capacidad insuficiente",
+                detalle=f"La capacidad ({solicitud.capacidad}) es menor que el peso mínimo requerido ({peso_minimo})",
+                codigo="INSUFFICIENT_CAPACITY"
+            ))
+            continue
+        
+        validas[indice] = solicitud
+    
+    # Agrupar las solicitudes exactas con el mismo conjunto de objetos
+    grupos: Dict[str, List[int]] = {}
+    for indice, solicitud in validas.items():
+        if solicitud.epsilon is None and solicitud.tiempo_max_ms is None:
+            grupos.setdefault(clave_solicitud(0, solicitud.objetos), []).append(indice)
+    grupos = {clave: indices for clave, indices in grupos.items() if len(indices) > 1}
+    agrupadas = {indice for indices in grupos.values() for indice in indices}
+    
+    # El lote ocupa como mucho un lugar por proceso del pool
+    semaforo = asyncio.Semaphore(ejecutor.procesos)
+    
+    async def resolver_individual(indice: int):
+        solicitud = validas[indice]
+        clave = clave_solicitud(
+            solicitud.capacidad, solicitud.objetos,
+            epsilon=solicitud.epsilon, tiempo_max_ms=solicitud.tiempo_max_ms
+        )
+        try:
+            resultado = await cache.obtener(clave)
+            if resultado is None:
+                async with semaforo:
+                    resultado, _ = await optimizar_una_vez(clave, solicitud)
+            items[indice] = ResultadoLoteItem(indice=indice, resultado=resultado)
+        except Exception as e:
+            items[indice] = ResultadoLoteItem(indice=indice, error=_error_de_excepcion(e))
+    
+    async def resolver_grupo(indices: List[int]):
+        capacidades = [validas[indice].capacidad for indice in indices]
+        try:
+            async with semaforo:
+                resultados = await ejecutor.optimizar_capacidades(capacidades, validas[indices[0]].objetos)
+            for indice, resultado in zip(indices, resultados):
+                items[indice] = ResultadoLoteItem(indice=indice, resultado=resultado)
+            uso_motores[resultados[0].motor] = uso_motores.get(resultados[0].motor, 0) + 1
+        except Exception as e:
+            error = _error_de_excepcion(e)
+            for indice in indices:
+                items[indice] = ResultadoLoteItem(indice=indice, error=error)
+    
+    await asyncio.gather(
+        *(resolver_individual(indice) for indice in validas if indice not in agrupadas),
+        *(resolver_grupo(indices) for indices in grupos.values())
+    )
+    
+    exitosos = sum(1 for item in items if item.resultado is not None)
+    tiempo_total_ms = (time.perf_counter() - inicio) * 1000
+    
+    logger.info(f"✅ Lote completado: {exitosos}/{len(items)} exitosas, "
+               f"{len(grupos)} tablas compartidas, {tiempo_total_ms:.1f} ms")
+    
+    return ResultadoLote(
+        resultados=items,
+        exitosos=exitosos,
+        fallidos=len(items) - exitosos,
+        tablas_compartidas=len(grupos),
+        tiempo_total_ms=tiempo_total_ms
+    )
+
+async def _resolver_columnas(response: Response, capacidad: int, nombres: List[str], pesos, ganancias,
+                             epsilon: Optional[float], tiempo_max_ms: Optional[int],
+                             opciones: OpcionesDepuracion) -> ResultadoOptimizacion:
+    """Resuelve columnas ya validadas en el pool, pasando por la caché salvo con depuración"""
+    peso_minimo = int(pesos.min())
+    if capacidad < peso_minimo:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(
+                error="Capacidad insuficiente",
+                detalle=f"La capacidad ({capacidad}) es menor que el peso mínimo requerido ({peso_minimo})",
+                codigo="INSUFFICIENT_CAPACITY"
             ).dict()
         )
+    
+    # Misma clave que /optimizar para los mismos objetos: ambos formatos comparten la caché
+    clave = clave_columnas(capacidad, nombres, pesos, ganancias, epsilon=epsilon, tiempo_max_ms=tiempo_max_ms)
+    resultado = None if opciones.activa else await cache.obtener(clave)
+    if resultado is not None:
+        logger.info(f"♻️ Resultado obtenido de la caché ({clave[:12]})")
+        _encabezados_costo(response, resultado)
+        return resultado
+    
+    validacion = time.perf_counter() - opciones.inicio
+    try:
+        resultado, plan = await ejecutor.optimizar_columnar(
+            capacidad, nombres, pesos, ganancias, epsilon=epsilon, tiempo_max_ms=tiempo_max_ms,
+            depurar=opciones.depurar, perfil=opciones.perfil
+        )
     except Exception as e:
-        logger.error(f"❌ Error durante la optimización: {str(e)}")
+        logger.warning(f"⚠️ Optimización columnar fallida: {str(e)}")
+        raise _http_de_excepcion(e)
+    
+    if not opciones.activa and (resultado.optimo or plan.tiempo_max_ms is None):
+        await cache.guardar(clave, resultado)
+    uso_motores[resultado.motor] = uso_motores.get(resultado.motor, 0) + 1
+    _encabezados_costo(response, resultado, plan)
+    _encabezados_depuracion(response, resultado, validacion)
+    
+    logger.info(f"✅ Optimización columnar completada: {len(resultado.seleccionados)} objetos seleccionados, "
+               f"ganancia: {resultado.ganancia_total}, motor: {resultado.motor}")
+    
+    return resultado
+
+@app.post("/optimizar/columnar",
+          response_model=ResultadoOptimizacion,
+          tags=["Optimización"],
+          summary="Optimizar con formato columnar",
+          description="""
+          Igual que `/optimizar`, pero los objetos llegan como columnas paralelas
+          (`nombres`, `pesos`, `ganancias`) en lugar de una lista de objetos. Las reglas de
+          validación son las mismas, aplicadas en bloque: positividad vectorizada con NumPy,
+          una sola expresión regular sobre todos los nombres y detección de duplicados con
+          un conjunto. Los motores reciben los objetos sin crear modelos `Objeto`.
+          """)
+async def optimizar_columnar(solicitud: SolicitudColumnar, response: Response,
+                             opciones: OpcionesDepuracion = Depends(opciones_depuracion)) -> ResultadoOptimizacion:
+    """Optimiza una solicitud en formato columnar JSON"""
+    logger.info(f"🔄 Iniciando optimización columnar para capacidad: {solicitud.capacidad}, "
+               f"objetos: {len(solicitud.nombres)}")
+    
+    try:
+        nombres, pesos, ganancias = validar_columnas(solicitud.nombres, solicitud.pesos, solicitud.ganancias)
+    except ValueError as e:
         raise HTTPException(
-            status_code=500,
+            status_code=400,
+            detail=ErrorResponse(error="Datos de entrada inválidos", detalle=str(e), codigo="VALIDATION_ERROR").dict()
+        )
+    
+    return await _resolver_columnas(
+        response, solicitud.capacidad, nombres, pesos, ganancias, solicitud.epsilon, solicitud.tiempo_max_ms,
+        opciones
+    )
+
+@app.post("/optimizar/columnar/binario",
+          response_model=ResultadoOptimizacion,
+          tags=["Optimización"],
+          summary="Optimizar con formato columnar binario",
+          description="""
+          Recibe la solicitud columnar codificada en binario (`application/octet-stream`):
+          cabecera de 24 bytes (`b"COLS"`, versión `uint32` = 1, número de objetos `uint64`,
+          capacidad `int64`), los pesos y las ganancias como `int64` little endian y los
+          nombres en ASCII separados por `\n`. `columnar.codificar_binario` genera este
+          formato. `epsilon` y `tiempo_max_ms` se indican como parámetros de consulta.
+          """)
+async def optimizar_columnar_binario(
+    request: Request,
+    response: Response,
+    epsilon: Optional[float] = Query(None, gt=0, lt=1, description="Pérdida relativa admitida"),
+    tiempo_max_ms: Optional[int] = Query(None, gt=0, le=600000, description="Tiempo máximo de resolución"),
+    opciones: OpcionesDepuracion = Depends(opciones_depuracion)
+) -> ResultadoOptimizacion:
+    """Optimiza una solicitud en formato columnar binario"""
+    contenido = await request.body()
+    
+    try:
+        capacidad, nombres, pesos, ganancias = decodificar_binario(contenido)
+        if not 0 < capacidad <= 1000000000:
+            raise ValueError("La capacidad debe estar entre 1 y 1,000,000,000")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(error="Datos de entrada inválidos", detalle=str(e), codigo="VALIDATION_ERROR").dict()
+        )
+    
+    logger.info(f"🔄 Iniciando optimización columnar binaria para capacidad: {capacidad}, "
+               f"objetos: {len(nombres)} ({len(contenido)} bytes)")
+    
+    return await _resolver_columnas(response, capacidad, nombres, pesos, ganancias, epsilon, tiempo_max_ms, opciones)
+
+@app.post("/optimizar/capacidades",
+          response_model=ResultadoCapacidades,
+          tags=["Optimización"],
+          summary="Optimizar varios presupuestos o calcular la frontera",
+          description="""
+          Resuelve los mismos objetos para varios presupuestos con una sola tabla de
+          programación dinámica: la última fila contiene la ganancia óptima de todos los
+          presupuestos hasta el mayor pedido, y la selección solo se reconstruye para las
+          `capacidades` indicadas.
+          
+          Con `frontera: true` devuelve además la curva ganancia-presupuesto comprimida a
+          sus puntos de quiebre: cada punto indica el presupuesto mínimo con el que se
+          alcanza una ganancia, válida hasta el siguiente punto. Sin `capacidades`, la
+          frontera llega hasta la suma de todos los pesos.
+          
+          Pasa por el mismo control de admisión que `/optimizar`: si la tabla compartida
+          no cabe en el presupuesto, cada capacidad se admite por separado y las que
+          no caben se degradan (`X-Admision: degradada`) o se rechazan con `422`. La
+          frontera no se puede degradar: si su tabla no cabe, se rechaza con `422`.
+          """)
+async def optimizar_capacidades(solicitud: SolicitudCapacidades, response: Response) -> ResultadoCapacidades:
+    """
+    Optimiza varios presupuestos y/o calcula la frontera con una sola tabla.
+    
+    Args:
+        solicitud: Objetos, capacidades a resolver y si se quiere la frontera
+        response: Respuesta HTTP, para el encabezado X-Admision
+        
+    Returns:
+        Resultado de cada capacidad pedida y, si se pidió, la frontera
+        
+    Raises:
+        HTTPException: Si hay errores en la validación o procesamiento
+    """
+    logger.info(f"📈 Iniciando consulta de {len(solicitud.capacidades or [])} capacidades "
+               f"(frontera: {solicitud.frontera}), objetos: {len(solicitud.objetos)}")
+    
+    peso_minimo = min(obj.peso for obj in solicitud.objetos)
+    if solicitud.capacidades and min(solicitud.capacidades) < peso_minimo:
+        raise HTTPException(
+            status_code=400,
             detail=ErrorResponse(
-                error="Error interno del servidor",
-                detalle="Ocurrió un error durante la optimización. Por favor, intente nuevamente.",
-                codigo="OPTIMIZATION_ERROR"
+                error="Capacidad insuficiente",
+                detalle=f"La capacidad ({min(solicitud.capacidades)}) es menor que el peso mínimo requerido ({peso_minimo})",
+                codigo="INSUFFICIENT_CAPACITY"
             ).dict()
         )
+    
+    try:
+        if solicitud.frontera:
+            resultados, puntos = await ejecutor.optimizar_frontera(solicitud.objetos, solicitud.capacidades)
+            frontera = [PuntoFrontera(capacidad=capacidad, ganancia=ganancia) for capacidad, ganancia in puntos]
+        else:
+            resultados = await ejecutor.optimizar_capacidades(solicitud.capacidades, solicitud.objetos)
+            frontera = None
+    except Exception as e:
+        logger.warning(f"⚠️ Consulta de capacidades fallida: {str(e)}")
+        raise _http_de_excepcion(e)
+    
+    for resultado in resultados:
+        uso_motores[resultado.motor] = uso_motores.get(resultado.motor, 0) + 1
+    
+    # Las capacidades exactas solo llevan cota superior si el control de admisión las degradó
+    degradada = any(resultado.cota_superior is not None for resultado in resultados)
+    response.headers["X-Admision"] = "degradada" if degradada else "admitida"
+    
+    logger.info(f"✅ Consulta de capacidades completada: {len(resultados)} selecciones, "
+               f"{len(frontera) if frontera is not None else 0} puntos de frontera")
+    
+    return ResultadoCapacidades(resultados=resultados, frontera=frontera)
+
+def _sesion_no_encontrada(id_sesion: str) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail=ErrorResponse(
+            error="Sesión no encontrada",
+            detalle=f"La sesión '{id_sesion}' no existe o expiró por inactividad",
+            codigo="SESSION_NOT_FOUND"
+        ).dict()
+    )
+
+async def _responder_sesion(id_sesion: str, sesion: SesionOptimizacion) -> ResultadoSesion:
+    """Recalcula la sesión fuera del event loop y arma la respuesta"""
+    resultado, filas_recalculadas = await asyncio.to_thread(sesion.resultado)
+    sesiones.ajustar_memoria()
+    
+    if resultado is not None:
+        uso_motores[resultado.motor] = uso_motores.get(resultado.motor, 0) + 1
+    
+    logger.info(f"🧩 Sesión {id_sesion[:12]}: {filas_recalculadas}/{len(sesion.objetos)} filas recalculadas")
+    
+    return ResultadoSesion(
+        id=id_sesion,
+        resultado=resultado,
+        objetos=len(sesion.objetos),
+        filas_recalculadas=filas_recalculadas,
+        memoria_bytes=sesion.memoria_bytes()
+    )
+
+@app.post("/sesiones",
+          response_model=ResultadoSesion,
+          tags=["Sesiones"],
+          summary="Crear una sesión de re-optimización incremental",
+          description="""
+          Crea una sesión con una capacidad y objetos y devuelve la selección óptima junto
+          con el `id` de la sesión. El servidor conserva la tabla de programación dinámica,
+          de modo que los cambios posteriores (`PATCH /sesiones/{id}`) solo recalculan las
+          filas afectadas.
+          
+          Las sesiones expiran tras `SESIONES_TTL_SEGUNDOS` sin uso y, si se supera
+          `SESIONES_MAX` o `SESIONES_MAX_BYTES`, se descarta la usada menos recientemente.
+          """)
+async def crear_sesion(solicitud: SolicitudSesion) -> ResultadoSesion:
+    """Crea una sesión y devuelve su primera selección óptima"""
+    try:
+        id_sesion, sesion = sesiones.crear(solicitud.capacidad, solicitud.objetos)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(error="Error de validación", detalle=str(e), codigo="VALIDATION_ERROR").dict()
+        )
+    
+    async with sesion.bloqueo:
+        return await _responder_sesion(id_sesion, sesion)
+
+@app.get("/sesiones/{id_sesion}",
+         response_model=ResultadoSesion,
+         tags=["Sesiones"],
+         summary="Consultar una sesión")
+async def consultar_sesion(id_sesion: str) -> ResultadoSesion:
+    """Devuelve la selección óptima actual de la sesión"""
+    sesion = sesiones.obtener(id_sesion)
+    if sesion is None:
+        raise _sesion_no_encontrada(id_sesion)
+    
+    async with sesion.bloqueo:
+        return await _responder_sesion(id_sesion, sesion)
+
+@app.patch("/sesiones/{id_sesion}",
+           response_model=ResultadoSesion,
+           tags=["Sesiones"],
+           summary="Modificar los objetos de una sesión",
+           description="""
+           Aplica los cambios indicados (`agregar`, `modificar`, `eliminar`) y devuelve la nueva
+           selección óptima. Solo se recalculan las filas de la tabla desde el primer objeto
+           afectado; los objetos agregados o modificados pasan al final del orden para que
+           editarlos de nuevo sea barato. Si algún cambio es inválido no se aplica ninguno.
+           """)
+async def modificar_sesion(id_sesion: str, cambios: CambiosSesion) -> ResultadoSesion:
+    """Aplica cambios a la sesión y devuelve la nueva selección óptima"""
+    sesion = sesiones.obtener(id_sesion)
+    if sesion is None:
+        raise _sesion_no_encontrada(id_sesion)
+    
+    async with sesion.bloqueo:
+        try:
+            sesion.aplicar_cambios(cambios.agregar, cambios.modificar, cambios.eliminar)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=ErrorResponse(error="Error de validación", detalle=str(e), codigo="VALIDATION_ERROR").dict()
+            )
+        return await _responder_sesion(id_sesion, sesion)
+
+@app.delete("/sesiones/{id_sesion}",
+            response_model=MensajeExito,
+            tags=["Sesiones"],
+            summary="Cerrar una sesión")
+async def cerrar_sesion(id_sesion: str) -> MensajeExito:
+    """Cierra la sesión y libera su memoria"""
+    if not sesiones.eliminar(id_sesion):
+        raise _sesion_no_encontrada(id_sesion)
+    
+    return MensajeExito(mensaje=f"Sesión {id_sesion} cerrada", timestamp=str(time.time()))
+
+def _catalogo_no_encontrado(e: CatalogoNoEncontrado) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail=ErrorResponse(error="Catálogo no encontrado", detalle=str(e), codigo="CATALOG_NOT_FOUND").dict()
+    )
+
+@app.post("/catalogos",
+          response_model=InfoCatalogo,
+          tags=["Catálogos"],
+          summary="Guardar un catálogo de objetos",
+          description="""
+          Guarda un universo de objetos en el servidor para no reenviarlo en cada solicitud.
+          El catálogo se almacena en formato columnar (pesos y ganancias como arreglos
+          paralelos y una tabla de nombres) y se abre con un solo mmap compartido por todos
+          los procesos del pool. El `id` es un hash del contenido: subir el mismo conjunto
+          de objetos devuelve el mismo catálogo.
+          """)
+async def crear_catalogo(solicitud: SolicitudCatalogo) -> InfoCatalogo:
+    """Guarda un catálogo y devuelve su identificador y resumen"""
+    id_catalogo = await asyncio.to_thread(guardar_catalogo, solicitud.objetos)
+    logger.info(f"🗂️ Catálogo {id_catalogo} disponible con {len(solicitud.objetos)} objetos")
+    return InfoCatalogo(**abrir_catalogo(id_catalogo).resumen(id_catalogo))
+
+@app.get("/catalogos/{id_catalogo}",
+         response_model=InfoCatalogo,
+         tags=["Catálogos"],
+         summary="Consultar un catálogo")
+async def consultar_catalogo(id_catalogo: str) -> InfoCatalogo:
+    """Devuelve el resumen de un catálogo guardado"""
+    try:
+        return InfoCatalogo(**abrir_catalogo(id_catalogo).resumen(id_catalogo))
+    except CatalogoNoEncontrado as e:
+        raise _catalogo_no_encontrado(e)
+
+@app.delete("/catalogos/{id_catalogo}",
+            response_model=MensajeExito,
+            tags=["Catálogos"],
+            summary="Eliminar un catálogo")
+async def borrar_catalogo(id_catalogo: str) -> MensajeExito:
+    """Elimina un catálogo guardado"""
+    try:
+        eliminar_catalogo(id_catalogo)
+    except CatalogoNoEncontrado as e:
+        raise _catalogo_no_encontrado(e)
+    
+    return MensajeExito(mensaje=f"Catálogo {id_catalogo} eliminado", timestamp=str(time.time()))
+
+@app.post("/catalogos/{id_catalogo}/optimizar",
+          response_model=ResultadoOptimizacion,
+          tags=["Catálogos"],
+          summary="Optimizar sobre un catálogo guardado",
+          description="""
+          Optimiza sobre los objetos de un catálogo guardado. El `filtro` opcional limita los
+          candidatos (`incluir`, `excluir`, `peso_maximo`, `ganancia_minima`) y se evalúa con
+          operaciones vectorizadas sobre las columnas mapeadas en memoria; solo los objetos
+          candidatos se convierten en objetos Python para el motor.
+          """)
+async def optimizar_catalogo(id_catalogo: str, solicitud: SolicitudOptimizacionCatalogo, response: Response,
+                             opciones: OpcionesDepuracion = Depends(opciones_depuracion)) -> ResultadoOptimizacion:
+    """Optimiza sobre un catálogo guardado"""
+    logger.info(f"🗂️ Optimizando catálogo {id_catalogo} con capacidad {solicitud.capacidad}")
+    
+    filtro = solicitud.filtro.dict(exclude_none=True) if solicitud.filtro else None
+    
+    # Los catálogos son inmutables y direccionados por contenido: el resultado se puede guardar en caché
+    clave = clave_solicitud(
+        solicitud.capacidad, [], catalogo=id_catalogo, filtro=filtro,
+        epsilon=solicitud.epsilon, tiempo_max_ms=solicitud.tiempo_max_ms
+    )
+    resultado = None if opciones.activa else await cache.obtener(clave)
+    if resultado is not None:
+        logger.info(f"♻️ Resultado obtenido de la caché ({clave[:12]})")
+        _encabezados_costo(response, resultado)
+        return resultado
+    
+    validacion = time.perf_counter() - opciones.inicio
+    try:
+        resultado, plan = await ejecutor.optimizar_catalogo(
+            id_catalogo, solicitud.capacidad, filtro,
+            epsilon=solicitud.epsilon, tiempo_max_ms=solicitud.tiempo_max_ms,
+            depurar=opciones.depurar, perfil=opciones.perfil
+        )
+    except CatalogoNoEncontrado as e:
+        raise _catalogo_no_encontrado(e)
+    except Exception as e:
+        logger.warning(f"⚠️ Optimización de catálogo fallida: {str(e)}")
+        raise _http_de_excepcion(e)
+    
+    if not opciones.activa and (resultado.optimo or plan.tiempo_max_ms is None):
+        await cache.guardar(clave, resultado)
+    uso_motores[resultado.motor] = uso_motores.get(resultado.motor, 0) + 1
+    _encabezados_costo(response, resultado, plan)
+    _encabezados_depuracion(response, resultado, validacion)
+    
+    logger.info(f"✅ Optimización de catálogo completada: {len(resultado.seleccionados)} objetos seleccionados, "
+               f"ganancia: {resultado.ganancia_total}, motor: {resultado.motor}")
+    
+    return resultado
+
+async def _resolver_con_cache(solicitud: SolicitudOptimizacion) -> ResultadoOptimizacion:
+    """Resuelve una solicitud validada pasando por la caché y la unificación de solicitudes"""
+    peso_minimo = min(obj.peso for obj in solicitud.objetos)
+    if solicitud.capacidad < peso_minimo:
+        raise ValueError(f"La capacidad ({solicitud.capacidad}) es menor que el peso mínimo requerido ({peso_minimo})")
+    
+    clave = clave_solicitud(
+        solicitud.capacidad, solicitud.objetos,
+        epsilon=solicitud.epsilon, tiempo_max_ms=solicitud.tiempo_max_ms
+    )
+    resultado = await cache.obtener(clave)
+    if resultado is None:
+        resultado, _ = await optimizar_una_vez(clave, solicitud)
+    return resultado
+
+class RespuestaNDJSON(StreamingResponse):
+    """
+    StreamingResponse que transmite sin escuchar la desconexión del cliente.
+    
+    StreamingResponse lee receive() en paralelo para detectar la desconexión y
+    descarta los fragmentos del cuerpo que recibe, que aquí se siguen leyendo
+    mientras se responde. La desconexión llega igualmente a request.stream(),
+    que lanza ClientDisconnect y termina el flujo.
+    """
+    media_type = "application/x-ndjson"
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+@app.post("/optimizar/ndjson",
+          tags=["Optimización"],
+          summary="Optimizar un flujo NDJSON",
+          description="""
+          Recibe un cuerpo NDJSON (`application/x-ndjson`) con una solicitud de optimización
+          por línea y devuelve un flujo NDJSON con una línea por solicitud, en orden de
+          finalización. Cada línea de salida incluye `linea`, el `id` de la solicitud si lo
+          tenía y `resultado` o `error`.
+          
+          El cuerpo se lee a medida que llega y se resuelven hasta `NDJSON_CONCURRENCIA`
+          solicitudes a la vez, por lo que la memoria no depende del tamaño del archivo.
+          """)
+async def optimizar_ndjson(request: Request) -> RespuestaNDJSON:
+    """Optimiza en flujo las solicitudes NDJSON del cuerpo de la petición"""
+    logger.info("🌊 Iniciando flujo NDJSON")
+    
+    return RespuestaNDJSON(
+        procesar_ndjson(lineas_de_bloques(request.stream()), _resolver_con_cache, _error_de_excepcion)
+    )
 
 # Endpoint de ejemplo con datos predefinidos
 @app.post("/optimizar/ejemplo", 
@@ -293,8 +1190,9 @@ async def optimizar_ejemplo() -> ResultadoOptimizacion:
     logger.info("📚 Ejecutando ejemplo con datos predefinidos")
     
     try:
-        resultado = optimizador.optimizar(capacidad_ejemplo, objetos_ejemplo)
-        logger.info("✅ Ejemplo ejecutado exitosamente")
+        resultado, _ = await ejecutor.optimizar(capacidad_ejemplo, objetos_ejemplo)
+        uso_motores[resultado.motor] = uso_motores.get(resultado.motor, 0) + 1
+        logger.info(f"✅ Ejemplo ejecutado exitosamente (motor: {resultado.motor})")
         return resultado
     except Exception as e:
         logger.error(f"❌ Error en ejemplo: {str(e)}")
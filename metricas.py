@@ -0,0 +1,210 @@
+"""
+Métricas del servicio en el formato de texto de Prometheus, sin dependencias externas
+"""
+
+import bisect
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from optimizer import InstanciaResuelta
+
+# Límites de los histogramas
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LIMITES_OBJETOS = tuple(10 ** e * m for e in range(0, 6) for m in (1, 3))
+LIMITES_CAPACIDAD = tuple(10 ** e for e in range(1, 10))
+LIMITES_CELDAS = tuple(10 ** e for e in range(3, 12))
+
+
+def _formato_valor(valor: float) -> str:
+    if valor == math.inf:
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formato_etiquetas(nombres: Sequence[str], valores: Sequence[str]) -> str:
+    if not nombres:
+        return ""
+    return "{" + ",".join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)) + "}"
+
+
+class Contador:
+    """Contador monótono con etiquetas"""
+    
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+    
+    def incrementar(self, valor: float = 1, *etiquetas: str):
+        self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+    
+    def exponer(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        for etiquetas, valor in sorted(self._valores.items()):
+            lineas.append(f"{self.nombre}{_formato_etiquetas(self.etiquetas, etiquetas)} {_formato_valor(valor)}")
+        return lineas
+
+
+class Histograma:
+    """Histograma acumulativo con límites fijos y etiquetas"""
+    
+    def __init__(self, nombre: str, ayuda: str, limites: Sequence[float], etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = tuple(limites) + (math.inf,)
+        self.etiquetas = tuple(etiquetas)
+        # Por serie: conteo por intervalo (no acumulado), suma y total
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+    
+    def observar(self, valor: float, *etiquetas: str):
+        serie = self._series.get(etiquetas)
+        if serie is None:
+            serie = self._series[etiquetas] = [0] * len(self.limites) + [0, 0]
+        
+        serie[bisect.bisect_left(self.limites, valor)] += 1
+        serie[-2] += valor
+        serie[-1] += 1
+    
+    def exponer(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for etiquetas, serie in sorted(self._series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.limites, serie):
+                acumulado += conteo
+                etiquetas_le = _formato_etiquetas(self.etiquetas + ("le",), etiquetas + (_formato_valor(limite),))
+                lineas.append(f"{self.nombre}_bucket{etiquetas_le} {acumulado}")
+            texto = _formato_etiquetas(self.etiquetas, etiquetas)
+            lineas.append(f"{self.nombre}_sum{texto} {_formato_valor(serie[-2])}")
+            lineas.append(f"{self.nombre}_count{texto} {_formato_valor(serie[-1])}")
+        return lineas
+
+
+class Indicador:
+    """
+    Valor calculado al exponer las métricas.
+    
+    Sirve para valores instantáneos (tipo gauge) y para contadores que ya
+    lleva otro componente, como los aciertos de la caché (tipo counter).
+    """
+    
+    def __init__(self, nombre: str, ayuda: str, funcion: Callable[[], Dict[Tuple[str, ...], float]],
+                 etiquetas: Sequence[str] = (), tipo: str = "gauge"):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.funcion = funcion
+        self.etiquetas = tuple(etiquetas)
+        self.tipo = tipo
+    
+    def exponer(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        for etiquetas, valor in sorted(self.funcion().items()):
+            lineas.append(f"{self.nombre}{_formato_etiquetas(self.etiquetas, etiquetas)} {_formato_valor(valor)}")
+        return lineas
+
+
+def rss_pico_bytes() -> Optional[int]:
+    """Memoria residente máxima de este proceso, o None si la plataforma no la informa"""
+    if resource is None:
+        return None
+    # ru_maxrss está en kilobytes en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def ruta_de_scope(scope: dict) -> str:
+    """
+    Plantilla de la ruta atendida (por ejemplo /sesiones/{id_sesion}) para usarla como etiqueta.
+    
+    Las rutas de FastAPI dejan en scope["route"] la ruta que coincidió, con
+    su plantilla en path. Las rutas de Starlette sin parámetros (/docs,
+    /openapi.json) se etiquetan con la URL, que ya es su plantilla; el resto
+    (URL desconocidas o montajes con parámetros) se agrupa en "sin_ruta"
+    para no crear una serie por cada URL.
+    """
+    ruta = scope.get("route")
+    if ruta is not None and getattr(ruta, "path", None):
+        return ruta.path
+    if "endpoint" in scope and not scope.get("path_params"):
+        return scope["path"]
+    return "sin_ruta"
+
+
+class MetricasServicio:
+    """
+    Métricas de la API y de los motores, expuestas en /metrics.
+    
+    Los histogramas y contadores se actualizan en el proceso principal: la
+    latencia desde el middleware y los diagnósticos de cada optimización
+    cuando el pool devuelve su resultado. Los indicadores (caché, pool,
+    sesiones, memoria) se leen al exponer.
+    """
+    
+    def __init__(self):
+        self.latencia = Histograma(
+            "portafolio_http_solicitud_segundos", "Latencia de las solicitudes HTTP",
+            LIMITES_LATENCIA, ("metodo", "ruta", "estado")
+        )
+        self.optimizaciones = Contador(
+            "portafolio_optimizaciones_total", "Optimizaciones resueltas por motor", ("motor",)
+        )
+        self.celdas = Contador(
+            "portafolio_celdas_dp_total", "Celdas de programación dinámica calculadas por motor", ("motor",)
+        )
+        self.objetos = Histograma(
+            "portafolio_optimizacion_objetos", "Objetos por optimización", LIMITES_OBJETOS, ("motor",)
+        )
+        self.capacidad = Histograma(
+            "portafolio_optimizacion_capacidad", "Capacidad pedida por optimización", LIMITES_CAPACIDAD, ("motor",)
+        )
+        self.celdas_optimizacion = Histograma(
+            "portafolio_optimizacion_celdas", "Celdas de programación dinámica por optimización",
+            LIMITES_CELDAS, ("motor",)
+        )
+        self.rss_pico_pool = 0
+        self._indicadores: List[Indicador] = []
+    
+    def registrar_solicitud(self, metodo: str, ruta: str, estado: int, segundos: float):
+        """Registra la latencia de una solicitud HTTP"""
+        self.latencia.observar(segundos, metodo, ruta, str(estado))
+    
+    def registrar_instancias(self, instancias: Iterable[InstanciaResuelta]):
+        """Registra las optimizaciones informadas por un proceso"""
+        for instancia in instancias:
+            self.optimizaciones.incrementar(1, instancia.motor)
+            self.celdas.incrementar(instancia.celdas, instancia.motor)
+            self.objetos.observar(instancia.objetos, instancia.motor)
+            self.capacidad.observar(instancia.capacidad, instancia.motor)
+            self.celdas_optimizacion.observar(instancia.celdas, instancia.motor)
+    
+    def registrar_rss_pool(self, rss_bytes: Optional[int]):
+        """Actualiza la memoria máxima informada por los procesos del pool"""
+        if rss_bytes is not None:
+            self.rss_pico_pool = max(self.rss_pico_pool, rss_bytes)
+    
+    def agregar_indicador(self, nombre: str, ayuda: str, funcion: Callable[[], Dict[Tuple[str, ...], float]],
+                          etiquetas: Sequence[str] = (), tipo: str = "gauge"):
+        """Agrega un valor que se calcula al exponer"""
+        self._indicadores.append(Indicador(nombre, ayuda, funcion, etiquetas, tipo))
+    
+    def exponer(self) -> str:
+        """Texto en el formato de exposición de Prometheus (versión 0.0.4)"""
+        rss = {("principal",): rss_pico_bytes() or 0, ("pool",): self.rss_pico_pool}
+        metricas = [
+            self.latencia, self.optimizaciones, self.celdas,
+            self.objetos, self.capacidad, self.celdas_optimizacion,
+            Indicador("portafolio_rss_pico_bytes", "Memoria residente máxima por proceso "
+                      "(pool: el máximo de sus procesos)", lambda: rss, ("proceso",)),
+            *self._indicadores
+        ]
+        return "\n".join(linea for metrica in metricas for linea in metrica.exponer()) + "\n"
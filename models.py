@@ -1,7 +1,15 @@
 from pydantic import BaseModel, Field, validator
-from typing import List
+from typing import Any, Dict, List, Optional
 import re
 
+from configuracion import MAX_OBJETOS, MAX_CAPACIDADES, MAX_OBJETOS_CATALOGO, MAX_GANANCIA_TOTAL
+
+
+def validar_ganancia_total(ganancias):
+    """Validar que la suma de las ganancias quepa en las tablas int64 de los motores"""
+    if sum(ganancias) >= MAX_GANANCIA_TOTAL:
+        raise ValueError(f'La suma de las ganancias debe ser menor que {MAX_GANANCIA_TOTAL}')
+
 
 class Objeto(BaseModel):
     """Modelo para representar un objeto de inversión"""
@@ -27,7 +35,9 @@ class Objeto(BaseModel):
 class SolicitudOptimizacion(BaseModel):
     """Modelo para la solicitud de optimización"""
     capacidad: int = Field(..., gt=0, description="Límite presupuestario total")
-    objetos: List[Objeto] = Field(..., min_items=1, max_items=100, description="Lista de proyectos/inversiones")
+    objetos: List[Objeto] = Field(..., min_items=1, max_items=MAX_OBJETOS, description="Lista de proyectos/inversiones")
+    epsilon: Optional[float] = Field(None, gt=0, lt=1, description="Pérdida relativa admitida; activa el modo aproximado")
+    tiempo_max_ms: Optional[int] = Field(None, gt=0, le=600000, description="Tiempo máximo de resolución en milisegundos")
     
     @validator('capacidad')
     def capacidad_valida(cls, v):
@@ -42,14 +52,26 @@ class SolicitudOptimizacion(BaseModel):
         nombres = [obj.nombre for obj in v]
         if len(nombres) != len(set(nombres)):
             raise ValueError('No puede haber nombres duplicados en los objetos')
+        validar_ganancia_total(obj.ganancia for obj in v)
         return v
 
 
+class DepuracionOptimizacion(BaseModel):
+    """Bloque de depuración de una optimización, incluido solo si se pide"""
+    fases_ms: Dict[str, float] = Field(..., description="Milisegundos por fase, en orden de ejecución; suman el tiempo medido")
+    perfil: Optional[Dict[str, Any]] = Field(None, description="Informe de cProfile o tracemalloc, si se pidió un perfil")
+
+
 class ResultadoOptimizacion(BaseModel):
     """Modelo para el resultado de la optimización"""
     seleccionados: List[str] = Field(..., description="Lista de nombres de objetos seleccionados")
     ganancia_total: int = Field(..., description="Ganancia total de los objetos seleccionados")
     peso_total: int = Field(..., description="Peso total de los objetos seleccionados")
+    motor: Optional[str] = Field(None, description="Motor de resolución utilizado")
+    cota_superior: Optional[int] = Field(None, description="Cota superior garantizada de la ganancia óptima (modo aproximado o con tiempo máximo)")
+    optimo: Optional[bool] = Field(None, description="Indica si la solución está demostrada como óptima")
+    brecha: Optional[float] = Field(None, description="Brecha relativa entre la ganancia y la cota superior")
+    depuracion: Optional[DepuracionOptimizacion] = Field(None, description="Tiempos por fase y perfil; solo con ?depurar=true o ?perfil=")
     
     @validator('seleccionados')
     def seleccionados_validos(cls, v):
@@ -59,6 +81,133 @@ class ResultadoOptimizacion(BaseModel):
         return v
 
 
+class SolicitudColumnar(BaseModel):
+    """
+    Modelo para la solicitud de optimización en formato columnar.
+    
+    Solo se comprueban los tipos de cada columna; las reglas de Objeto se
+    aplican en bloque con columnar.validar_columnas.
+    """
+    capacidad: int = Field(..., gt=0, le=1000000000, description="Límite presupuestario total")
+    nombres: List[str] = Field(..., max_items=MAX_OBJETOS, description="Nombre de cada proyecto/inversión")
+    pesos: List[int] = Field(..., max_items=MAX_OBJETOS, description="Costo de cada proyecto, en el mismo orden")
+    ganancias: List[int] = Field(..., max_items=MAX_OBJETOS, description="Beneficio de cada proyecto, en el mismo orden")
+    epsilon: Optional[float] = Field(None, gt=0, lt=1, description="Pérdida relativa admitida; activa el modo aproximado")
+    tiempo_max_ms: Optional[int] = Field(None, gt=0, le=600000, description="Tiempo máximo de resolución en milisegundos")
+
+
+class SolicitudCapacidades(BaseModel):
+    """Modelo para la solicitud de varias capacidades o de la frontera ganancia-presupuesto"""
+    capacidades: Optional[List[int]] = Field(None, min_items=1, max_items=MAX_CAPACIDADES, description="Presupuestos cuya selección óptima se quiere conocer")
+    objetos: List[Objeto] = Field(..., min_items=1, max_items=MAX_OBJETOS, description="Lista de proyectos/inversiones")
+    frontera: bool = Field(False, description="Incluir la frontera ganancia-presupuesto comprimida a sus puntos de quiebre")
+    
+    @validator('capacidades')
+    def capacidades_validas(cls, v):
+        """Validar que cada capacidad esté en el mismo rango que en SolicitudOptimizacion"""
+        if v is not None and any(c <= 0 or c > 1000000000 for c in v):
+            raise ValueError('Cada capacidad debe estar entre 1 y 1,000,000,000')
+        return v
+    
+    @validator('objetos')
+    def objetos_validos(cls, v):
+        """Validar que no haya nombres duplicados"""
+        nombres = [obj.nombre for obj in v]
+        if len(nombres) != len(set(nombres)):
+            raise ValueError('No puede haber nombres duplicados en los objetos')
+        validar_ganancia_total(obj.ganancia for obj in v)
+        return v
+    
+    @validator('frontera', always=True)
+    def consulta_no_vacia(cls, v, values):
+        """Validar que se pida al menos una capacidad o la frontera"""
+        if not v and not values.get('capacidades'):
+            raise ValueError('Debe indicar capacidades o pedir la frontera')
+        return v
+
+
+class SolicitudSesion(BaseModel):
+    """Modelo para crear una sesión de re-optimización incremental"""
+    capacidad: int = Field(..., gt=0, le=1000000000, description="Límite presupuestario total")
+    objetos: List[Objeto] = Field(..., min_items=1, max_items=MAX_OBJETOS, description="Lista de proyectos/inversiones")
+    
+    @validator('objetos')
+    def objetos_validos(cls, v):
+        """Validar que no haya nombres duplicados"""
+        nombres = [obj.nombre for obj in v]
+        if len(nombres) != len(set(nombres)):
+            raise ValueError('No puede haber nombres duplicados en los objetos')
+        validar_ganancia_total(obj.ganancia for obj in v)
+        return v
+
+
+class CambiosSesion(BaseModel):
+    """Modelo para los cambios aplicados a una sesión"""
+    agregar: List[Objeto] = Field([], description="Objetos nuevos")
+    modificar: List[Objeto] = Field([], description="Objetos existentes con su nuevo peso y ganancia")
+    eliminar: List[str] = Field([], description="Nombres de los objetos a eliminar")
+
+
+class ResultadoSesion(BaseModel):
+    """Modelo para el resultado de una sesión de re-optimización incremental"""
+    id: str = Field(..., description="Identificador de la sesión")
+    resultado: Optional[ResultadoOptimizacion] = Field(None, description="Selección óptima actual; vacío si ningún objeto cabe")
+    objetos: int = Field(..., description="Objetos en la sesión")
+    filas_recalculadas: int = Field(..., description="Filas de la tabla recalculadas para esta respuesta")
+    memoria_bytes: int = Field(..., description="Memoria ocupada por el estado de la sesión")
+
+
+class SolicitudCatalogo(BaseModel):
+    """Modelo para subir un catálogo de objetos"""
+    objetos: List[Objeto] = Field(..., min_items=1, max_items=MAX_OBJETOS_CATALOGO, description="Universo de proyectos/inversiones")
+    
+    @validator('objetos')
+    def objetos_validos(cls, v):
+        """Validar que no haya nombres duplicados"""
+        nombres = [obj.nombre for obj in v]
+        if len(nombres) != len(set(nombres)):
+            raise ValueError('No puede haber nombres duplicados en los objetos')
+        validar_ganancia_total(obj.ganancia for obj in v)
+        return v
+
+
+class InfoCatalogo(BaseModel):
+    """Modelo con los datos de un catálogo guardado"""
+    id: str = Field(..., description="Identificador del catálogo (hash de su contenido)")
+    objetos: int = Field(..., description="Número de objetos")
+    peso_total: int = Field(..., description="Suma de los pesos")
+    ganancia_total: int = Field(..., description="Suma de las ganancias")
+    bytes: int = Field(..., description="Tamaño del archivo del catálogo")
+
+
+class FiltroCatalogo(BaseModel):
+    """Modelo para elegir qué objetos de un catálogo participan en una optimización"""
+    incluir: Optional[List[str]] = Field(None, description="Solo estos objetos")
+    excluir: Optional[List[str]] = Field(None, description="Objetos a descartar")
+    peso_maximo: Optional[int] = Field(None, gt=0, description="Descartar objetos con mayor peso")
+    ganancia_minima: Optional[int] = Field(None, gt=0, description="Descartar objetos con menor ganancia")
+
+
+class SolicitudOptimizacionCatalogo(BaseModel):
+    """Modelo para optimizar sobre un catálogo guardado"""
+    capacidad: int = Field(..., gt=0, le=1000000000, description="Límite presupuestario total")
+    filtro: Optional[FiltroCatalogo] = Field(None, description="Subconjunto del catálogo a considerar")
+    epsilon: Optional[float] = Field(None, gt=0, lt=1, description="Pérdida relativa admitida; activa el modo aproximado")
+    tiempo_max_ms: Optional[int] = Field(None, gt=0, le=600000, description="Tiempo máximo de resolución en milisegundos")
+
+
+class PuntoFrontera(BaseModel):
+    """Punto de quiebre de la frontera ganancia-presupuesto"""
+    capacidad: int = Field(..., description="Presupuesto mínimo con el que se alcanza la ganancia")
+    ganancia: int = Field(..., description="Ganancia óptima desde este presupuesto hasta el siguiente punto")
+
+
+class ResultadoCapacidades(BaseModel):
+    """Modelo para el resultado de varias capacidades resueltas con una sola tabla"""
+    resultados: List[ResultadoOptimizacion] = Field(..., description="Resultado de cada capacidad pedida, en orden")
+    frontera: Optional[List[PuntoFrontera]] = Field(None, description="Puntos de quiebre de la frontera, si se pidió")
+
+
 class ErrorResponse(BaseModel):
     """Modelo para respuestas de error"""
     error: str = Field(..., description="Descripción del error")
@@ -66,6 +215,22 @@ class ErrorResponse(BaseModel):
     codigo: str = Field(..., description="Código de error interno")
 
 
+class ResultadoLoteItem(BaseModel):
+    """Resultado o error de una solicitud dentro de un lote"""
+    indice: int = Field(..., description="Posición de la solicitud en el lote")
+    resultado: Optional[ResultadoOptimizacion] = Field(None, description="Resultado si la optimización tuvo éxito")
+    error: Optional[ErrorResponse] = Field(None, description="Error si la optimización falló")
+
+
+class ResultadoLote(BaseModel):
+    """Modelo para el resultado de una optimización por lotes"""
+    resultados: List[ResultadoLoteItem] = Field(..., description="Resultado o error de cada solicitud, en orden")
+    exitosos: int = Field(..., description="Solicitudes resueltas correctamente")
+    fallidos: int = Field(..., description="Solicitudes con error")
+    tablas_compartidas: int = Field(..., description="Grupos de solicitudes resueltos con una sola tabla")
+    tiempo_total_ms: float = Field(..., description="Tiempo total de procesamiento del lote")
+
+
 class MensajeExito(BaseModel):
     """Modelo para mensajes de éxito"""
     mensaje: str = Field(..., description="Mensaje de confirmación")
@@ -1,22 +1,189 @@
-from typing import List, Tuple, Dict
-from models import Objeto, ResultadoOptimizacion
+from typing import List, Tuple, Dict, NamedTuple, Optional
+from array import array
+from dataclasses import dataclass, field
+from math import gcd
+from bisect import bisect_right
+from collections import deque
+from contextlib import contextmanager
+from models import Objeto, ResultadoOptimizacion, validar_ganancia_total
+from configuracion import DP_PARALELO_PROCESOS
+from dp_paralelo import TablaCompartida, procesos_para
 import logging
+import time
+import numpy as np
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class ObjetoReducido(NamedTuple):
+    """Objeto con el peso ya dividido por el divisor común de la instancia"""
+    nombre: str
+    peso: int
+    ganancia: int
+    original: Objeto
+
+
+class PiezaGrupo(NamedTuple):
+    """Bloque de objetos idénticos de un grupo, tratado como un solo objeto 0/1"""
+    peso: int
+    ganancia: int
+    multiplicidad: int
+    grupo: int
+
+
+class EstimacionCosto(NamedTuple):
+    """Tiempo y memoria previstos por el modelo de costo para resolver con un motor"""
+    motor: str
+    celdas: int
+    segundos: float
+    bytes: int
+
+
+class PlanOptimizacion(NamedTuple):
+    """Decisión del control de admisión: costo previsto y parámetros con los que se resuelve"""
+    estimacion: EstimacionCosto
+    epsilon: Optional[float]
+    tiempo_max_ms: Optional[int]
+    degradada: bool
+
+
+class InstanciaResuelta(NamedTuple):
+    """Diagnóstico de una optimización resuelta, para las métricas"""
+    motor: str
+    objetos: int
+    capacidad: int
+    celdas: int
+
+
+class CostoExcedido(Exception):
+    """La solicitud supera el presupuesto de CPU o memoria y no se admite degradarla"""
+
+
+@dataclass
+class ReduccionInstancia:
+    """Registro de las transformaciones aplicadas antes de ejecutar un motor"""
+    capacidad_original: int
+    capacidad: int
+    objetos: List[ObjetoReducido]
+    divisor: int = 1
+    descartados: List[str] = field(default_factory=list)
+    dominados: List[str] = field(default_factory=list)
+    trivial: bool = False
+    
+    def resumen(self) -> str:
+        """Descripción breve para los logs"""
+        return (f"capacidad {self.capacidad_original} -> {self.capacidad}, divisor {self.divisor}, "
+                f"descartados {len(self.descartados)}, dominados {len(self.dominados)}, "
+                f"trivial {self.trivial}")
+
+
 class OptimizadorPortafolio:
     """
     Clase que implementa el algoritmo de optimización de portafolio
     utilizando programación dinámica para resolver el problema de la mochila
     """
     
+    # Motor usado cuando el llamador no especifica uno; "auto" elige por instancia
+    MOTOR_POR_DEFECTO = "auto"
+    
+    # Máximo de celdas (objetos x columnas) para elegir automáticamente un motor de tabla
+    LIMITE_CELDAS_DP = 50_000_000
+    
+    # A partir de este número de objetos la selección automática usa el motor de núcleo
+    LIMITE_OBJETOS_NUCLEO = 200
+    
+    # Objetos a cada lado del objeto de quiebre en el núcleo inicial
+    RADIO_NUCLEO = 25
+    
+    # Máximo de estados que pareto guarda entre todas las filas para la reconstrucción
+    # (9 bytes cada uno: padre int64 y decisión); con pesos grandes y correlacionados
+    # los estados no dominados crecen casi como 2^n
+    LIMITE_ESTADOS_PARETO = 10_000_000
+    
+    # Procesos entre los que dp_paralelo reparte cada fila
+    PROCESOS_PARALELO = DP_PARALELO_PROCESOS
+    
+    # Tolerancia del motor fptas cuando se elige por nombre sin indicar epsilon
+    EPSILON_POR_DEFECTO = 0.1
+    
+    # Modelo de costo de los motores de tabla: nanosegundos por celda y por fila,
+    # medidos con NumPy (las tablas por ganancia usan el centinela int64 y son más lentas)
+    NS_POR_CELDA = {"dp_numpy": 4.0, "dp_agrupado": 4.0, "dp_ganancia": 10.0, "fptas": 10.0}
+    NS_POR_FILA = 15_000
+    
+    # Trabajo del motor de núcleo por objeto de la instancia completa (ordenamiento,
+    # reducción, objeto de quiebre y prueba de reducción en Python), fuera de su tabla
+    NS_POR_OBJETO_NUCLEO = 20_000
+    
+    # Memoria de branch and bound por objeto (listas de pesos, ganancias y decisiones)
+    BYTES_POR_OBJETO_BUSQUEDA = 64
+    
+    # Tiempo máximo (segundos) de branch and bound cuando "auto" lo elige sin presupuesto:
+    # en instancias fuertemente correlacionadas la búsqueda puede ser exponencial
+    SEGUNDOS_BUSQUEDA_AUTO = 10.0
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        
+        # Celdas de programación dinámica calculadas por este proceso y últimas instancias
+        # resueltas; los procesos del pool las devuelven junto con cada resultado
+        self.celdas_dp = 0
+        self.instancias_resueltas: "deque[InstanciaResuelta]" = deque(maxlen=1000)
+        
+        # Procesos con los que dp_paralelo llenó su última tabla (1 si resolvió con dp_numpy)
+        self.procesos_dp_paralelo = 0
+        
+        # Segundos acumulados por fase (tiempo propio, sin las fases anidadas) desde la
+        # última llamada a extraer_fases, y tiempo de las fases hijas de cada fase abierta
+        self.fases: Dict[str, float] = {}
+        self._pila_fases: List[float] = []
+        
+        # Motores de resolución disponibles, todos con la misma firma
+        self.motores = {
+            "dp_clasico": self._algoritmo_programacion_dinamica,
+            "dp_bitset": self._algoritmo_dp_bitset,
+            "dp_numpy": self._algoritmo_dp_numpy,
+            "dp_paralelo": self._algoritmo_dp_paralelo,
+            "dp_ganancia": self._algoritmo_dp_ganancia,
+            "dp_agrupado": self._algoritmo_dp_agrupado,
+            "branch_and_bound": self._algoritmo_branch_and_bound,
+            "pareto": self._algoritmo_pareto,
+            "nucleo": self._algoritmo_nucleo,
+            "fptas": self._algoritmo_fptas,
+        }
+    
+    @contextmanager
+    def fase(self, nombre: str):
+        """
+        Mide el bloque como una fase de la optimización.
+        
+        Cada fase acumula su tiempo propio: el de las fases anidadas se descuenta
+        de la que las contiene, de modo que la suma de las fases es el tiempo total
+        medido. Cuesta dos llamadas a time.perf_counter, así que se usa en bloques
+        completos (ordenar, llenar la tabla) y no por fila ni por celda.
+        """
+        inicio = time.perf_counter()
+        self._pila_fases.append(0.0)
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - inicio
+            propio = total - self._pila_fases.pop()
+            self.fases[nombre] = self.fases.get(nombre, 0.0) + propio
+            if self._pila_fases:
+                self._pila_fases[-1] += total
+    
+    def extraer_fases(self) -> Dict[str, float]:
+        """Devuelve y vacía los segundos por fase acumulados desde la última llamada"""
+        fases, self.fases = self.fases, {}
+        return fases
     
-    def optimizar(self, capacidad: int, objetos: List[Objeto]) -> ResultadoOptimizacion:
+    def optimizar(self, capacidad: int, objetos: List[Objeto], motor: str = MOTOR_POR_DEFECTO,
+                  reducir: bool = True, epsilon: Optional[float] = None,
+                  tiempo_max_ms: Optional[int] = None, max_segundos: Optional[float] = None,
+                  max_bytes: Optional[int] = None) -> ResultadoOptimizacion:
         """
         Optimiza la selección de objetos para maximizar la ganancia
         sin exceder la capacidad presupuestaria.
@@ -24,13 +191,30 @@ class OptimizadorPortafolio:
         Args:
             capacidad: Límite presupuestario total
             objetos: Lista de objetos de inversión disponibles
+            motor: Nombre del motor de resolución a utilizar
+            reducir: Si se aplica la reducción de la instancia antes del motor
+            epsilon: Si se indica, se acepta una solución con ganancia >= (1 - epsilon) * óptimo
+                     y se usa el motor aproximado fptas
+            tiempo_max_ms: Si se indica, se parte de la solución greedy y se mejora con
+                           branch and bound hasta agotar el tiempo; el resultado informa
+                           si es óptimo y la brecha respecto de la cota superior
+            max_segundos: Presupuesto de CPU admitido por planificar: "auto" elige entre
+                          las tablas que caben en él y, si usa branch and bound, lo corta
+                          al agotarlo (el resultado informa la brecha). Sin presupuesto,
+                          el branch and bound elegido por "auto" se corta a los
+                          SEGUNDOS_BUSQUEDA_AUTO
+            max_bytes: Presupuesto de memoria admitido por planificar
             
         Returns:
             ResultadoOptimizacion con los objetos seleccionados y métricas
             
         Raises:
-            ValueError: Si no hay objetos disponibles o capacidad inválida
+            ValueError: Si no hay objetos disponibles, capacidad inválida, motor desconocido
+                o ganancias que suman MAX_GANANCIA_TOTAL o más (salvo con dp_clasico)
         """
+        inicio = time.perf_counter()
+        celdas_inicio = self.celdas_dp
+        
         try:
             # Validaciones básicas
             if not objetos:
@@ -39,32 +223,629 @@ class OptimizadorPortafolio:
             if capacidad <= 0:
                 raise ValueError("La capacidad debe ser mayor que 0")
             
-            self.logger.info(f"Iniciando optimización con {len(objetos)} objetos y capacidad {capacidad}")
+            if epsilon is not None and not 0 < epsilon < 1:
+                raise ValueError("epsilon debe estar entre 0 y 1")
+            
+            if tiempo_max_ms is not None and tiempo_max_ms <= 0:
+                raise ValueError("tiempo_max_ms debe ser mayor que 0")
+            
+            if motor != "auto" and motor not in self.motores:
+                raise ValueError(f"Motor desconocido: {motor}. Disponibles: {', '.join(self.motores)}")
+            
+            # Solo dp_clasico suma con enteros de Python; el resto de los motores usa int64
+            if motor != "dp_clasico":
+                validar_ganancia_total(obj.ganancia for obj in objetos)
+            
+            self.logger.info(f"Iniciando optimización con {len(objetos)} objetos y capacidad {capacidad} "
+                           f"(motor: {motor}, epsilon: {epsilon}, tiempo_max_ms: {tiempo_max_ms})")
             
             # Ordenar objetos por ratio ganancia/peso (eficiencia) descendente
-            objetos_ordenados = sorted(objetos, key=lambda x: x.ganancia/x.peso, reverse=True)
+            with self.fase("ordenamiento"):
+                objetos_ordenados = sorted(objetos, key=lambda x: x.ganancia/x.peso, reverse=True)
             
-            # Aplicar algoritmo de programación dinámica
-            seleccionados, ganancia_total, peso_total = self._algoritmo_programacion_dinamica(
-                capacidad, objetos_ordenados
-            )
+            if reducir:
+                # Reducir la instancia y resolver sobre los pesos escalados
+                with self.fase("reduccion"):
+                    reduccion = self._reducir_instancia(capacidad, objetos_ordenados)
+                self.logger.info(f"Reducción aplicada: {reduccion.resumen()}")
+                capacidad_motor, objetos_motor = reduccion.capacidad, reduccion.objetos
+            else:
+                reduccion = None
+                capacidad_motor, objetos_motor = capacidad, objetos_ordenados
+            
+            cota_superior = None
+            optimo = True
+            
+            if reduccion is not None and reduccion.trivial:
+                # Todos los objetos restantes caben: no hace falta ejecutar ningún motor
+                motor = "trivial"
+                seleccionados = list(reversed(objetos_motor))
+            else:
+                if epsilon is not None:
+                    # El modo aproximado solo compensa si su tabla es manejable; si no, se resuelve exacto
+                    n = len(objetos_motor)
+                    if n * (2 * n / epsilon + 1) <= self.LIMITE_CELDAS_DP:
+                        motor = "fptas"
+                    elif motor == "fptas":
+                        motor = "auto"
+                elif tiempo_max_ms is not None:
+                    motor = "branch_and_bound"
+                
+                # Tiempo máximo de branch and bound: el pedido, el resto del presupuesto
+                # o, si lo elige "auto" sin ninguno de los dos, SEGUNDOS_BUSQUEDA_AUTO
+                if tiempo_max_ms is not None:
+                    segundos_busqueda = tiempo_max_ms / 1000
+                elif max_segundos is not None:
+                    segundos_busqueda = max_segundos
+                elif motor == "auto":
+                    segundos_busqueda = self.SEGUNDOS_BUSQUEDA_AUTO
+                else:
+                    segundos_busqueda = None
+                
+                if motor == "auto":
+                    with self.fase("seleccion_motor"):
+                        motor = self._seleccionar_motor(capacidad_motor, objetos_motor,
+                                                        max_segundos=max_segundos, max_bytes=max_bytes)
+                self.logger.info(f"Motor seleccionado: {motor}")
+                
+                # Aplicar el motor de resolución seleccionado; las tablas miden sus propias
+                # fases (asignación, llenado, reconstrucción) y el resto queda en "motor"
+                with self.fase("motor"):
+                    if motor == "fptas":
+                        epsilon = epsilon if epsilon is not None else self.EPSILON_POR_DEFECTO
+                        seleccionados, ganancia_total, _ = self._algoritmo_fptas(
+                            capacidad_motor, objetos_motor, epsilon
+                        )
+                        cota_superior = min(
+                            self._cota_relajacion_lineal(capacidad_motor, objetos_motor),
+                            int(ganancia_total / (1 - epsilon))
+                        )
+                        optimo = ganancia_total == cota_superior
+                    elif motor == "branch_and_bound" and segundos_busqueda is not None:
+                        seleccionados, ganancia_total, _, cota_superior = self._branch_and_bound(
+                            capacidad_motor, objetos_motor, fecha_limite=inicio + segundos_busqueda
+                        )
+                        optimo = ganancia_total == cota_superior
+                    elif motor == "nucleo":
+                        fecha_limite = inicio + segundos_busqueda if segundos_busqueda is not None else None
+                        seleccionados, ganancia_total, _, cota = self._nucleo(
+                            capacidad_motor, objetos_motor, fecha_limite
+                        )
+                        # Solo se informa la cota si el núcleo no quedó resuelto de forma exacta
+                        if cota > ganancia_total:
+                            cota_superior, optimo = cota, False
+                    else:
+                        seleccionados, _, _ = self.motores[motor](capacidad_motor, objetos_motor)
+            
+            if reduccion is not None:
+                seleccionados = [obj.original for obj in seleccionados]
+            
+            ganancia_total = sum(obj.ganancia for obj in seleccionados)
+            peso_total = sum(obj.peso for obj in seleccionados)
+            
+            # Brecha relativa de optimalidad respecto de la cota superior
+            brecha = None
+            if cota_superior is not None:
+                brecha = (cota_superior - ganancia_total) / cota_superior if cota_superior else 0.0
             
             # Obtener nombres de objetos seleccionados
             nombres_seleccionados = [obj.nombre for obj in seleccionados]
             
-            self.logger.info(f"Optimización completada: {len(seleccionados)} objetos seleccionados, "
-                           f"ganancia total: {ganancia_total}, peso total: {peso_total}")
+            self.logger.info(f"Optimización completada ({motor}): {len(seleccionados)} objetos seleccionados, "
+                           f"ganancia total: {ganancia_total}, peso total: {peso_total}, "
+                           f"óptimo: {optimo}, brecha: {brecha}")
+            self.instancias_resueltas.append(
+                InstanciaResuelta(motor, len(objetos), capacidad, self.celdas_dp - celdas_inicio)
+            )
             
             return ResultadoOptimizacion(
                 seleccionados=nombres_seleccionados,
                 ganancia_total=ganancia_total,
-                peso_total=peso_total
+                peso_total=peso_total,
+                motor=motor,
+                cota_superior=cota_superior,
+                optimo=optimo,
+                brecha=brecha
             )
             
         except Exception as e:
             self.logger.error(f"Error durante la optimización: {str(e)}")
             raise
     
+    def optimizar_capacidades(self, capacidades: List[int], objetos: List[Objeto],
+                              max_segundos: Optional[float] = None, max_bytes: Optional[int] = None,
+                              degradar: bool = True) -> List[ResultadoOptimizacion]:
+        """
+        Optimiza el mismo conjunto de objetos para varias capacidades con una sola tabla.
+        
+        La última fila de la tabla indexada por peso contiene la ganancia óptima
+        para cada capacidad entre 0 y la mayor pedida, así que basta llenarla una
+        vez y reconstruir la selección de cada capacidad. Si la tabla supera
+        LIMITE_CELDAS_DP (o el presupuesto, si se indica), cada capacidad se
+        resuelve por separado: con presupuesto, cada una pasa por
+        optimizar_con_presupuesto con una parte igual de lo que queda, de modo
+        que el conjunto no supera max_segundos.
+        
+        Args:
+            capacidades: Capacidades a resolver
+            objetos: Lista de objetos de inversión disponibles
+            max_segundos: Presupuesto de CPU de toda la consulta (opcional)
+            max_bytes: Presupuesto de memoria por tabla
+            degradar: Si las capacidades que no caben en el presupuesto se degradan o se rechazan
+            
+        Returns:
+            Un ResultadoOptimizacion por capacidad, en el mismo orden
+            
+        Raises:
+            ValueError: Si no hay objetos, alguna capacidad es inválida o las
+                ganancias suman MAX_GANANCIA_TOTAL o más
+            CostoExcedido: Si una capacidad supera el presupuesto y degradar es False
+        """
+        if not capacidades or min(capacidades) <= 0:
+            raise ValueError("Las capacidades deben ser mayores que 0")
+        validar_ganancia_total(obj.ganancia for obj in objetos)
+        
+        inicio = time.perf_counter()
+        tabla = self._tabla_capacidades(max(capacidades), objetos, max_segundos, max_bytes)
+        if tabla is None:
+            self.logger.info(f"Tabla de {len(capacidades)} capacidades demasiado grande; se resuelven por separado")
+            if max_segundos is None:
+                return [self.optimizar(capacidad, objetos) for capacidad in capacidades]
+            
+            resultados = []
+            for k, capacidad in enumerate(capacidades):
+                restante = max(max_segundos - (time.perf_counter() - inicio), 0.0)
+                resultado, _ = self.optimizar_con_presupuesto(
+                    capacidad, objetos, restante / (len(capacidades) - k), max_bytes, degradar=degradar
+                )
+                resultados.append(resultado)
+            return resultados
+        
+        reduccion, dp, seleccion = tabla
+        return [self._resultado_de_tabla(reduccion, dp, seleccion, capacidad) for capacidad in capacidades]
+    
+    def optimizar_frontera(self, objetos: List[Objeto], capacidades: Optional[List[int]] = None,
+                           max_segundos: Optional[float] = None, max_bytes: Optional[int] = None
+                           ) -> Tuple[List[ResultadoOptimizacion], List[Tuple[int, int]]]:
+        """
+        Calcula la frontera ganancia-presupuesto y, opcionalmente, varias capacidades con una sola tabla.
+        
+        La frontera es la ganancia óptima en función del presupuesto, una
+        función escalonada que se devuelve comprimida a sus puntos de quiebre:
+        los presupuestos en los que la ganancia óptima aumenta. Llega hasta la
+        mayor capacidad pedida o, si no se piden capacidades, hasta la suma de
+        todos los pesos, donde ya caben todos los objetos.
+        
+        La frontera necesita la fila completa, así que no se puede degradar: si
+        la tabla supera LIMITE_CELDAS_DP o el presupuesto, se rechaza.
+        
+        Args:
+            objetos: Lista de objetos de inversión disponibles
+            capacidades: Capacidades cuya selección se reconstruye (opcional)
+            max_segundos: Presupuesto de CPU de la tabla (opcional)
+            max_bytes: Presupuesto de memoria de la tabla
+            
+        Returns:
+            Tupla con (un ResultadoOptimizacion por capacidad, puntos de quiebre
+            (presupuesto, ganancia) en orden creciente empezando por (0, 0))
+            
+        Raises:
+            ValueError: Si no hay objetos, alguna capacidad es inválida o las
+                ganancias suman MAX_GANANCIA_TOTAL o más
+            CostoExcedido: Si la tabla supera LIMITE_CELDAS_DP o el presupuesto
+        """
+        if capacidades is not None and (not capacidades or min(capacidades) <= 0):
+            raise ValueError("Las capacidades deben ser mayores que 0")
+        
+        if not objetos:
+            raise ValueError("No hay objetos disponibles para optimizar")
+        validar_ganancia_total(obj.ganancia for obj in objetos)
+        
+        capacidad_maxima = max(capacidades) if capacidades else sum(obj.peso for obj in objetos)
+        tabla = self._tabla_capacidades(capacidad_maxima, objetos, max_segundos, max_bytes)
+        if tabla is None:
+            raise CostoExcedido(f"La frontera hasta {capacidad_maxima} requiere una tabla de más de "
+                                f"{self.LIMITE_CELDAS_DP} celdas o que supera el presupuesto")
+        
+        reduccion, dp, seleccion = tabla
+        
+        # Puntos de quiebre: capacidades (en unidades reducidas) donde la fila aumenta
+        quiebres = np.flatnonzero(np.diff(dp)) + 1
+        frontera = [(0, 0)] + [(int(c) * reduccion.divisor, int(dp[c])) for c in quiebres]
+        self.logger.info(f"Frontera hasta {capacidad_maxima}: {len(frontera)} puntos de quiebre "
+                         f"de {len(dp)} capacidades")
+        
+        resultados = [self._resultado_de_tabla(reduccion, dp, seleccion, capacidad) for capacidad in capacidades or []]
+        return resultados, frontera
+    
+    def _tabla_capacidades(self, capacidad_maxima: int, objetos: List[Objeto],
+                           max_segundos: Optional[float] = None, max_bytes: Optional[int] = None
+                           ) -> Optional[Tuple[ReduccionInstancia, np.ndarray, np.ndarray]]:
+        """
+        Reduce la instancia para la mayor capacidad y llena una tabla válida para todas las menores.
+        
+        Args:
+            capacidad_maxima: Mayor capacidad que se consultará
+            objetos: Lista de objetos de inversión disponibles
+            max_segundos: Tiempo previsto máximo de la tabla (opcional)
+            max_bytes: Memoria prevista máxima de la tabla (opcional)
+            
+        Returns:
+            Tupla con (reducción, última fila y decisiones de _tabla_dp_numpy), o
+            None si la tabla supera LIMITE_CELDAS_DP o el presupuesto
+            
+        Raises:
+            ValueError: Si no hay objetos
+        """
+        if not objetos:
+            raise ValueError("No hay objetos disponibles para optimizar")
+        
+        objetos_ordenados = sorted(objetos, key=lambda x: x.ganancia/x.peso, reverse=True)
+        
+        # La reducción con la mayor capacidad es válida para todas las menores
+        reduccion = self._reducir_instancia(capacidad_maxima, objetos_ordenados)
+        capacidad_tabla = min(capacidad_maxima // reduccion.divisor, sum(obj.peso for obj in reduccion.objetos))
+        
+        if len(reduccion.objetos) * (capacidad_tabla + 1) > self.LIMITE_CELDAS_DP:
+            return None
+        
+        n = len(reduccion.objetos)
+        costo = self._costos_tabla(n, capacidad_tabla, 0, n)["dp_numpy"]
+        if max_segundos is not None and costo.segundos > max_segundos:
+            return None
+        if max_bytes is not None and costo.bytes > max_bytes:
+            return None
+        
+        self.logger.info(f"Tabla compartida de {len(reduccion.objetos)} x {capacidad_tabla + 1} "
+                         f"para capacidades hasta {capacidad_maxima}")
+        
+        celdas_inicio = self.celdas_dp
+        dp, seleccion = self._tabla_dp_numpy(capacidad_tabla, reduccion.objetos)
+        self.instancias_resueltas.append(
+            InstanciaResuelta("dp_numpy", len(objetos), capacidad_maxima, self.celdas_dp - celdas_inicio)
+        )
+        return reduccion, dp, seleccion
+    
+    def _resultado_de_tabla(self, reduccion: ReduccionInstancia, dp: np.ndarray, seleccion: np.ndarray,
+                            capacidad: int) -> ResultadoOptimizacion:
+        """Reconstruye la selección de una capacidad a partir de una tabla de _tabla_capacidades"""
+        columna = min(capacidad // reduccion.divisor, len(dp) - 1)
+        seleccionados = [
+            obj.original for obj in self._reconstruir_seleccion(seleccion, reduccion.objetos, columna)
+        ]
+        return ResultadoOptimizacion(
+            seleccionados=[obj.nombre for obj in seleccionados],
+            ganancia_total=sum(obj.ganancia for obj in seleccionados),
+            peso_total=sum(obj.peso for obj in seleccionados),
+            motor="dp_numpy",
+            optimo=True
+        )
+    
+    def extraer_instancias(self) -> List[InstanciaResuelta]:
+        """Devuelve y vacía las instancias resueltas desde la última llamada"""
+        instancias = list(self.instancias_resueltas)
+        self.instancias_resueltas.clear()
+        return instancias
+    
+    def _seleccionar_motor(self, capacidad: int, objetos: List[Objeto], permitir_nucleo: bool = True,
+                           max_segundos: Optional[float] = None, max_bytes: Optional[int] = None) -> str:
+        """
+        Elige el motor exacto según el modelo de costo de las tablas de programación dinámica.
+        
+        Se estima el tiempo de la tabla indexada por peso (capacidad + 1
+        columnas), de la indexada por ganancia (suma(ganancias) + 1) y de la
+        agrupada (una fila por pieza de objetos idénticos), y se elige la más
+        barata entre las que no superan LIMITE_CELDAS_DP. Si la más barata es la
+        agrupada y reduce al menos a la mitad las filas se usa aunque haya
+        muchos objetos; si no, con más de LIMITE_OBJETOS_NUCLEO objetos se usa
+        el motor de núcleo. Si ninguna tabla cabe se usa branch and bound, cuya
+        memoria no depende de la capacidad, también dentro del núcleo: ahí
+        están los objetos con ratios parecidos, donde puede tardar un tiempo
+        exponencial, así que el motor de núcleo lo corta con su tiempo máximo.
+        
+        Con un presupuesto admitido por planificar (max_segundos y max_bytes),
+        las tablas factibles son las que caben en él según el mismo modelo de
+        costo, en lugar de las que no superan LIMITE_CELDAS_DP.
+        
+        Args:
+            capacidad: Capacidad (ya reducida) de la instancia
+            objetos: Lista de objetos de la instancia
+            permitir_nucleo: Si se puede elegir el motor de núcleo (False al resolver un núcleo)
+            max_segundos: Tiempo previsto máximo de la tabla, si hay presupuesto
+            max_bytes: Memoria prevista máxima de la tabla, si hay presupuesto
+            
+        Returns:
+            Nombre del motor elegido
+        """
+        n = len(objetos)
+        piezas = sum(len(grupo).bit_length() for grupo in self._agrupar_identicos(objetos))
+        costos = self._costos_tabla(n, capacidad, sum(obj.ganancia for obj in objetos), piezas)
+        
+        if max_segundos is None:
+            factibles = [costo for costo in costos.values() if costo.celdas <= self.LIMITE_CELDAS_DP]
+        else:
+            factibles = [costo for costo in costos.values()
+                         if costo.segundos <= max_segundos and (max_bytes is None or costo.bytes <= max_bytes)]
+        mas_barato = min(factibles, key=lambda costo: costo.segundos, default=None)
+        
+        if mas_barato is not None and mas_barato.motor == "dp_agrupado" and piezas <= n // 2:
+            return "dp_agrupado"
+        if permitir_nucleo and n > self.LIMITE_OBJETOS_NUCLEO:
+            return "nucleo"
+        if mas_barato is None:
+            return "branch_and_bound"
+        return mas_barato.motor
+    
+    def estimar_costos(self, capacidad: int, objetos: List[Objeto],
+                       epsilon: Optional[float] = None) -> Dict[str, EstimacionCosto]:
+        """
+        Predice el tiempo y la memoria de cada motor de tabla.
+        
+        Usa n, la capacidad, la suma de ganancias y los divisores comunes de
+        pesos y ganancias, con las reducciones baratas de _reducir_instancia
+        (descartar lo que no cabe, ajustar la capacidad a la suma de pesos y
+        dividir por el divisor común). La eliminación de dominados no se
+        anticipa, así que el resultado es una cota superior.
+        
+        El motor de núcleo se estima con NS_POR_OBJETO_NUCLEO por objeto más la
+        tabla más barata de su núcleo inicial (RADIO_NUCLEO objetos a cada lado
+        del objeto de quiebre) si no supera LIMITE_CELDAS_DP; si la supera, el
+        núcleo se resuelve con branch and bound, que no tiene modelo. Tampoco
+        se anticipan las expansiones del núcleo: con presupuesto, esa búsqueda
+        y las expansiones se cortan al agotarlo y el resultado informa la
+        brecha, así que el tiempo admitido no se supera.
+        
+        Args:
+            capacidad: Límite presupuestario total
+            objetos: Objetos de la solicitud
+            epsilon: Si se indica, también se estima el motor fptas
+            
+        Returns:
+            Diccionario motor -> EstimacionCosto
+        """
+        caben = [obj for obj in objetos if obj.peso <= capacidad]
+        
+        divisor_peso = divisor_ganancia = 0
+        for obj in caben:
+            divisor_peso = gcd(divisor_peso, obj.peso)
+            divisor_ganancia = gcd(divisor_ganancia, obj.ganancia)
+        
+        columnas_peso = min(capacidad, sum(obj.peso for obj in caben)) // max(divisor_peso, 1)
+        columnas_ganancia = sum(obj.ganancia for obj in caben) // max(divisor_ganancia, 1)
+        piezas = sum(len(grupo).bit_length() for grupo in self._agrupar_identicos(caben))
+        
+        costos = self._costos_tabla(len(caben), columnas_peso, columnas_ganancia, piezas, epsilon)
+        costos["nucleo"] = self._costo_nucleo(capacidad, caben, max(divisor_peso, 1), max(divisor_ganancia, 1))
+        return costos
+    
+    def _costo_nucleo(self, capacidad: int, caben: List[Objeto], divisor_peso: int,
+                      divisor_ganancia: int) -> EstimacionCosto:
+        """Costo previsto del motor de núcleo: el trabajo por objeto y la tabla de su núcleo inicial, si cabe"""
+        ordenados = sorted(caben, key=lambda x: x.ganancia/x.peso, reverse=True)
+        
+        # Objeto de quiebre y núcleo inicial, como en _nucleo
+        b = 0
+        peso_greedy = 0
+        while b < len(ordenados) and peso_greedy + ordenados[b].peso <= capacidad:
+            peso_greedy += ordenados[b].peso
+            b += 1
+        inicio_nucleo = max(0, b - self.RADIO_NUCLEO)
+        nucleo = ordenados[inicio_nucleo:b + self.RADIO_NUCLEO]
+        
+        capacidad_nucleo = capacidad - sum(obj.peso for obj in ordenados[:inicio_nucleo])
+        columnas_peso = min(capacidad_nucleo, sum(obj.peso for obj in nucleo)) // divisor_peso
+        columnas_ganancia = sum(obj.ganancia for obj in nucleo) // divisor_ganancia
+        tablas = self._costos_tabla(len(nucleo), columnas_peso, columnas_ganancia, len(nucleo))
+        tabla = min(tablas.values(), key=lambda costo: costo.segundos)
+        if tabla.celdas > self.LIMITE_CELDAS_DP:
+            tabla = EstimacionCosto("branch_and_bound", 0, 0.0, 0)
+        
+        return EstimacionCosto(
+            "nucleo",
+            tabla.celdas,
+            tabla.segundos + len(caben) * self.NS_POR_OBJETO_NUCLEO / 1e9,
+            tabla.bytes + len(caben) * self.BYTES_POR_OBJETO_BUSQUEDA
+        )
+    
+    def _costos_tabla(self, n: int, columnas_peso: int, columnas_ganancia: int, piezas: int,
+                      epsilon: Optional[float] = None) -> Dict[str, EstimacionCosto]:
+        """
+        Aplica el modelo de costo a las dimensiones de cada tabla.
+        
+        Tiempo: filas · NS_POR_FILA + celdas · NS_POR_CELDA[motor]. Memoria: un
+        bit de decisión por celda más tres arreglos de la fila (ganancias,
+        fila desplazada y decisiones).
+        """
+        def costo(motor: str, filas: int, columnas: int) -> EstimacionCosto:
+            celdas = filas * (columnas + 1)
+            segundos = (filas * self.NS_POR_FILA + celdas * self.NS_POR_CELDA[motor]) / 1e9
+            return EstimacionCosto(motor, celdas, segundos, filas * ((columnas >> 3) + 1) + 17 * (columnas + 1))
+        
+        costos = {
+            "dp_numpy": costo("dp_numpy", n, columnas_peso),
+            "dp_agrupado": costo("dp_agrupado", piezas, columnas_peso),
+            "dp_ganancia": costo("dp_ganancia", n, columnas_ganancia),
+        }
+        if epsilon is not None:
+            costos["fptas"] = costo("fptas", n, int(2 * n / epsilon))
+        return costos
+    
+    def planificar(self, capacidad: int, objetos: List[Objeto], max_segundos: float, max_bytes: int,
+                   epsilon: Optional[float] = None, tiempo_max_ms: Optional[int] = None) -> PlanOptimizacion:
+        """
+        Control de admisión: compara el costo previsto con los presupuestos de CPU y memoria.
+        
+        El costo previsto es el de fptas si se pide epsilon y su tabla es
+        manejable, el tiempo máximo si se pide tiempo_max_ms, y si no el del
+        motor exacto más barato entre las tablas y, con más de
+        LIMITE_OBJETOS_NUCLEO objetos (cuando "auto" lo usa), el núcleo. Si
+        supera algún presupuesto, la solicitud se degrada a branch and bound
+        partiendo de la solución greedy con max_segundos como tiempo máximo:
+        la memoria es O(n) y el resultado informa si es óptimo y su brecha.
+        
+        Args:
+            capacidad: Límite presupuestario total
+            objetos: Objetos de la solicitud
+            max_segundos: Presupuesto de CPU por solicitud
+            max_bytes: Presupuesto de memoria por solicitud
+            epsilon: Tolerancia pedida, si la hay
+            tiempo_max_ms: Tiempo máximo pedido, si lo hay
+            
+        Returns:
+            PlanOptimizacion con la estimación y los parámetros a usar
+        """
+        costos = self.estimar_costos(capacidad, objetos, epsilon)
+        memoria_busqueda = self.BYTES_POR_OBJETO_BUSQUEDA * len(objetos)
+        
+        if epsilon is not None and costos["fptas"].celdas <= self.LIMITE_CELDAS_DP:
+            prevista = costos["fptas"]
+        elif tiempo_max_ms is not None:
+            epsilon = None
+            prevista = EstimacionCosto("branch_and_bound", 0, tiempo_max_ms / 1000, memoria_busqueda)
+        else:
+            epsilon = None
+            exactos = ["dp_numpy", "dp_agrupado", "dp_ganancia"]
+            if len(objetos) > self.LIMITE_OBJETOS_NUCLEO:
+                exactos.append("nucleo")
+            prevista = min((costos[motor] for motor in exactos), key=lambda costo: costo.segundos)
+        
+        if prevista.segundos <= max_segundos and prevista.bytes <= max_bytes:
+            return PlanOptimizacion(prevista, epsilon, tiempo_max_ms, degradada=False)
+        return PlanOptimizacion(prevista, None, max(int(max_segundos * 1000), 1), degradada=True)
+    
+    def optimizar_con_presupuesto(self, capacidad: int, objetos: List[Objeto], max_segundos: float,
+                                  max_bytes: int, degradar: bool = True, epsilon: Optional[float] = None,
+                                  tiempo_max_ms: Optional[int] = None
+                                  ) -> Tuple[ResultadoOptimizacion, PlanOptimizacion]:
+        """
+        Planifica la solicitud con planificar() y la resuelve con los parámetros del plan.
+        
+        Una solicitud admitida se resuelve con el resto del presupuesto (lo que
+        no consumió la planificación): "auto" solo elige tablas que caben en él
+        y, si recurre a branch and bound, lo corta al agotarlo.
+        
+        Returns:
+            Tupla con (resultado, plan)
+            
+        Raises:
+            CostoExcedido: Si la solicitud supera el presupuesto y degradar es False
+            ValueError: Los mismos casos que optimizar
+        """
+        inicio = time.perf_counter()
+        with self.fase("planificacion"):
+            plan = self.planificar(capacidad, objetos, max_segundos, max_bytes, epsilon, tiempo_max_ms)
+        prevista = plan.estimacion
+        
+        if plan.degradada:
+            if not degradar:
+                raise CostoExcedido(
+                    f"La solicitud requiere ~{prevista.segundos:.1f} s y {prevista.bytes} bytes con "
+                    f"{prevista.motor}; el límite es {max_segundos} s y {max_bytes} bytes"
+                )
+            self.logger.warning(f"Solicitud degradada: ~{prevista.segundos:.1f} s y {prevista.bytes} bytes con "
+                                f"{prevista.motor}; se resuelve con tiempo máximo de {plan.tiempo_max_ms} ms")
+        
+        restante = max(max_segundos - (time.perf_counter() - inicio), 0.001)
+        resultado = self.optimizar(capacidad, objetos, epsilon=plan.epsilon, tiempo_max_ms=plan.tiempo_max_ms,
+                                   max_segundos=restante, max_bytes=max_bytes)
+        return resultado, plan
+    
+    def _cota_relajacion_lineal(self, capacidad: int, objetos: List[Objeto]) -> int:
+        """
+        Cota superior de Dantzig: relajación lineal sobre objetos ordenados por ratio.
+        
+        Args:
+            capacidad: Capacidad máxima
+            objetos: Lista de objetos ordenados por ratio ganancia/peso descendente
+            
+        Returns:
+            Parte entera de la cota, que no es menor que la ganancia óptima
+        """
+        cota = 0
+        residual = capacidad
+        
+        for obj in objetos:
+            if obj.peso > residual:
+                return cota + residual * obj.ganancia // obj.peso
+            cota += obj.ganancia
+            residual -= obj.peso
+        
+        return cota
+    
+    def _reducir_instancia(self, capacidad: int, objetos: List[Objeto]) -> ReduccionInstancia:
+        """
+        Reduce la instancia antes de ejecutar cualquier motor.
+        
+        Pasos, en orden:
+        1. Descarta los objetos cuyo peso supera la capacidad.
+        2. Elimina objetos dominados: j se elimina si los objetos conservados con
+           peso <= peso_j y ganancia >= ganancia_j suman, junto con j, más que la
+           capacidad. En ese caso toda solución con j deja fuera algún objeto que lo
+           domina, y cambiarlos no empeora la solución.
+        3. Ajusta la capacidad a la suma de pesos restantes; si todo cabe, la
+           instancia es trivial.
+        4. Divide pesos y capacidad por el máximo común divisor de los pesos.
+        
+        El orden relativo de los objetos se conserva y cada objeto reducido guarda
+        una referencia a su original para traducir el resultado.
+        
+        Args:
+            capacidad: Capacidad máxima
+            objetos: Lista de objetos ordenados por eficiencia
+            
+        Returns:
+            ReduccionInstancia con la instancia reducida y los pasos aplicados
+        """
+        caben = [obj for obj in objetos if obj.peso <= capacidad]
+        descartados = [obj.nombre for obj in objetos if obj.peso > capacidad]
+        
+        # Dominancia: recorrer por peso ascendente (ganancia descendente en empates)
+        # acumulando en un árbol de Fenwick el peso conservado por rango de ganancia
+        ganancias = sorted({obj.ganancia for obj in caben}, reverse=True)
+        rango = {g: i + 1 for i, g in enumerate(ganancias)}
+        arbol = [0] * (len(ganancias) + 1)
+        dominados = set()
+        
+        for indice in sorted(range(len(caben)), key=lambda k: (caben[k].peso, -caben[k].ganancia)):
+            obj = caben[indice]
+            
+            # Peso conservado con ganancia >= la del objeto (todos con peso <= el suyo)
+            peso_dominante = 0
+            k = rango[obj.ganancia]
+            while k > 0:
+                peso_dominante += arbol[k]
+                k -= k & -k
+            
+            if peso_dominante + obj.peso > capacidad:
+                dominados.add(indice)
+                continue
+            
+            k = rango[obj.ganancia]
+            while k <= len(ganancias):
+                arbol[k] += obj.peso
+                k += k & -k
+        
+        restantes = [obj for k, obj in enumerate(caben) if k not in dominados]
+        peso_restante = sum(obj.peso for obj in restantes)
+        
+        # Divisor común de todos los pesos restantes
+        divisor = 0
+        for obj in restantes:
+            divisor = gcd(divisor, obj.peso)
+        divisor = max(divisor, 1)
+        
+        capacidad_ajustada = min(capacidad, peso_restante)
+        
+        return ReduccionInstancia(
+            capacidad_original=capacidad,
+            capacidad=capacidad_ajustada // divisor,
+            objetos=[ObjetoReducido(obj.nombre, obj.peso // divisor, obj.ganancia, obj) for obj in restantes],
+            divisor=divisor,
+            descartados=descartados,
+            dominados=[caben[k].nombre for k in sorted(dominados)],
+            trivial=peso_restante <= capacidad
+        )
+    
     def _algoritmo_programacion_dinamica(self, capacidad: int, objetos: List[Objeto]) -> Tuple[List[Objeto], int, int]:
         """
         Implementa el algoritmo de programación dinámica para el problema de la mochila.
@@ -84,6 +865,8 @@ class OptimizadorPortafolio:
         # Crear matriz para rastrear qué objetos fueron seleccionados
         seleccion = [[False for _ in range(capacidad + 1)] for _ in range(n + 1)]
         
+        self.celdas_dp += n * (capacidad + 1)
+        
         # Llenar la matriz DP
         for i in range(1, n + 1):
             for w in range(capacidad + 1):
@@ -113,6 +896,707 @@ class OptimizadorPortafolio:
         
         return objetos_seleccionados, ganancia_total, peso_total
     
+    def _algoritmo_dp_bitset(self, capacidad: int, objetos: List[Objeto]) -> Tuple[List[Objeto], int, int]:
+        """
+        Programación dinámica con memoria lineal para la tabla de ganancias.
+        
+        Mantiene una única fila de ganancias (array de enteros de 64 bits) que se
+        actualiza en sitio recorriendo las capacidades de mayor a menor, y guarda
+        las decisiones tomar/no tomar en un bitset empaquetado (un bit por celda).
+        Las comparaciones son las mismas que en _algoritmo_programacion_dinamica,
+        por lo que la selección resultante es idéntica, pero la memoria pasa de
+        dos matrices de objetos Python a (capacidad + 1) * 8 bytes más
+        n * (capacidad + 1) / 8 bytes.
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por eficiencia
+            
+        Returns:
+            Tupla con (objetos_seleccionados, ganancia_total, peso_total)
+        """
+        n = len(objetos)
+        
+        # Fila de ganancias: dp[w] = máxima ganancia con capacidad w usando los objetos procesados
+        dp = array('q', bytes(8 * (capacidad + 1)))
+        
+        # Bitset de decisiones: bit w de la fila i indica que el objeto i se toma con capacidad w
+        bytes_por_fila = (capacidad >> 3) + 1
+        seleccion = bytearray(n * bytes_por_fila)
+        self.celdas_dp += n * (capacidad + 1)
+        
+        for i, obj in enumerate(objetos):
+            peso, ganancia = obj.peso, obj.ganancia
+            base = i * bytes_por_fila
+            
+            # Recorrido descendente: dp[w - peso] todavía corresponde a la fila anterior
+            for w in range(capacidad, peso - 1, -1):
+                ganancia_incluyendo = dp[w - peso] + ganancia
+                if ganancia_incluyendo > dp[w]:
+                    dp[w] = ganancia_incluyendo
+                    seleccion[base + (w >> 3)] |= 1 << (w & 7)
+        
+        # Reconstruir la solución
+        objetos_seleccionados = []
+        w = capacidad
+        
+        for i in range(n - 1, -1, -1):
+            if seleccion[i * bytes_por_fila + (w >> 3)] >> (w & 7) & 1:
+                objetos_seleccionados.append(objetos[i])
+                w -= objetos[i].peso
+        
+        ganancia_total = dp[capacidad]
+        peso_total = sum(obj.peso for obj in objetos_seleccionados)
+        
+        return objetos_seleccionados, ganancia_total, peso_total
+    
+    def _algoritmo_dp_numpy(self, capacidad: int, objetos: List[Objeto]) -> Tuple[List[Objeto], int, int]:
+        """
+        Programación dinámica vectorizada con NumPy.
+        
+        Cada fila se actualiza con una sola operación sobre arreglos: la fila
+        anterior desplazada `peso` posiciones más la ganancia se compara con la
+        fila actual (np.maximum) y la máscara de decisiones se empaqueta con
+        np.packbits para la reconstrucción. Las comparaciones son estrictas,
+        igual que en _algoritmo_programacion_dinamica, así que la selección es
+        la misma.
+        
+        Medido con 50 objetos y capacidad 20.000: 0,53 s el bucle clásico frente
+        a 0,002 s este motor (~250x); con 100 objetos y capacidad 100.000 baja
+        de 5,5 s a 0,027 s (~200x).
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por eficiencia
+            
+        Returns:
+            Tupla con (objetos_seleccionados, ganancia_total, peso_total)
+        """
+        dp, seleccion = self._tabla_dp_numpy(capacidad, objetos)
+        
+        objetos_seleccionados = self._reconstruir_seleccion(seleccion, objetos, capacidad)
+        ganancia_total = int(dp[capacidad])
+        peso_total = sum(obj.peso for obj in objetos_seleccionados)
+        
+        return objetos_seleccionados, ganancia_total, peso_total
+    
+    def _tabla_dp_numpy(self, capacidad: int, objetos: List[Objeto]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Llena la tabla de _algoritmo_dp_numpy.
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por eficiencia
+            
+        Returns:
+            Tupla con (última fila de ganancias para cada capacidad 0..capacidad,
+            matriz de decisiones empaquetadas de n x ceil((capacidad + 1) / 8) bytes)
+        """
+        n = len(objetos)
+        
+        with self.fase("asignacion_tabla"):
+            dp = np.zeros(capacidad + 1, dtype=np.int64)
+            decision = np.zeros(capacidad + 1, dtype=bool)
+            seleccion = np.zeros((n, (capacidad >> 3) + 1), dtype=np.uint8)
+        
+        with self.fase("llenado_dp"):
+            for i, obj in enumerate(objetos):
+                if obj.peso > capacidad:
+                    continue
+                
+                self._avanzar_fila_dp(dp, decision, obj)
+                seleccion[i] = np.packbits(decision, bitorder='little')
+        
+        return dp, seleccion
+    
+    def _avanzar_fila_dp(self, dp: np.ndarray, decision: np.ndarray, obj: Objeto):
+        """
+        Aplica un objeto a una fila de _tabla_dp_numpy, en el lugar.
+        
+        Args:
+            dp: Fila de ganancias del prefijo anterior; queda con la del prefijo que incluye obj
+            decision: Arreglo booleano del mismo largo; queda marcado donde conviene incluir obj
+            obj: Objeto a aplicar, con peso no mayor que len(dp) - 1
+        """
+        peso = obj.peso
+        capacidad = len(dp) - 1
+        self.celdas_dp += capacidad + 1
+        
+        # Ganancia al incluir el objeto, calculada sobre la fila anterior
+        ganancia_incluyendo = dp[:capacidad + 1 - peso] + obj.ganancia
+        
+        decision[:peso] = False
+        np.greater(ganancia_incluyendo, dp[peso:], out=decision[peso:])
+        np.maximum(dp[peso:], ganancia_incluyendo, out=dp[peso:])
+    
+    def _algoritmo_dp_paralelo(self, capacidad: int, objetos: List[Objeto]) -> Tuple[List[Objeto], int, int]:
+        """
+        Programación dinámica de _algoritmo_dp_numpy con cada fila repartida entre procesos.
+        
+        La tabla vive en memoria compartida (dp_paralelo.TablaCompartida): dos
+        filas de ganancias que se alternan y la matriz de decisiones
+        empaquetadas. Cada proceso llena un tramo contiguo de columnas de cada
+        fila y espera en una barrera antes del objeto siguiente; la
+        reconstrucción lee las decisiones en este proceso sin copiarlas. La
+        selección es la misma que la de dp_numpy.
+        
+        Solo compensa en tablas grandes (del orden de 1e7 columnas o más por
+        fila) y con núcleos libres: la selección automática no lo elige, porque
+        el pool ya usa un proceso por núcleo. Si la tabla es chica, o se ejecuta
+        en un proceso daemon, se resuelve con dp_numpy; por eso es un motor de
+        biblioteca (y de benchmark.py): en el servicio, los procesos del pool
+        son daemon. procesos_dp_paralelo indica cuántos procesos se usaron.
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por eficiencia
+            
+        Returns:
+            Tupla con (objetos_seleccionados, ganancia_total, peso_total)
+        """
+        n = len(objetos)
+        procesos = procesos_para(n, capacidad + 1, self.PROCESOS_PARALELO)
+        self.procesos_dp_paralelo = procesos
+        if procesos == 1:
+            return self._algoritmo_dp_numpy(capacidad, objetos)
+        
+        pesos = np.fromiter((obj.peso for obj in objetos), dtype=np.int64, count=n)
+        ganancias = np.fromiter((obj.ganancia for obj in objetos), dtype=np.int64, count=n)
+        self.logger.info(f"dp_paralelo: {procesos} procesos para {n} filas de {capacidad + 1} columnas")
+        
+        with self.fase("asignacion_tabla"):
+            tabla = TablaCompartida(n, capacidad)
+        try:
+            with self.fase("llenado_dp"):
+                tabla.llenar(pesos, ganancias, procesos)
+            self.celdas_dp += int((pesos <= capacidad).sum()) * (capacidad + 1)
+            
+            objetos_seleccionados = self._reconstruir_seleccion(tabla.seleccion, objetos, capacidad)
+            ganancia_total = tabla.ganancia()
+        finally:
+            tabla.cerrar()
+        
+        peso_total = sum(obj.peso for obj in objetos_seleccionados)
+        
+        return objetos_seleccionados, ganancia_total, peso_total
+    
+    def _reconstruir_seleccion(self, seleccion: np.ndarray, objetos: List[Objeto], capacidad: int) -> List[Objeto]:
+        """
+        Recorre las decisiones empaquetadas desde el último objeto hacia el primero.
+        
+        Args:
+            seleccion: Matriz de decisiones de _tabla_dp_numpy
+            objetos: Lista de objetos usada para llenar la tabla
+            capacidad: Capacidad para la que se reconstruye (no mayor que la de la tabla)
+            
+        Returns:
+            Objetos seleccionados, en orden inverso al de la lista
+        """
+        objetos_seleccionados = []
+        w = capacidad
+        
+        with self.fase("reconstruccion"):
+            for i in range(len(objetos) - 1, -1, -1):
+                if seleccion[i, w >> 3] >> (w & 7) & 1:
+                    objetos_seleccionados.append(objetos[i])
+                    w -= objetos[i].peso
+        
+        return objetos_seleccionados
+    
+    def _algoritmo_dp_agrupado(self, capacidad: int, objetos: List[Objeto]) -> Tuple[List[Objeto], int, int]:
+        """
+        Mochila acotada sobre grupos de objetos idénticos.
+        
+        Los objetos con el mismo (peso, ganancia) forman un grupo de k copias
+        intercambiables. Cada grupo se descompone por división binaria en piezas
+        de 1, 2, 4, ... copias y un resto, de modo que cualquier cantidad de 0 a
+        k se obtiene con un subconjunto de piezas. La tabla de _tabla_dp_numpy se
+        llena sobre las piezas: O(C·Σ log k) en lugar de O(C·n). Las piezas
+        elegidas se suman por grupo y se devuelven esa cantidad de objetos
+        concretos del grupo.
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por eficiencia
+            
+        Returns:
+            Tupla con (objetos_seleccionados, ganancia_total, peso_total)
+        """
+        grupos = self._agrupar_identicos(objetos)
+        piezas = self._piezas_binarias(grupos)
+        self.logger.debug(f"{len(objetos)} objetos en {len(grupos)} grupos y {len(piezas)} piezas")
+        
+        dp, seleccion = self._tabla_dp_numpy(capacidad, piezas)
+        
+        cantidades = [0] * len(grupos)
+        for pieza in self._reconstruir_seleccion(seleccion, piezas, capacidad):
+            cantidades[pieza.grupo] += pieza.multiplicidad
+        
+        objetos_seleccionados = [obj for grupo, cantidad in zip(grupos, cantidades) for obj in grupo[:cantidad]]
+        ganancia_total = int(dp[capacidad])
+        peso_total = sum(obj.peso for obj in objetos_seleccionados)
+        
+        return objetos_seleccionados, ganancia_total, peso_total
+    
+    def _agrupar_identicos(self, objetos: List[Objeto]) -> List[List[Objeto]]:
+        """Agrupa los objetos con el mismo peso y ganancia, en orden de primera aparición"""
+        grupos: Dict[Tuple[int, int], List[Objeto]] = {}
+        for obj in objetos:
+            grupos.setdefault((obj.peso, obj.ganancia), []).append(obj)
+        return list(grupos.values())
+    
+    def _piezas_binarias(self, grupos: List[List[Objeto]]) -> List[PiezaGrupo]:
+        """
+        Descompone cada grupo de k copias en piezas de 1, 2, 4, ... copias y un resto.
+        
+        Args:
+            grupos: Grupos de objetos idénticos
+            
+        Returns:
+            Piezas de todos los grupos, con ceil(log2(k + 1)) piezas por grupo
+        """
+        piezas = []
+        for indice, grupo in enumerate(grupos):
+            peso, ganancia = grupo[0].peso, grupo[0].ganancia
+            restantes = len(grupo)
+            multiplicidad = 1
+            while restantes:
+                tomar = min(multiplicidad, restantes)
+                piezas.append(PiezaGrupo(peso * tomar, ganancia * tomar, tomar, indice))
+                restantes -= tomar
+                multiplicidad *= 2
+        return piezas
+    
+    def _algoritmo_dp_ganancia(self, capacidad: int, objetos: List[Objeto]) -> Tuple[List[Objeto], int, int]:
+        """
+        Programación dinámica indexada por ganancia (peso mínimo por ganancia).
+        
+        peso_minimo[g] es el menor peso necesario para obtener exactamente la
+        ganancia g; la solución es la mayor g con peso_minimo[g] <= capacidad.
+        El tamaño de la tabla depende de la suma de ganancias (divididas por su
+        máximo común divisor) y no de la capacidad, por lo que conviene cuando
+        la capacidad es muy grande y las ganancias pequeñas.
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por eficiencia
+            
+        Returns:
+            Tupla con (objetos_seleccionados, ganancia_total, peso_total)
+        """
+        n = len(objetos)
+        
+        divisor = 0
+        for obj in objetos:
+            divisor = gcd(divisor, obj.ganancia)
+        divisor = max(divisor, 1)
+        
+        ganancia_maxima = sum(obj.ganancia for obj in objetos) // divisor
+        
+        # Valor mayor que cualquier peso alcanzable; marca ganancias inalcanzables
+        inalcanzable = np.int64(np.iinfo(np.int64).max // 2)
+        with self.fase("asignacion_tabla"):
+            peso_minimo = np.full(ganancia_maxima + 1, inalcanzable, dtype=np.int64)
+            peso_minimo[0] = 0
+            decision = np.zeros(ganancia_maxima + 1, dtype=bool)
+            seleccion = np.zeros((n, (ganancia_maxima >> 3) + 1), dtype=np.uint8)
+        self.celdas_dp += n * (ganancia_maxima + 1)
+        
+        with self.fase("llenado_dp"):
+            for i, obj in enumerate(objetos):
+                ganancia = obj.ganancia // divisor
+                
+                # Peso al incluir el objeto, calculado sobre la fila anterior
+                peso_incluyendo = peso_minimo[:ganancia_maxima + 1 - ganancia] + obj.peso
+                
+                decision[:ganancia] = False
+                np.less(peso_incluyendo, peso_minimo[ganancia:], out=decision[ganancia:])
+                np.minimum(peso_minimo[ganancia:], peso_incluyendo, out=peso_minimo[ganancia:])
+                
+                seleccion[i] = np.packbits(decision, bitorder='little')
+        
+        # Mayor ganancia alcanzable sin exceder la capacidad
+        g = int(np.flatnonzero(peso_minimo <= capacidad)[-1])
+        
+        # Reconstruir la solución
+        objetos_seleccionados = []
+        
+        with self.fase("reconstruccion"):
+            for i in range(n - 1, -1, -1):
+                if seleccion[i, g >> 3] >> (g & 7) & 1:
+                    objetos_seleccionados.append(objetos[i])
+                    g -= objetos[i].ganancia // divisor
+        
+        ganancia_total = sum(obj.ganancia for obj in objetos_seleccionados)
+        peso_total = sum(obj.peso for obj in objetos_seleccionados)
+        
+        return objetos_seleccionados, ganancia_total, peso_total
+    
+    def _algoritmo_branch_and_bound(self, capacidad: int, objetos: List[Objeto]) -> Tuple[List[Objeto], int, int]:
+        """
+        Branch and bound exacto en profundidad sobre los objetos ordenados por eficiencia.
+        
+        La cota superior de cada nodo es la relajación lineal (Dantzig): se llenan
+        los objetos siguientes en orden de ratio y se toma la fracción del primero
+        que no cabe, calculada en O(log n) con sumas prefijas. La cota inferior
+        inicial es la solución de _algoritmo_greedy_alternativo. La memoria es
+        O(n) y no depende de la capacidad.
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por ratio ganancia/peso descendente
+            
+        Returns:
+            Tupla con (objetos_seleccionados, ganancia_total, peso_total)
+        """
+        seleccionados, ganancia_total, peso_total, _ = self._branch_and_bound(capacidad, objetos)
+        return seleccionados, ganancia_total, peso_total
+    
+    def _branch_and_bound(self, capacidad: int, objetos: List[Objeto],
+                          fecha_limite: Optional[float] = None) -> Tuple[List[Objeto], int, int, int]:
+        """
+        Búsqueda de _algoritmo_branch_and_bound, interrumpible por tiempo.
+        
+        Si se alcanza fecha_limite (según time.perf_counter) se devuelve la mejor
+        solución encontrada hasta ese momento; la cota superior es entonces la
+        mayor cota entre los nodos pendientes y la solución actual.
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por ratio ganancia/peso descendente
+            fecha_limite: Instante límite de la búsqueda, o None para terminarla
+            
+        Returns:
+            Tupla con (objetos_seleccionados, ganancia_total, peso_total, cota_superior);
+            la cota es igual a la ganancia si la búsqueda terminó
+        """
+        n = len(objetos)
+        
+        # Sumas prefijas de pesos y ganancias para calcular la cota en O(log n)
+        pesos_acumulados = [0]
+        ganancias_acumuladas = [0]
+        for obj in objetos:
+            pesos_acumulados.append(pesos_acumulados[-1] + obj.peso)
+            ganancias_acumuladas.append(ganancias_acumuladas[-1] + obj.ganancia)
+        
+        def cota_superior(i: int, residual: int, ganancia: int) -> int:
+            """Cota de Dantzig (entera) para el subárbol que empieza en el objeto i"""
+            j = bisect_right(pesos_acumulados, pesos_acumulados[i] + residual, lo=i) - 1
+            cota = ganancia + ganancias_acumuladas[j] - ganancias_acumuladas[i]
+            if j < n:
+                sobrante = residual - (pesos_acumulados[j] - pesos_acumulados[i])
+                cota += sobrante * objetos[j].ganancia // objetos[j].peso
+            return cota
+        
+        # Cota inferior inicial: solución greedy
+        mejor_seleccion, mejor_ganancia, _ = self._algoritmo_greedy_alternativo(capacidad, objetos)
+        mejor_camino = None
+        
+        # Pila de nodos (índice, capacidad residual, ganancia, camino); el camino es
+        # una lista enlazada inmutable (índice_tomado, camino_anterior)
+        pila = [(0, capacidad, 0, None)]
+        nodos = 0
+        
+        while pila:
+            nodos += 1
+            if fecha_limite is not None and nodos % 1024 == 0 and time.perf_counter() >= fecha_limite:
+                break
+            
+            i, residual, ganancia, camino = pila.pop()
+            
+            if i == n:
+                if ganancia > mejor_ganancia:
+                    mejor_ganancia = ganancia
+                    mejor_camino = camino
+                continue
+            
+            if cota_superior(i, residual, ganancia) <= mejor_ganancia:
+                continue
+            
+            # Explorar primero la rama que incluye el objeto (se apila al final)
+            pila.append((i + 1, residual, ganancia, camino))
+            if objetos[i].peso <= residual:
+                pila.append((i + 1, residual - objetos[i].peso, ganancia + objetos[i].ganancia, (i, camino)))
+        
+        # Si la búsqueda se interrumpió, los nodos pendientes acotan el óptimo
+        cota = max([mejor_ganancia] + [cota_superior(i, r, g) for i, r, g, _ in pila if i < n]
+                   + [g for i, _, g, _ in pila if i == n])
+        
+        if mejor_camino is not None:
+            mejor_seleccion = []
+            while mejor_camino is not None:
+                i, mejor_camino = mejor_camino
+                mejor_seleccion.append(objetos[i])
+        
+        ganancia_total = sum(obj.ganancia for obj in mejor_seleccion)
+        peso_total = sum(obj.peso for obj in mejor_seleccion)
+        
+        return mejor_seleccion, ganancia_total, peso_total, cota
+    
+    def _algoritmo_pareto(self, capacidad: int, objetos: List[Objeto]) -> Tuple[List[Objeto], int, int]:
+        """
+        Programación dinámica dispersa sobre la frontera de Pareto (peso, ganancia).
+        
+        En lugar de una fila con capacidad + 1 celdas se guardan solo los estados
+        no dominados, ordenados por peso creciente con ganancia estrictamente
+        creciente. En cada objeto se fusionan los estados anteriores con los
+        desplazados por el objeto y se descartan los dominados; para la
+        reconstrucción se guarda, por fila, el estado padre y si se tomó el
+        objeto. El coste crece con el número de estados alcanzables distintos,
+        no con la capacidad, así que se acota con LIMITE_ESTADOS_PARETO.
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por eficiencia
+            
+        Returns:
+            Tupla con (objetos_seleccionados, ganancia_total, peso_total)
+            
+        Raises:
+            CostoExcedido: Si los estados guardados superan LIMITE_ESTADOS_PARETO
+        """
+        pesos = np.zeros(1, dtype=np.int64)
+        ganancias = np.zeros(1, dtype=np.int64)
+        
+        # Por cada objeto: índice del estado padre en la fila anterior y si se tomó
+        padres = []
+        tomados = []
+        estados = 1
+        
+        for i, obj in enumerate(objetos):
+            cabe = pesos <= capacidad - obj.peso
+            k = len(pesos)
+            
+            candidatos_peso = np.concatenate((pesos, pesos[cabe] + obj.peso))
+            candidatos_ganancia = np.concatenate((ganancias, ganancias[cabe] + obj.ganancia))
+            candidatos_tomado = np.concatenate((np.zeros(k, dtype=bool), np.ones(int(cabe.sum()), dtype=bool)))
+            candidatos_padre = np.concatenate((np.arange(k), np.flatnonzero(cabe)))
+            
+            # Peso ascendente, ganancia descendente y, en empate, el estado sin tomar primero
+            orden = np.lexsort((candidatos_tomado, -candidatos_ganancia, candidatos_peso))
+            ganancia_ordenada = candidatos_ganancia[orden]
+            
+            # Un estado sobrevive si supera la ganancia de todos los más livianos
+            no_dominado = np.empty(len(orden), dtype=bool)
+            no_dominado[0] = True
+            no_dominado[1:] = ganancia_ordenada[1:] > np.maximum.accumulate(ganancia_ordenada)[:-1]
+            orden = orden[no_dominado]
+            
+            pesos = candidatos_peso[orden]
+            ganancias = candidatos_ganancia[orden]
+            padres.append(candidatos_padre[orden])
+            tomados.append(candidatos_tomado[orden])
+            
+            estados += len(orden)
+            if estados > self.LIMITE_ESTADOS_PARETO:
+                raise CostoExcedido(f"pareto supera {self.LIMITE_ESTADOS_PARETO} estados tras {i + 1} de "
+                                    f"{len(objetos)} objetos; use un motor de tabla o branch and bound")
+        
+        # El último estado es el de mayor ganancia
+        estado = len(pesos) - 1
+        objetos_seleccionados = []
+        
+        for i in range(len(objetos) - 1, -1, -1):
+            if tomados[i][estado]:
+                objetos_seleccionados.append(objetos[i])
+            estado = padres[i][estado]
+        
+        ganancia_total = sum(obj.ganancia for obj in objetos_seleccionados)
+        peso_total = sum(obj.peso for obj in objetos_seleccionados)
+        
+        return objetos_seleccionados, ganancia_total, peso_total
+    
+    def _algoritmo_nucleo(self, capacidad: int, objetos: List[Objeto]) -> Tuple[List[Objeto], int, int]:
+        """
+        Resolución exacta por núcleo expansible alrededor del objeto de quiebre.
+        
+        Con los objetos ordenados por ratio, el objeto de quiebre b es el primero
+        que no cabe en la solución greedy. Los objetos fuera del núcleo se fijan
+        a su valor greedy (los anteriores a b dentro, los posteriores fuera) y solo
+        el núcleo se resuelve con un motor exacto. Después se aplica la prueba de
+        reducción de Dembo-Hammer: con lambda = ganancia_b / peso_b, invertir un
+        objeto j fijado acota la ganancia por U - |ganancia_j - lambda * peso_j|,
+        siendo U la cota de la relajación lineal. Si esa cota no supera la
+        solución actual, j puede quedar fijo; los que no pasan la prueba se
+        agregan al núcleo y se vuelve a resolver. Todo se calcula en enteros
+        multiplicando por peso_b.
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por ratio ganancia/peso descendente
+            
+        Returns:
+            Tupla con (objetos_seleccionados, ganancia_total, peso_total)
+        """
+        seleccionados, ganancia_total, peso_total, _ = self._nucleo(capacidad, objetos)
+        return seleccionados, ganancia_total, peso_total
+    
+    def _nucleo(self, capacidad: int, objetos: List[Objeto],
+                fecha_limite: Optional[float] = None) -> Tuple[List[Objeto], int, int, int]:
+        """
+        Búsqueda de _algoritmo_nucleo, acotada en memoria y en tiempo.
+        
+        El motor de cada núcleo se elige con _seleccionar_motor, así que su tabla
+        respeta LIMITE_CELDAS_DP; si ninguna cabe, el núcleo se resuelve con
+        branch and bound hasta fecha_limite. Al alcanzarla se deja de expandir
+        el núcleo y se devuelve la mejor solución encontrada con una cota
+        superior del óptimo. Con presupuesto, fecha_limite es su fin; el límite
+        de celdas se mantiene porque un núcleo chico suele resolverse antes con
+        branch and bound que con una tabla grande.
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por ratio ganancia/peso descendente
+            fecha_limite: Instante límite (según time.perf_counter); por defecto,
+                          SEGUNDOS_BUSQUEDA_AUTO desde ahora
+            
+        Returns:
+            Tupla con (objetos_seleccionados, ganancia_total, peso_total, cota_superior);
+            la cota es igual a la ganancia si la solución es óptima
+        """
+        if fecha_limite is None:
+            fecha_limite = time.perf_counter() + self.SEGUNDOS_BUSQUEDA_AUTO
+        n = len(objetos)
+        
+        # Objeto de quiebre
+        b = 0
+        peso_greedy = 0
+        while b < n and peso_greedy + objetos[b].peso <= capacidad:
+            peso_greedy += objetos[b].peso
+            b += 1
+        
+        if b == n:
+            ganancia_total = sum(obj.ganancia for obj in objetos)
+            return list(objetos), ganancia_total, peso_greedy, ganancia_total
+        
+        peso_b, ganancia_b = objetos[b].peso, objetos[b].ganancia
+        
+        # Holgura de cada objeto respecto del ratio de quiebre, escalada por peso_b
+        holguras = [abs(obj.ganancia * peso_b - ganancia_b * obj.peso) for obj in objetos]
+        
+        # Cota de la relajación lineal escalada por peso_b
+        cota_escalada = ganancia_b * capacidad + sum(
+            obj.ganancia * peso_b - ganancia_b * obj.peso for obj in objetos[:b]
+        )
+        
+        nucleo = set(range(max(0, b - self.RADIO_NUCLEO), min(n, b + self.RADIO_NUCLEO)))
+        
+        while True:
+            # Objetos fijados dentro: anteriores al quiebre y fuera del núcleo
+            fijos = [objetos[j] for j in range(b) if j not in nucleo]
+            peso_fijo = sum(obj.peso for obj in fijos)
+            
+            objetos_nucleo = [objetos[j] for j in sorted(nucleo)]
+            capacidad_nucleo = capacidad - peso_fijo
+            motor_nucleo = self._seleccionar_motor(capacidad_nucleo, objetos_nucleo, permitir_nucleo=False)
+            if motor_nucleo == "branch_and_bound":
+                seleccion_nucleo, ganancia_nucleo, _, cota_nucleo = self._branch_and_bound(
+                    capacidad_nucleo, objetos_nucleo, fecha_limite
+                )
+            else:
+                seleccion_nucleo, ganancia_nucleo, _ = self.motores[motor_nucleo](capacidad_nucleo, objetos_nucleo)
+                cota_nucleo = ganancia_nucleo
+            
+            ganancia_fija = sum(obj.ganancia for obj in fijos)
+            ganancia = ganancia_fija + ganancia_nucleo
+            
+            # Objetos cuya inversión podría superar la ganancia actual
+            umbral = cota_escalada - (ganancia + 1) * peso_b
+            pendientes = [j for j in range(n) if j not in nucleo and holguras[j] <= umbral]
+            
+            self.logger.debug(f"Núcleo de {len(nucleo)} objetos ({motor_nucleo}): ganancia {ganancia}, "
+                              f"{len(pendientes)} objetos sin fijar")
+            
+            # Sin pendientes, invertir un objeto fijado no supera la ganancia actual y
+            # el óptimo está acotado por el del núcleo; si no, solo por la relajación lineal
+            if not pendientes:
+                cota = min(ganancia_fija + cota_nucleo, cota_escalada // peso_b)
+                break
+            if time.perf_counter() >= fecha_limite:
+                cota = cota_escalada // peso_b
+                self.logger.warning(f"Núcleo cortado por tiempo con {len(nucleo)} objetos y "
+                                    f"{len(pendientes)} sin fijar")
+                break
+            nucleo.update(pendientes)
+        
+        objetos_seleccionados = fijos + seleccion_nucleo
+        peso_total = sum(obj.peso for obj in objetos_seleccionados)
+        
+        return objetos_seleccionados, ganancia, peso_total, max(ganancia, cota)
+    
+    def _algoritmo_fptas(self, capacidad: int, objetos: List[Objeto],
+                         epsilon: float = EPSILON_POR_DEFECTO) -> Tuple[List[Objeto], int, int]:
+        """
+        Esquema de aproximación (FPTAS) por escalado de ganancias.
+        
+        Con una cota inferior L >= óptimo / 2 (mejor entre greedy y el objeto más
+        valioso) se escalan las ganancias con K = epsilon * L / n y se resuelve
+        exactamente la tabla de peso mínimo por ganancia escalada. Cada objeto
+        pierde menos de K al redondear, así que la pérdida total es menor que
+        epsilon * L <= epsilon * óptimo. La tabla se corta en la cota de la
+        relajación lineal escalada (<= 2n / epsilon columnas), por lo que el
+        tiempo es O(n^2 / epsilon) y no depende de la capacidad.
+        
+        Args:
+            capacidad: Capacidad máxima de la mochila
+            objetos: Lista de objetos ordenados por ratio ganancia/peso descendente
+            epsilon: Pérdida relativa máxima admitida
+            
+        Returns:
+            Tupla con (objetos_seleccionados, ganancia_total, peso_total)
+        """
+        n = len(objetos)
+        
+        seleccion_greedy, ganancia_greedy, peso_greedy = self._algoritmo_greedy_alternativo(capacidad, objetos)
+        mas_valioso = max((obj for obj in objetos if obj.peso <= capacidad), key=lambda obj: obj.ganancia)
+        if mas_valioso.ganancia > ganancia_greedy:
+            seleccion_greedy, ganancia_greedy, peso_greedy = [mas_valioso], mas_valioso.ganancia, mas_valioso.peso
+        
+        factor = max(epsilon * ganancia_greedy / n, 1.0)
+        escaladas = [int(obj.ganancia // factor) for obj in objetos]
+        # Ninguna solución factible supera la cota lineal escalada (+1 por redondeo de coma flotante)
+        columnas = min(int(self._cota_relajacion_lineal(capacidad, objetos) // factor) + 1, sum(escaladas)) + 1
+        
+        inalcanzable = np.int64(np.iinfo(np.int64).max // 2)
+        with self.fase("asignacion_tabla"):
+            peso_minimo = np.full(columnas, inalcanzable, dtype=np.int64)
+            peso_minimo[0] = 0
+            decision = np.zeros(columnas, dtype=bool)
+            seleccion = np.zeros((n, ((columnas - 1) >> 3) + 1), dtype=np.uint8)
+        self.celdas_dp += n * columnas
+        
+        with self.fase("llenado_dp"):
+            for i, obj in enumerate(objetos):
+                ganancia = escaladas[i]
+                if ganancia == 0 or ganancia >= columnas:
+                    continue
+                
+                peso_incluyendo = peso_minimo[:columnas - ganancia] + obj.peso
+                
+                decision[:ganancia] = False
+                np.less(peso_incluyendo, peso_minimo[ganancia:], out=decision[ganancia:])
+                np.minimum(peso_minimo[ganancia:], peso_incluyendo, out=peso_minimo[ganancia:])
+                
+                seleccion[i] = np.packbits(decision, bitorder='little')
+        
+        g = int(np.flatnonzero(peso_minimo <= capacidad)[-1])
+        
+        objetos_seleccionados = []
+        with self.fase("reconstruccion"):
+            for i in range(n - 1, -1, -1):
+                if seleccion[i, g >> 3] >> (g & 7) & 1:
+                    objetos_seleccionados.append(objetos[i])
+                    g -= escaladas[i]
+        
+        ganancia_total = sum(obj.ganancia for obj in objetos_seleccionados)
+        peso_total = sum(obj.peso for obj in objetos_seleccionados)
+        
+        # La solución greedy puede ser mejor en instancias pequeñas
+        if ganancia_greedy > ganancia_total:
+            return seleccion_greedy, ganancia_greedy, peso_greedy
+        
+        return objetos_seleccionados, ganancia_total, peso_total
+    
     def _algoritmo_greedy_alternativo(self, capacidad: int, objetos: List[Objeto]) -> Tuple[List[Objeto], int, int]:
         """
         Algoritmo greedy alternativo como respaldo (menos eficiente pero más simple).
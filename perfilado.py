@@ -0,0 +1,105 @@
+"""
+Perfilado a demanda de una optimización con cProfile o tracemalloc
+"""
+
+import cProfile
+import os
+import pstats
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+from configuracion import PERFIL_TOP
+
+# "cpu" mide el tiempo por función con cProfile; "memoria", el pico y las líneas que más asignan con tracemalloc
+MODOS_PERFIL = ("cpu", "memoria")
+
+
+def _ubicacion(archivo: str, linea: int, funcion: str = "") -> str:
+    """archivo:línea(función) con solo el nombre del archivo, para que sea legible"""
+    texto = f"{os.path.basename(archivo)}:{linea}"
+    return f"{texto}({funcion})" if funcion else texto
+
+
+def _perfil_cpu(funcion: Callable[[], Any], top: int) -> Tuple[Any, Dict[str, Any]]:
+    perfil = cProfile.Profile()
+    resultado = perfil.runcall(funcion)
+    
+    estadisticas = pstats.Stats(perfil)
+    # Cada entrada: (llamadas primitivas, llamadas, tiempo propio, tiempo acumulado, llamadores)
+    filas = sorted(estadisticas.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    return resultado, {
+        "modo": "cpu",
+        "segundos_total": estadisticas.total_tt,
+        "funciones": [
+            {
+                "funcion": _ubicacion(*clave),
+                "llamadas": llamadas,
+                "tiempo_propio_ms": tiempo_propio * 1000,
+                "tiempo_acumulado_ms": tiempo_acumulado * 1000
+            }
+            for clave, (_, llamadas, tiempo_propio, tiempo_acumulado, _) in filas
+        ]
+    }
+
+
+def _perfil_memoria(funcion: Callable[[], Any], top: int) -> Tuple[Any, Dict[str, Any]]:
+    # Si ya se estaba trazando (por ejemplo, con PYTHONTRACEMALLOC) no se detiene al terminar
+    ya_activo = tracemalloc.is_tracing()
+    if not ya_activo:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    
+    try:
+        inicial, _ = tracemalloc.get_traced_memory()
+        resultado = funcion()
+        final, pico = tracemalloc.get_traced_memory()
+        # Las asignaciones que siguen vivas al terminar (el resultado y lo que retiene)
+        lineas = tracemalloc.take_snapshot().statistics("lineno")[:top]
+    finally:
+        if not ya_activo:
+            tracemalloc.stop()
+    
+    return resultado, {
+        "modo": "memoria",
+        "pico_bytes": pico - inicial,
+        "retenidos_bytes": final - inicial,
+        "lineas": [
+            {
+                "linea": _ubicacion(linea.traceback[0].filename, linea.traceback[0].lineno),
+                "bytes": linea.size,
+                "bloques": linea.count
+            }
+            for linea in lineas
+        ]
+    }
+
+
+def ejecutar_perfilado(funcion: Callable[[], Any], modo: str, top: int = PERFIL_TOP) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Ejecuta la función bajo el perfilador indicado.
+    
+    Solo afecta a esta llamada: el perfilador se activa antes y se detiene
+    después, sin reiniciar el proceso. Los tiempos medidos con cProfile son
+    mayores que sin perfilar y tracemalloc también frena las asignaciones.
+    
+    Args:
+        funcion: Función sin argumentos a perfilar
+        modo: "cpu" o "memoria"
+        top: Funciones (cpu) o líneas (memoria) incluidas en el informe
+    
+    Returns:
+        Tupla con (resultado de la función, informe del perfil)
+    
+    Raises:
+        ValueError: Si el modo no es uno de MODOS_PERFIL
+    """
+    if modo == "cpu":
+        return _perfil_cpu(funcion, top)
+    if modo == "memoria":
+        return _perfil_memoria(funcion, top)
+    raise ValueError(f"Modo de perfil desconocido: {modo}. Disponibles: {', '.join(MODOS_PERFIL)}")
+
+
+def encabezado_server_timing(fases_ms: Dict[str, float]) -> str:
+    """Valor del encabezado Server-Timing con la duración de cada fase en milisegundos"""
+    return ", ".join(f"{nombre};dur={ms:.3f}" for nombre, ms in fases_ms.items())
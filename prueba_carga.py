@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Generador de carga concurrente contra el servicio en ejecución
+
+Envía solicitudes con httpx desde asyncio, con concurrencia fija (lazo cerrado)
+o a una tasa objetivo (lazo abierto), y reporta rendimiento, percentiles de
+latencia, errores por código y la distribución de X-Process-Time. Una sonda
+consulta /health durante la prueba: si su latencia sube, el event loop del
+servidor está bloqueado.
+
+    uvicorn main:app --port 8000 &
+    python prueba_carga.py --concurrencia 16 --duracion 30
+    python prueba_carga.py --rps 50 --duracion 60 --mezcla pequena=70 grande=30
+    python prueba_carga.py --archivo escenarios.jsonl --concurrencia 8 --solicitudes 1000
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+import httpx
+
+from benchmark import FAMILIAS, generar_instancia
+
+# Tipos de la mezcla sintética: ruta, número de objetos, capacidad y opciones de la solicitud
+TIPOS_SINTETICOS = {
+    "pequena": {"ruta": "/optimizar", "n": 20, "capacidad": 1_000},
+    "mediana": {"ruta": "/optimizar", "n": 200, "capacidad": 50_000},
+    "grande": {"ruta": "/optimizar", "n": 1_000, "capacidad": 200_000},
+    "aproximada": {"ruta": "/optimizar", "n": 1_000, "capacidad": 1_000_000, "epsilon": 0.05},
+    "columnar": {"ruta": "/optimizar/columnar", "n": 1_000, "capacidad": 100_000},
+    "lote": {"ruta": "/optimizar/lote", "n": 20, "capacidad": 1_000, "lote": 10},
+}
+
+MEZCLA_POR_DEFECTO = {"pequena": 60, "mediana": 30, "grande": 5, "columnar": 5}
+
+# Intervalo entre consultas de la sonda a /health (segundos)
+INTERVALO_SONDA = 0.1
+
+PERCENTILES = (50, 95, 99)
+
+
+class SolicitudCarga(NamedTuple):
+    """Solicitud que envía el generador"""
+    tipo: str
+    metodo: str
+    ruta: str
+    cuerpo: Optional[Any]
+
+
+class ResultadoSolicitud(NamedTuple):
+    """Medición de una solicitud enviada"""
+    tipo: str
+    estado: Optional[int]
+    codigo: Optional[str]
+    latencia: float
+    tiempo_servidor: Optional[float]
+
+
+def solicitud_sintetica(tipo: str, rng: random.Random) -> SolicitudCarga:
+    """
+    Crea una solicitud del tipo indicado con una instancia nueva.
+    
+    Cada solicitud usa otra semilla y una familia de benchmark.FAMILIAS al
+    azar, así que no se repite y no se sirve desde la caché del servidor.
+    """
+    tipo_config = TIPOS_SINTETICOS[tipo]
+    
+    def solicitud_optimizacion() -> Dict[str, Any]:
+        objetos = generar_instancia(rng.choice(FAMILIAS), tipo_config["n"], tipo_config["capacidad"],
+                                    rng.getrandbits(32))
+        solicitud = {"capacidad": tipo_config["capacidad"], "objetos": [obj._asdict() for obj in objetos]}
+        if "epsilon" in tipo_config:
+            solicitud["epsilon"] = tipo_config["epsilon"]
+        return solicitud
+    
+    if tipo == "lote":
+        cuerpo = [solicitud_optimizacion() for _ in range(tipo_config["lote"])]
+    elif tipo == "columnar":
+        objetos = solicitud_optimizacion()["objetos"]
+        cuerpo = {
+            "capacidad": tipo_config["capacidad"],
+            "nombres": [obj["nombre"] for obj in objetos],
+            "pesos": [obj["peso"] for obj in objetos],
+            "ganancias": [obj["ganancia"] for obj in objetos],
+        }
+    else:
+        cuerpo = solicitud_optimizacion()
+    
+    return SolicitudCarga(tipo, "POST", tipo_config["ruta"], cuerpo)
+
+
+def fuente_sintetica(mezcla: Dict[str, int], semilla: int) -> Iterator[SolicitudCarga]:
+    """Solicitudes sintéticas infinitas con la proporción de tipos de la mezcla"""
+    rng = random.Random(semilla)
+    tipos, pesos = list(mezcla), list(mezcla.values())
+    while True:
+        yield solicitud_sintetica(rng.choices(tipos, pesos)[0], rng)
+
+
+def fuente_archivo(ruta_archivo: str) -> Iterator[SolicitudCarga]:
+    """
+    Repite cíclicamente las solicitudes de un archivo NDJSON.
+    
+    Cada línea es una solicitud de /optimizar (el mismo formato que
+    flujo_ndjson.py; el campo "id" se descarta) o un objeto con "ruta",
+    "cuerpo" y opcionalmente "metodo" para cualquier otro endpoint.
+    
+    Raises:
+        ValueError: Si el archivo no tiene solicitudes o alguna línea no es JSON válido
+    """
+    solicitudes = []
+    with open(ruta_archivo, encoding="utf-8") as archivo:
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                datos = json.loads(linea)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Línea {numero}: JSON inválido ({e})")
+            
+            if "ruta" in datos:
+                solicitudes.append(SolicitudCarga(datos["ruta"], datos.get("metodo", "POST"),
+                                                  datos["ruta"], datos.get("cuerpo")))
+            else:
+                datos.pop("id", None)
+                solicitudes.append(SolicitudCarga("/optimizar", "POST", "/optimizar", datos))
+    
+    if not solicitudes:
+        raise ValueError(f"El archivo {ruta_archivo} no tiene solicitudes")
+    return itertools.cycle(solicitudes)
+
+
+def _codigo_error(respuesta: httpx.Response) -> str:
+    """Código de ErrorResponse de la respuesta, o HTTP_<estado> si no lo tiene"""
+    try:
+        datos = respuesta.json()
+    except ValueError:
+        datos = None
+    
+    if isinstance(datos, dict):
+        # Los errores de los endpoints van en "detail"; los del manejador global, en la raíz
+        detalle = datos.get("detail", datos)
+        if isinstance(detalle, dict) and "codigo" in detalle:
+            return detalle["codigo"]
+    return f"HTTP_{respuesta.status_code}"
+
+
+async def enviar(cliente: httpx.AsyncClient, solicitud: SolicitudCarga, inicio: float) -> ResultadoSolicitud:
+    """
+    Envía una solicitud y mide su latencia desde inicio (time.perf_counter).
+    
+    Los errores de transporte (tiempo agotado, conexión rechazada) se registran
+    con el nombre de la excepción como código.
+    """
+    try:
+        respuesta = await cliente.request(solicitud.metodo, solicitud.ruta, json=solicitud.cuerpo)
+    except httpx.HTTPError as e:
+        return ResultadoSolicitud(solicitud.tipo, None, type(e).__name__, time.perf_counter() - inicio, None)
+    
+    latencia = time.perf_counter() - inicio
+    tiempo_servidor = respuesta.headers.get("x-process-time")
+    return ResultadoSolicitud(
+        solicitud.tipo,
+        respuesta.status_code,
+        None if respuesta.is_success else _codigo_error(respuesta),
+        latencia,
+        float(tiempo_servidor) if tiempo_servidor is not None else None
+    )
+
+
+async def carga_concurrente(cliente: httpx.AsyncClient, fuente: Iterator[SolicitudCarga], concurrencia: int,
+                            fin: float, max_solicitudes: Optional[int]) -> List[ResultadoSolicitud]:
+    """
+    Lazo cerrado: concurrencia clientes que envían la siguiente solicitud al recibir la respuesta.
+    
+    Mide la capacidad del servicio con esa concurrencia; la latencia no incluye
+    espera en el cliente.
+    """
+    resultados: List[ResultadoSolicitud] = []
+    contador = itertools.count()
+    
+    async def trabajador():
+        while time.perf_counter() < fin and (max_solicitudes is None or next(contador) < max_solicitudes):
+            resultados.append(await enviar(cliente, next(fuente), time.perf_counter()))
+    
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    return resultados
+
+
+async def carga_tasa(cliente: httpx.AsyncClient, fuente: Iterator[SolicitudCarga], rps: float, fin: float,
+                     max_solicitudes: Optional[int], max_en_vuelo: int) -> List[ResultadoSolicitud]:
+    """
+    Lazo abierto: programa una solicitud cada 1 / rps segundos, sin esperar las respuestas.
+    
+    La latencia se mide desde el instante programado y no desde el envío, así
+    que si el servicio (o el límite max_en_vuelo) no da abasto, la espera se
+    refleja en los percentiles en lugar de bajar la tasa en silencio.
+    """
+    semaforo = asyncio.Semaphore(max_en_vuelo)
+    tareas = []
+    
+    async def enviar_programada(solicitud: SolicitudCarga, programada: float) -> ResultadoSolicitud:
+        async with semaforo:
+            return await enviar(cliente, solicitud, programada)
+    
+    programada = time.perf_counter()
+    for numero in itertools.count():
+        if programada >= fin or (max_solicitudes is not None and numero >= max_solicitudes):
+            break
+        await asyncio.sleep(max(programada - time.perf_counter(), 0))
+        tareas.append(asyncio.create_task(enviar_programada(next(fuente), programada)))
+        programada += 1 / rps
+    
+    return list(await asyncio.gather(*tareas))
+
+
+async def sondear_health(cliente: httpx.AsyncClient, detener: asyncio.Event) -> List[float]:
+    """Latencias de GET /health cada INTERVALO_SONDA segundos hasta que se active detener"""
+    latencias = []
+    while not detener.is_set():
+        inicio = time.perf_counter()
+        try:
+            await cliente.get("/health")
+            latencias.append(time.perf_counter() - inicio)
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(detener.wait(), INTERVALO_SONDA)
+        except asyncio.TimeoutError:
+            pass
+    return latencias
+
+
+def resumen_latencias(segundos: List[float]) -> Optional[Dict[str, float]]:
+    """Percentiles (rango más cercano), media y máximo en milisegundos; None si no hay datos"""
+    if not segundos:
+        return None
+    
+    ordenados = sorted(segundos)
+    resumen = {f"p{p}": ordenados[max(math.ceil(p / 100 * len(ordenados)) - 1, 0)] * 1000 for p in PERCENTILES}
+    resumen["max"] = ordenados[-1] * 1000
+    resumen["media"] = statistics.fmean(ordenados) * 1000
+    return resumen
+
+
+def construir_informe(resultados: List[ResultadoSolicitud], duracion: float,
+                      sonda: List[float]) -> Dict[str, Any]:
+    """
+    Resume una prueba de carga.
+    
+    "espera_ms" es la latencia en el cliente menos X-Process-Time: el tiempo
+    fuera del middleware del servidor (red, cola de conexiones y event loop).
+    Si crece con la carga mientras X-Process-Time no, el servidor no acepta
+    las conexiones a tiempo.
+    """
+    exitosas = [r for r in resultados if r.codigo is None]
+    
+    errores: Dict[str, int] = {}
+    for resultado in resultados:
+        if resultado.codigo is not None:
+            errores[resultado.codigo] = errores.get(resultado.codigo, 0) + 1
+    
+    por_tipo = {}
+    for tipo in sorted({r.tipo for r in resultados}):
+        del_tipo = [r for r in resultados if r.tipo == tipo]
+        por_tipo[tipo] = {
+            "solicitudes": len(del_tipo),
+            "errores": sum(r.codigo is not None for r in del_tipo),
+            "latencia_ms": resumen_latencias([r.latencia for r in del_tipo if r.codigo is None]),
+        }
+    
+    con_tiempo = [r for r in exitosas if r.tiempo_servidor is not None]
+    return {
+        "duracion_s": duracion,
+        "solicitudes": len(resultados),
+        "exitosas": len(exitosas),
+        "rendimiento_rps": len(exitosas) / duracion if duracion else 0.0,
+        "latencia_ms": resumen_latencias([r.latencia for r in exitosas]),
+        "tiempo_servidor_ms": resumen_latencias([r.tiempo_servidor for r in con_tiempo]),
+        "espera_ms": resumen_latencias([max(r.latencia - r.tiempo_servidor, 0.0) for r in con_tiempo]),
+        "errores": {
+            codigo: {"cantidad": cantidad, "tasa": cantidad / len(resultados)}
+            for codigo, cantidad in sorted(errores.items(), key=lambda item: -item[1])
+        },
+        "por_tipo": por_tipo,
+        "sonda_health_ms": resumen_latencias(sonda),
+    }
+
+
+async def ejecutar_prueba(url: str, fuente: Iterator[SolicitudCarga], duracion: float,
+                          max_solicitudes: Optional[int], concurrencia: Optional[int], rps: Optional[float],
+                          max_en_vuelo: int, timeout: float) -> Dict[str, Any]:
+    """
+    Ejecuta la prueba de carga con concurrencia fija o tasa objetivo, con la sonda de /health en paralelo.
+    
+    Returns:
+        Informe de construir_informe
+    """
+    limites = httpx.Limits(max_connections=(concurrencia or max_en_vuelo) + 1)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limites) as cliente:
+        detener = asyncio.Event()
+        sonda = asyncio.create_task(sondear_health(cliente, detener))
+        
+        inicio = time.perf_counter()
+        if rps is not None:
+            resultados = await carga_tasa(cliente, fuente, rps, inicio + duracion, max_solicitudes, max_en_vuelo)
+        else:
+            resultados = await carga_concurrente(cliente, fuente, concurrencia, inicio + duracion, max_solicitudes)
+        transcurrido = time.perf_counter() - inicio
+        
+        detener.set()
+        latencias_sonda = await sonda
+    
+    return construir_informe(resultados, transcurrido, latencias_sonda)
+
+
+def _texto_latencias(resumen: Optional[Dict[str, float]]) -> str:
+    if resumen is None:
+        return "sin datos"
+    return "  ".join(f"{nombre} {valor:8.1f}" for nombre, valor in resumen.items())
+
+
+def imprimir_informe(informe: Dict[str, Any]):
+    """Muestra el informe en la salida estándar"""
+    print(f"📊 {informe['solicitudes']} solicitudes en {informe['duracion_s']:.1f} s: "
+          f"{informe['exitosas']} exitosas, {informe['rendimiento_rps']:.1f} solicitudes/s")
+    print(f"⏱️ Latencia (ms)          {_texto_latencias(informe['latencia_ms'])}")
+    print(f"🖥️ X-Process-Time (ms)    {_texto_latencias(informe['tiempo_servidor_ms'])}")
+    print(f"🚦 Espera fuera (ms)      {_texto_latencias(informe['espera_ms'])}")
+    print(f"💓 Sonda /health (ms)     {_texto_latencias(informe['sonda_health_ms'])}")
+    
+    for tipo, datos in informe["por_tipo"].items():
+        print(f"   {tipo:<20} {datos['solicitudes']:>6} sol. {datos['errores']:>5} err.  "
+              f"{_texto_latencias(datos['latencia_ms'])}")
+    
+    for codigo, datos in informe["errores"].items():
+        print(f"❌ {codigo}: {datos['cantidad']} ({datos['tasa']:.1%})")
+
+
+def _leer_mezcla(valores: List[str]) -> Dict[str, int]:
+    """Convierte ["pequena=60", "grande=40"] en {"pequena": 60, "grande": 40}"""
+    mezcla = {}
+    for valor in valores:
+        tipo, _, peso = valor.partition("=")
+        if tipo not in TIPOS_SINTETICOS:
+            raise ValueError(f"Tipo desconocido: {tipo}. Disponibles: {', '.join(TIPOS_SINTETICOS)}")
+        try:
+            mezcla[tipo] = int(peso or 1)
+        except ValueError:
+            raise ValueError(f"Peso inválido para {tipo}: {peso}")
+    if not any(mezcla.values()):
+        raise ValueError("La mezcla debe tener algún tipo con peso mayor que 0")
+    return mezcla
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga concurrente del servicio de optimización")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL base del servicio")
+    parser.add_argument("--archivo", help="NDJSON de solicitudes a repetir (por defecto, mezcla sintética)")
+    parser.add_argument("--mezcla", nargs="+", metavar="TIPO=PESO",
+                        help=f"Proporción de tipos sintéticos ({', '.join(TIPOS_SINTETICOS)})")
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument("--concurrencia", type=int, help="Solicitudes en curso a la vez (lazo cerrado; por defecto 8)")
+    modo.add_argument("--rps", type=float, help="Solicitudes por segundo objetivo (lazo abierto)")
+    parser.add_argument("--max-en-vuelo", type=int, default=256, help="Máximo de solicitudes en curso con --rps")
+    parser.add_argument("--duracion", type=float, default=30.0, help="Segundos de prueba")
+    parser.add_argument("--solicitudes", type=int, help="Detener tras este número de solicitudes")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Tiempo máximo por solicitud (segundos)")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla de la mezcla sintética")
+    parser.add_argument("--json", help="Archivo donde guardar el informe en JSON")
+    args = parser.parse_args()
+    
+    if args.archivo and args.mezcla:
+        parser.error("--archivo y --mezcla son excluyentes")
+    if args.rps is None and args.concurrencia is None:
+        args.concurrencia = 8
+    
+    try:
+        mezcla = _leer_mezcla(args.mezcla) if args.mezcla else MEZCLA_POR_DEFECTO
+        fuente = fuente_archivo(args.archivo) if args.archivo else fuente_sintetica(mezcla, args.semilla)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    
+    # Sin los logs por solicitud de httpx y del optimizador (importado por benchmark)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("optimizer").setLevel(logging.WARNING)
+    
+    informe = asyncio.run(ejecutar_prueba(args.url, fuente, args.duracion, args.solicitudes, args.concurrencia,
+                                          args.rps, args.max_en_vuelo, args.timeout))
+    imprimir_informe(informe)
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(informe, archivo, indent=2)
+    
+    sys.exit(0 if informe["exitosas"] else 1)
@@ -0,0 +1,289 @@
+"""
+Sesiones de re-optimización incremental para portafolios que se editan poco a poco
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import List, Optional, Dict, Any, Tuple
+
+import numpy as np
+
+from models import Objeto, ResultadoOptimizacion, validar_ganancia_total
+from optimizer import optimizador, OptimizadorPortafolio, InstanciaResuelta
+
+logger = logging.getLogger(__name__)
+
+# Las sesiones se recalculan en hilos (asyncio.to_thread): cada una cuenta sus celdas
+# en su propio optimizador y publica aquí sus instancias, bajo el lock
+_bloqueo_instancias = threading.Lock()
+_instancias: "deque[InstanciaResuelta]" = deque(maxlen=1000)
+
+
+def extraer_instancias() -> List[InstanciaResuelta]:
+    """Devuelve y vacía las instancias resueltas por las sesiones desde la última llamada"""
+    with _bloqueo_instancias:
+        instancias = list(_instancias)
+        _instancias.clear()
+    return instancias
+
+
+class SesionOptimizacion:
+    """
+    Estado de programación dinámica de un portafolio que se edita objeto a objeto.
+    
+    La fila i de la tabla indexada por peso solo depende de los objetos 0..i,
+    así que al editar el objeto en la posición i las filas anteriores siguen
+    siendo válidas. La sesión guarda las decisiones empaquetadas de todas las
+    filas y una copia de la fila de ganancias cada INTERVALO_CONTROL objetos;
+    tras una edición se recalcula desde el punto de control anterior a la
+    primera fila afectada. Los objetos agregados o modificados se mueven al
+    final del orden, de modo que los que se editan a menudo quedan en el
+    sufijo corto que se recalcula.
+    
+    Memoria: n·(C+1)/8 bytes de decisiones más n/INTERVALO_CONTROL filas de
+    (C+1) enteros de 64 bits.
+    
+    La sesión no usa el optimizador global: resultado() corre en un hilo y
+    sus contadores (celdas_dp, fases) no están protegidos, así que cada
+    sesión tiene su propio OptimizadorPortafolio.
+    """
+    
+    INTERVALO_CONTROL = 16
+    
+    def __init__(self, capacidad: int, objetos: List[Objeto]):
+        if len(objetos) * (capacidad + 1) > optimizador.LIMITE_CELDAS_DP:
+            raise ValueError(f"La sesión requiere una tabla de más de {optimizador.LIMITE_CELDAS_DP} celdas; "
+                             f"use /optimizar")
+        validar_ganancia_total(obj.ganancia for obj in objetos)
+        
+        self.capacidad = capacidad
+        self.objetos = sorted(objetos, key=lambda x: x.ganancia/x.peso, reverse=True)
+        self.filas_validas = 0
+        self.pendiente = True
+        self.bloqueo = asyncio.Lock()
+        self._optimizador = OptimizadorPortafolio()
+        
+        self._seleccion = np.zeros((max(len(objetos), 1), (capacidad >> 3) + 1), dtype=np.uint8)
+        self._controles: Dict[int, np.ndarray] = {}
+        self._dp = np.zeros(capacidad + 1, dtype=np.int64)
+    
+    def _posicion(self, nombre: str) -> int:
+        for i, obj in enumerate(self.objetos):
+            if obj.nombre == nombre:
+                return i
+        raise ValueError(f"El objeto '{nombre}' no existe en la sesión")
+    
+    def aplicar_cambios(self, agregar: List[Objeto], modificar: List[Objeto], eliminar: List[str]):
+        """
+        Agrega, modifica y elimina objetos; las filas afectadas se recalculan en resultado().
+        
+        Los cambios se validan todos antes de aplicar ninguno.
+        
+        Raises:
+            ValueError: Si se agrega un nombre existente, se modifica o elimina uno
+                inexistente, la tabla resultante supera LIMITE_CELDAS_DP o las
+                ganancias resultantes suman MAX_GANANCIA_TOTAL o más
+        """
+        cambiados = [obj.nombre for obj in agregar + modificar] + list(eliminar)
+        if len(cambiados) != len(set(cambiados)):
+            raise ValueError("Un objeto no puede aparecer más de una vez en los cambios")
+        
+        nombres = {obj.nombre for obj in self.objetos}
+        for obj in agregar:
+            if obj.nombre in nombres:
+                raise ValueError(f"El objeto '{obj.nombre}' ya existe en la sesión")
+        for nombre in [obj.nombre for obj in modificar] + list(eliminar):
+            if nombre not in nombres:
+                raise ValueError(f"El objeto '{nombre}' no existe en la sesión")
+        
+        n_final = len(self.objetos) + len(agregar) - len(eliminar)
+        if n_final * (self.capacidad + 1) > optimizador.LIMITE_CELDAS_DP:
+            raise ValueError(f"La sesión requiere una tabla de más de {optimizador.LIMITE_CELDAS_DP} celdas")
+        
+        reemplazados = set(eliminar) | {obj.nombre for obj in modificar}
+        validar_ganancia_total([obj.ganancia for obj in self.objetos if obj.nombre not in reemplazados] +
+                               [obj.ganancia for obj in agregar + modificar])
+        
+        for nombre in eliminar:
+            i = self._posicion(nombre)
+            del self.objetos[i]
+            self.filas_validas = min(self.filas_validas, i)
+        
+        for obj in modificar:
+            i = self._posicion(obj.nombre)
+            del self.objetos[i]
+            self.objetos.append(obj)
+            self.filas_validas = min(self.filas_validas, i)
+        
+        self.objetos.extend(agregar)
+        self.pendiente = True
+    
+    def recalcular(self) -> int:
+        """
+        Recalcula las filas invalidadas por las ediciones.
+        
+        Returns:
+            Número de filas recalculadas
+        """
+        if not self.pendiente:
+            return 0
+        
+        n = len(self.objetos)
+        self.filas_validas = min(self.filas_validas, n)
+        
+        # Último punto de control anterior a la primera fila inválida
+        inicio = max((k for k in self._controles if k <= self.filas_validas), default=0)
+        for k in [k for k in self._controles if k > inicio]:
+            del self._controles[k]
+        dp = self._controles[inicio].copy() if inicio else np.zeros(self.capacidad + 1, dtype=np.int64)
+        
+        if self._seleccion.shape[0] < n:
+            filas = max(n, 2 * self._seleccion.shape[0])
+            seleccion = np.zeros((filas, self._seleccion.shape[1]), dtype=np.uint8)
+            seleccion[:self._seleccion.shape[0]] = self._seleccion
+            self._seleccion = seleccion
+        
+        celdas_inicio = self._optimizador.celdas_dp
+        decision = np.zeros(self.capacidad + 1, dtype=bool)
+        for i in range(inicio, n):
+            if i and i % self.INTERVALO_CONTROL == 0:
+                self._controles[i] = dp.copy()
+            
+            obj = self.objetos[i]
+            if obj.peso > self.capacidad:
+                self._seleccion[i] = 0
+                continue
+            
+            self._optimizador._avanzar_fila_dp(dp, decision, obj)
+            self._seleccion[i] = np.packbits(decision, bitorder='little')
+        
+        self._dp = dp
+        self.filas_validas = n
+        self.pendiente = False
+        celdas = self._optimizador.celdas_dp - celdas_inicio
+        instancia = InstanciaResuelta("dp_incremental", n, self.capacidad, celdas)
+        with _bloqueo_instancias:
+            _instancias.append(instancia)
+        return n - inicio
+    
+    def resultado(self) -> Tuple[Optional[ResultadoOptimizacion], int]:
+        """
+        Recalcula lo necesario y reconstruye la selección óptima.
+        
+        Returns:
+            Tupla con (resultado, o None si ningún objeto cabe; filas recalculadas)
+        """
+        filas_recalculadas = self.recalcular()
+        
+        seleccionados = self._optimizador._reconstruir_seleccion(self._seleccion, self.objetos, self.capacidad)
+        if not seleccionados:
+            return None, filas_recalculadas
+        
+        return ResultadoOptimizacion(
+            seleccionados=[obj.nombre for obj in seleccionados],
+            ganancia_total=int(self._dp[self.capacidad]),
+            peso_total=sum(obj.peso for obj in seleccionados),
+            motor="dp_incremental",
+            optimo=True
+        ), filas_recalculadas
+    
+    def memoria_bytes(self) -> int:
+        """Memoria ocupada por el estado de programación dinámica"""
+        return self._seleccion.nbytes + self._dp.nbytes + sum(fila.nbytes for fila in self._controles.values())
+
+
+class GestorSesiones:
+    """
+    Guarda las sesiones abiertas con límite de cantidad, memoria y tiempo de inactividad.
+    
+    Las sesiones sin uso durante ttl_segundos expiran. Si se supera
+    max_sesiones o max_bytes se descarta la usada menos recientemente.
+    """
+    
+    def __init__(self, max_sesiones: int, max_bytes: int, ttl_segundos: float):
+        self.max_sesiones = max_sesiones
+        self.max_bytes = max_bytes
+        self.ttl_segundos = ttl_segundos
+        self._sesiones: "OrderedDict[str, Tuple[float, SesionOptimizacion]]" = OrderedDict()
+        
+        self.creadas = 0
+        self.expulsiones = 0
+        self.expiradas = 0
+    
+    def crear(self, capacidad: int, objetos: List[Objeto]) -> Tuple[str, SesionOptimizacion]:
+        """
+        Crea una sesión nueva.
+        
+        Raises:
+            ValueError: Si la tabla de la sesión supera LIMITE_CELDAS_DP
+        """
+        self._purgar_expiradas()
+        
+        sesion = SesionOptimizacion(capacidad, objetos)
+        id_sesion = uuid.uuid4().hex
+        self._sesiones[id_sesion] = (time.time(), sesion)
+        self.creadas += 1
+        
+        while len(self._sesiones) > self.max_sesiones:
+            self._expulsar_mas_antigua()
+        
+        logger.info(f"🧩 Sesión {id_sesion[:12]} creada con {len(objetos)} objetos y capacidad {capacidad}")
+        return id_sesion, sesion
+    
+    def obtener(self, id_sesion: str) -> Optional[SesionOptimizacion]:
+        """Devuelve la sesión y renueva su vigencia, o None si no existe o expiró"""
+        entrada = self._sesiones.get(id_sesion)
+        if entrada is None:
+            return None
+        
+        usada, sesion = entrada
+        if time.time() - usada > self.ttl_segundos:
+            del self._sesiones[id_sesion]
+            self.expiradas += 1
+            return None
+        
+        self._sesiones[id_sesion] = (time.time(), sesion)
+        self._sesiones.move_to_end(id_sesion)
+        return sesion
+    
+    def eliminar(self, id_sesion: str) -> bool:
+        """Cierra una sesión; devuelve False si no existía"""
+        return self._sesiones.pop(id_sesion, None) is not None
+    
+    def ajustar_memoria(self):
+        """Descarta las sesiones menos usadas hasta respetar max_bytes (nunca la más reciente)"""
+        while len(self._sesiones) > 1 and self.memoria_bytes() > self.max_bytes:
+            self._expulsar_mas_antigua()
+    
+    def memoria_bytes(self) -> int:
+        """Memoria total de las sesiones abiertas"""
+        return sum(sesion.memoria_bytes() for _, sesion in self._sesiones.values())
+    
+    def _expulsar_mas_antigua(self):
+        id_sesion, _ = self._sesiones.popitem(last=False)
+        self.expulsiones += 1
+        logger.info(f"🧩 Sesión {id_sesion[:12]} descartada por límite de sesiones o memoria")
+    
+    def _purgar_expiradas(self):
+        limite = time.time() - self.ttl_segundos
+        for id_sesion in [k for k, (usada, _) in self._sesiones.items() if usada < limite]:
+            del self._sesiones[id_sesion]
+            self.expiradas += 1
+    
+    def estadisticas(self) -> Dict[str, Any]:
+        """Contadores de uso de las sesiones"""
+        self._purgar_expiradas()
+        return {
+            "abiertas": len(self._sesiones),
+            "max_sesiones": self.max_sesiones,
+            "memoria_bytes": self.memoria_bytes(),
+            "max_bytes": self.max_bytes,
+            "ttl_segundos": self.ttl_segundos,
+            "creadas": self.creadas,
+            "expulsiones": self.expulsiones,
+            "expiradas": self.expiradas
+        }
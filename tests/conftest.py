@@ -0,0 +1,19 @@
+"""
+Configuración común de las pruebas.
+
+Las variables de entorno se fijan antes de importar el servicio: configuracion
+las lee al importarse, también en los procesos del pool, que las heredan.
+"""
+
+import os
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Presupuesto de admisión chico para que las instancias de prueba lo superen rápido
+os.environ["PRESUPUESTO_SEGUNDOS"] = "0.3"
+os.environ["POOL_PROCESOS"] = "1"
+os.environ["CACHE_RUTA_DISCO"] = ""
+os.environ["CATALOGOS_DIR"] = tempfile.mkdtemp(prefix="catalogos_prueba_")
@@ -0,0 +1,236 @@
+"""
+Control de admisión de cada endpoint de optimización: degradación y rechazo con 422
+"""
+
+import json
+import random
+from typing import Any, Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from cache import CacheResultados
+from columnar import codificar_binario
+
+# ~2 s con dp_numpy: supera el presupuesto de 0,3 s fijado en conftest
+CAPACIDAD_COSTOSA = 5_000_000
+
+
+def objetos_costosos(prefijo: str = "o") -> List[Dict[str, Any]]:
+    """100 objetos fuertemente correlacionados: ni la reducción ni el núcleo achican la tabla"""
+    azar = random.Random(3)
+    objetos = []
+    for i in range(100):
+        peso = azar.randint(100_000, 1_000_000)
+        objetos.append({"nombre": f"{prefijo}{i}", "peso": peso, "ganancia": peso + 100_000})
+    return objetos
+
+
+def objetos_baratos() -> List[Dict[str, Any]]:
+    return [{"nombre": f"b{i}", "peso": 3 + i, "ganancia": 5 + 2 * i} for i in range(8)]
+
+
+def cliente_con_admision(monkeypatch, degradar: bool):
+    """
+    Cliente con un pool nuevo y la caché vacía.
+    
+    ADMISION_DEGRADAR se lee en los procesos del pool, que se crean con el
+    entorno vigente al recibir la primera tarea.
+    """
+    monkeypatch.setenv("ADMISION_DEGRADAR", "1" if degradar else "0")
+    monkeypatch.setattr(main, "cache", CacheResultados(64, 300))
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    with cliente_con_admision(monkeypatch, degradar=True) as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def cliente_sin_degradar(monkeypatch):
+    with cliente_con_admision(monkeypatch, degradar=False) as cliente:
+        yield cliente
+
+
+def assert_degradada(respuesta):
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.headers["X-Admision"] == "degradada"
+    assert respuesta.json()["motor"] == "branch_and_bound"
+
+
+def assert_rechazada(respuesta):
+    assert respuesta.status_code == 422, respuesta.text
+    assert "COST_LIMIT_EXCEEDED" in respuesta.text
+
+
+def test_optimizar_admite_instancia_barata(cliente):
+    respuesta = cliente.post("/optimizar", json={"capacidad": 20, "objetos": objetos_baratos()})
+    
+    assert respuesta.status_code == 200
+    assert respuesta.headers["X-Admision"] == "admitida"
+
+
+def test_optimizar_degrada(cliente):
+    respuesta = cliente.post("/optimizar", json={"capacidad": CAPACIDAD_COSTOSA, "objetos": objetos_costosos()})
+    
+    assert_degradada(respuesta)
+    assert float(respuesta.headers["X-Estimacion-Segundos"]) > 0.3
+
+
+def test_optimizar_admite_nucleo_aunque_ninguna_tabla_quepa(cliente):
+    # 1000 objetos no correlacionados: la tabla completa tardaría horas, el núcleo milisegundos
+    azar = random.Random(5)
+    objetos = [{"nombre": f"n{i}", "peso": azar.randint(1, 1_000_000), "ganancia": azar.randint(1, 1_000_000)}
+               for i in range(1000)]
+    capacidad = sum(obj["peso"] for obj in objetos) // 2
+    
+    respuesta = cliente.post("/optimizar", json={"capacidad": capacidad, "objetos": objetos})
+    
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.headers["X-Admision"] == "admitida"
+    assert respuesta.headers["X-Estimacion-Motor"] == "nucleo"
+    assert float(respuesta.headers["X-Estimacion-Segundos"]) <= 0.3
+    assert respuesta.json()["motor"] == "nucleo"
+    assert respuesta.json()["optimo"] is True
+
+
+def test_optimizar_rechaza(cliente_sin_degradar):
+    respuesta = cliente_sin_degradar.post(
+        "/optimizar", json={"capacidad": CAPACIDAD_COSTOSA, "objetos": objetos_costosos()}
+    )
+    assert_rechazada(respuesta)
+
+
+def _columnas(objetos: List[Dict[str, Any]]) -> Dict[str, List]:
+    return {clave: [obj[campo] for obj in objetos]
+            for clave, campo in (("nombres", "nombre"), ("pesos", "peso"), ("ganancias", "ganancia"))}
+
+
+def test_columnar_degrada(cliente):
+    respuesta = cliente.post(
+        "/optimizar/columnar", json={"capacidad": CAPACIDAD_COSTOSA, **_columnas(objetos_costosos())}
+    )
+    assert_degradada(respuesta)
+
+
+def test_columnar_rechaza(cliente_sin_degradar):
+    respuesta = cliente_sin_degradar.post(
+        "/optimizar/columnar", json={"capacidad": CAPACIDAD_COSTOSA, **_columnas(objetos_costosos())}
+    )
+    assert_rechazada(respuesta)
+
+
+def _binario(objetos: List[Dict[str, Any]]) -> bytes:
+    columnas = _columnas(objetos)
+    return codificar_binario(CAPACIDAD_COSTOSA, columnas["nombres"], columnas["pesos"], columnas["ganancias"])
+
+
+def test_columnar_binario_degrada(cliente):
+    respuesta = cliente.post(
+        "/optimizar/columnar/binario", content=_binario(objetos_costosos()),
+        headers={"Content-Type": "application/octet-stream"}
+    )
+    assert_degradada(respuesta)
+
+
+def test_columnar_binario_rechaza(cliente_sin_degradar):
+    respuesta = cliente_sin_degradar.post(
+        "/optimizar/columnar/binario", content=_binario(objetos_costosos()),
+        headers={"Content-Type": "application/octet-stream"}
+    )
+    assert_rechazada(respuesta)
+
+
+def _lote() -> List[Dict[str, Any]]:
+    """Dos solicitudes con los mismos objetos (tabla compartida) y una individual"""
+    objetos = objetos_costosos()
+    return [
+        {"capacidad": CAPACIDAD_COSTOSA, "objetos": objetos},
+        {"capacidad": CAPACIDAD_COSTOSA - 1, "objetos": objetos},
+        {"capacidad": CAPACIDAD_COSTOSA, "objetos": objetos_costosos("p")},
+    ]
+
+
+def test_lote_degrada(cliente):
+    respuesta = cliente.post("/optimizar/lote", json=_lote())
+    
+    assert respuesta.status_code == 200
+    items = respuesta.json()["resultados"]
+    assert respuesta.json()["tablas_compartidas"] == 1
+    assert [item["resultado"]["motor"] for item in items] == ["branch_and_bound"] * 3
+
+
+def test_lote_rechaza(cliente_sin_degradar):
+    respuesta = cliente_sin_degradar.post("/optimizar/lote", json=_lote())
+    
+    assert respuesta.status_code == 200
+    items = respuesta.json()["resultados"]
+    assert [item["error"]["codigo"] for item in items] == ["COST_LIMIT_EXCEEDED"] * 3
+
+
+def test_capacidades_degrada(cliente):
+    respuesta = cliente.post(
+        "/optimizar/capacidades",
+        json={"objetos": objetos_costosos(), "capacidades": [CAPACIDAD_COSTOSA, CAPACIDAD_COSTOSA // 2]}
+    )
+    
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.headers["X-Admision"] == "degradada"
+    assert [r["motor"] for r in respuesta.json()["resultados"]] == ["branch_and_bound"] * 2
+
+
+def test_capacidades_admite_tabla_barata(cliente):
+    respuesta = cliente.post("/optimizar/capacidades", json={"objetos": objetos_baratos(), "capacidades": [10, 20]})
+    
+    assert respuesta.status_code == 200
+    assert respuesta.headers["X-Admision"] == "admitida"
+
+
+def test_capacidades_rechaza(cliente_sin_degradar):
+    respuesta = cliente_sin_degradar.post(
+        "/optimizar/capacidades", json={"objetos": objetos_costosos(), "capacidades": [CAPACIDAD_COSTOSA]}
+    )
+    assert_rechazada(respuesta)
+
+
+def test_frontera_no_se_degrada(cliente):
+    respuesta = cliente.post("/optimizar/capacidades", json={"objetos": objetos_costosos(), "frontera": True})
+    assert_rechazada(respuesta)
+
+
+def test_catalogo_degrada(cliente):
+    id_catalogo = cliente.post("/catalogos", json={"objetos": objetos_costosos()}).json()["id"]
+    respuesta = cliente.post(f"/catalogos/{id_catalogo}/optimizar", json={"capacidad": CAPACIDAD_COSTOSA})
+    
+    assert_degradada(respuesta)
+
+
+def test_catalogo_rechaza(cliente_sin_degradar):
+    id_catalogo = cliente_sin_degradar.post("/catalogos", json={"objetos": objetos_costosos()}).json()["id"]
+    respuesta = cliente_sin_degradar.post(f"/catalogos/{id_catalogo}/optimizar", json={"capacidad": CAPACIDAD_COSTOSA})
+    
+    assert_rechazada(respuesta)
+
+
+def _ndjson(cliente) -> List[Dict[str, Any]]:
+    solicitudes = [
+        {"id": f"s{i}", "capacidad": CAPACIDAD_COSTOSA, "objetos": objetos_costosos(f"s{i}_")} for i in range(2)
+    ]
+    cuerpo = "\n".join(json.dumps(solicitud) for solicitud in solicitudes)
+    respuesta = cliente.post("/optimizar/ndjson", content=cuerpo.encode(),
+                             headers={"Content-Type": "application/x-ndjson"})
+    assert respuesta.status_code == 200
+    return sorted((json.loads(linea) for linea in respuesta.text.splitlines()), key=lambda salida: salida["id"])
+
+
+def test_ndjson_degrada(cliente):
+    salidas = _ndjson(cliente)
+    assert [salida["resultado"]["motor"] for salida in salidas] == ["branch_and_bound"] * 2
+
+
+def test_ndjson_rechaza(cliente_sin_degradar):
+    salidas = _ndjson(cliente_sin_degradar)
+    assert [salida["error"]["codigo"] for salida in salidas] == ["COST_LIMIT_EXCEEDED"] * 2
@@ -0,0 +1,131 @@
+"""
+Caché de resultados: clave canónica, LRU, expiración y nivel en SQLite
+"""
+
+import numpy as np
+import pytest
+
+import cache as modulo_cache
+from cache import CacheResultados, clave_columnas, clave_solicitud
+from models import Objeto, ResultadoOptimizacion
+
+OBJETOS = [Objeto(nombre="a", peso=3, ganancia=4), Objeto(nombre="b", peso=5, ganancia=6)]
+
+
+def resultado(ganancia: int = 4) -> ResultadoOptimizacion:
+    return ResultadoOptimizacion(seleccionados=["a"], ganancia_total=ganancia, peso_total=3)
+
+
+class Reloj:
+    """Reemplazo de time.time que solo avanza cuando se le pide"""
+    
+    def __init__(self):
+        self.ahora = 1_000_000.0
+    
+    def __call__(self) -> float:
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(modulo_cache.time, "time", reloj)
+    return reloj
+
+
+def test_clave_no_depende_del_orden_de_los_objetos():
+    assert clave_solicitud(10, OBJETOS) == clave_solicitud(10, list(reversed(OBJETOS)))
+
+
+def test_clave_cambia_con_la_capacidad_y_las_opciones():
+    base = clave_solicitud(10, OBJETOS)
+    
+    assert clave_solicitud(11, OBJETOS) != base
+    assert clave_solicitud(10, OBJETOS, epsilon=0.1) != base
+    assert clave_solicitud(10, OBJETOS, epsilon=None) == base
+
+
+def test_clave_columnar_coincide_con_la_de_objetos():
+    clave = clave_columnas(10, ["b", "a"], np.array([5, 3]), np.array([6, 4]), tiempo_max_ms=50)
+    
+    assert clave == clave_solicitud(10, OBJETOS, tiempo_max_ms=50)
+
+
+@pytest.mark.asyncio
+async def test_expulsa_la_entrada_menos_usada(reloj):
+    cache = CacheResultados(max_entradas=2, ttl_segundos=60)
+    await cache.guardar("a", resultado())
+    await cache.guardar("b", resultado())
+    assert await cache.obtener("a") is not None
+    
+    await cache.guardar("c", resultado())
+    
+    assert await cache.obtener("b") is None
+    assert await cache.obtener("a") is not None
+    assert cache.estadisticas()["expulsiones"] == 1
+
+
+@pytest.mark.asyncio
+async def test_las_entradas_expiran(reloj):
+    cache = CacheResultados(max_entradas=10, ttl_segundos=60)
+    await cache.guardar("a", resultado())
+    
+    reloj.ahora += 61
+    
+    assert await cache.obtener("a") is None
+    assert cache.estadisticas()["expiradas"] == 1
+
+
+@pytest.mark.asyncio
+async def test_el_disco_sobrevive_a_un_reinicio(tmp_path, reloj):
+    ruta = str(tmp_path / "cache.db")
+    cache = CacheResultados(max_entradas=10, ttl_segundos=60, ruta_disco=ruta)
+    await cache.guardar("a", resultado(ganancia=7))
+    cache.cerrar()
+    
+    reiniciada = CacheResultados(max_entradas=10, ttl_segundos=60, ruta_disco=ruta)
+    try:
+        recuperado = await reiniciada.obtener("a")
+        assert recuperado.ganancia_total == 7
+        assert reiniciada.estadisticas()["aciertos_disco"] == 1
+        
+        # La entrada se promovió a memoria
+        await reiniciada.obtener("a")
+        assert reiniciada.estadisticas()["aciertos"] == 1
+    finally:
+        reiniciada.cerrar()
+
+
+@pytest.mark.asyncio
+async def test_el_disco_respeta_la_expiracion(tmp_path, reloj):
+    cache = CacheResultados(max_entradas=1, ttl_segundos=60, ruta_disco=str(tmp_path / "cache.db"))
+    try:
+        await cache.guardar("a", resultado())
+        await cache.guardar("b", resultado())
+        
+        reloj.ahora += 61
+        
+        assert await cache.obtener("a") is None
+    finally:
+        cache.cerrar()
+
+
+@pytest.mark.asyncio
+async def test_la_poda_borra_las_expiradas_en_tandas(tmp_path, reloj):
+    cache = CacheResultados(max_entradas=1, ttl_segundos=60, ruta_disco=str(tmp_path / "cache.db"))
+    cache.PODA_CADA = 5
+    cache.PODA_TANDA = 2
+    try:
+        for i in range(4):
+            await cache.guardar(f"vieja{i}", resultado())
+        reloj.ahora += 61
+        
+        # La cuarta inserción no poda; la quinta borra las cuatro expiradas, de a dos
+        await cache.guardar("nueva", resultado())
+        
+        filas = cache._disco.execute("SELECT clave FROM resultados").fetchall()
+        assert filas == [("nueva",)]
+        indices = cache._disco.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+        assert ("resultados_creado",) in indices
+    finally:
+        cache.cerrar()
@@ -0,0 +1,83 @@
+"""
+Catálogos columnares mapeados en memoria
+"""
+
+import pytest
+
+from catalogos import (CatalogoNoEncontrado, abrir_catalogo, eliminar_catalogo, filtrar_catalogo,
+                       guardar_catalogo)
+from models import Objeto
+from optimizer import OptimizadorPortafolio
+
+OBJETOS = [
+    Objeto(nombre="zeta", peso=10, ganancia=5),
+    Objeto(nombre="alfa", peso=3, ganancia=9),
+    Objeto(nombre="gama", peso=7, ganancia=7),
+    Objeto(nombre="beta", peso=20, ganancia=30),
+]
+
+
+@pytest.fixture
+def catalogo(tmp_path):
+    id_catalogo = guardar_catalogo(OBJETOS, str(tmp_path))
+    return abrir_catalogo(id_catalogo, str(tmp_path))
+
+
+def nombres(catalogo, indices):
+    return sorted(catalogo.nombre(i) for i in indices.tolist())
+
+
+def test_el_identificador_depende_del_contenido_y_no_del_orden(tmp_path):
+    directorio = str(tmp_path)
+    
+    assert guardar_catalogo(OBJETOS, directorio) == guardar_catalogo(list(reversed(OBJETOS)), directorio)
+    assert guardar_catalogo(OBJETOS[:3], directorio) != guardar_catalogo(OBJETOS, directorio)
+
+
+def test_las_columnas_conservan_los_objetos(catalogo):
+    objetos = catalogo.objetos(filtrar_catalogo(catalogo, 10**9))
+    
+    assert sorted((obj.nombre, obj.peso, obj.ganancia) for obj in objetos) == sorted(
+        (obj.nombre, obj.peso, obj.ganancia) for obj in OBJETOS
+    )
+    assert catalogo.resumen("x")["peso_total"] == 40
+    assert catalogo.indice("gama") is not None and catalogo.indice("delta") is None
+
+
+def test_el_filtro_descarta_los_que_no_caben_y_los_que_no_cumplen(catalogo):
+    assert nombres(catalogo, filtrar_catalogo(catalogo, 10)) == ["alfa", "gama", "zeta"]
+    assert nombres(catalogo, filtrar_catalogo(catalogo, 100, {"peso_maximo": 7})) == ["alfa", "gama"]
+    assert nombres(catalogo, filtrar_catalogo(catalogo, 100, {"ganancia_minima": 8})) == ["alfa", "beta"]
+    assert nombres(catalogo, filtrar_catalogo(catalogo, 100, {"incluir": ["beta", "zeta"]})) == ["beta", "zeta"]
+    assert nombres(catalogo, filtrar_catalogo(catalogo, 100, {"excluir": ["beta"]})) == ["alfa", "gama", "zeta"]
+
+
+def test_el_filtro_rechaza_nombres_desconocidos(catalogo):
+    with pytest.raises(ValueError):
+        filtrar_catalogo(catalogo, 100, {"excluir": ["delta"]})
+
+
+def test_eliminar_un_catalogo(tmp_path):
+    directorio = str(tmp_path)
+    id_catalogo = guardar_catalogo(OBJETOS, directorio)
+    abrir_catalogo(id_catalogo, directorio)
+    
+    eliminar_catalogo(id_catalogo, directorio)
+    
+    with pytest.raises(CatalogoNoEncontrado):
+        abrir_catalogo(id_catalogo, directorio)
+    with pytest.raises(CatalogoNoEncontrado):
+        eliminar_catalogo(id_catalogo, directorio)
+
+
+def test_rechaza_identificadores_que_no_son_hash(tmp_path):
+    with pytest.raises(CatalogoNoEncontrado):
+        abrir_catalogo("../../etc/passwd", str(tmp_path))
+
+
+def test_los_objetos_del_catalogo_sirven_a_los_motores(catalogo):
+    optimizador = OptimizadorPortafolio()
+    candidatos = catalogo.objetos(filtrar_catalogo(catalogo, 25, {"excluir": ["zeta"]}))
+    
+    resultado = optimizador.optimizar(25, candidatos)
+    assert resultado.ganancia_total == optimizador.optimizar(25, OBJETOS[1:], motor="dp_clasico").ganancia_total
@@ -0,0 +1,92 @@
+"""
+Unificación de solicitudes idénticas en curso (optimizar_una_vez)
+"""
+
+import asyncio
+
+import pytest
+
+import main
+from cache import CacheResultados, clave_solicitud
+from models import ResultadoOptimizacion, SolicitudOptimizacion
+from optimizer import EstimacionCosto, PlanOptimizacion
+
+SOLICITUD = SolicitudOptimizacion(capacidad=10, objetos=[{"nombre": "a", "peso": 3, "ganancia": 4}])
+CLAVE = clave_solicitud(SOLICITUD.capacidad, SOLICITUD.objetos)
+PLAN = PlanOptimizacion(EstimacionCosto("dp_numpy", 11, 0.001, 64), None, None, False)
+
+
+class EjecutorFalso:
+    """Sustituye al pool: cuenta las llamadas y no termina hasta que se libera"""
+    
+    def __init__(self, error: Exception = None):
+        self.llamadas = 0
+        self.error = error
+        self.liberar = asyncio.Event()
+    
+    async def optimizar(self, capacidad, objetos, epsilon=None, tiempo_max_ms=None):
+        self.llamadas += 1
+        await self.liberar.wait()
+        if self.error is not None:
+            raise self.error
+        return ResultadoOptimizacion(seleccionados=["a"], ganancia_total=4, peso_total=3, optimo=True), PLAN
+
+
+@pytest.fixture
+def entorno(monkeypatch):
+    monkeypatch.setattr(main, "cache", CacheResultados(16, 300))
+    monkeypatch.setattr(main, "optimizaciones_en_curso", {})
+    
+    def instalar(error: Exception = None) -> EjecutorFalso:
+        ejecutor = EjecutorFalso(error)
+        monkeypatch.setattr(main, "ejecutor", ejecutor)
+        return ejecutor
+    
+    return instalar
+
+
+@pytest.mark.asyncio
+async def test_solicitudes_identicas_comparten_una_optimizacion(entorno):
+    ejecutor = entorno()
+    coalescidas = main.solicitudes_coalescidas
+    
+    solicitudes = [asyncio.ensure_future(main.optimizar_una_vez(CLAVE, SOLICITUD)) for _ in range(5)]
+    await asyncio.sleep(0)
+    ejecutor.liberar.set()
+    resultados = await asyncio.gather(*solicitudes)
+    
+    assert ejecutor.llamadas == 1
+    assert {resultado.ganancia_total for resultado, _ in resultados} == {4}
+    assert main.solicitudes_coalescidas - coalescidas == 4
+    assert main.optimizaciones_en_curso == {}
+    assert await main.cache.obtener(CLAVE) is not None
+
+
+@pytest.mark.asyncio
+async def test_el_error_llega_a_todas_las_solicitudes(entorno):
+    ejecutor = entorno(error=ValueError("datos inválidos"))
+    
+    solicitudes = [asyncio.ensure_future(main.optimizar_una_vez(CLAVE, SOLICITUD)) for _ in range(3)]
+    await asyncio.sleep(0)
+    ejecutor.liberar.set()
+    resultados = await asyncio.gather(*solicitudes, return_exceptions=True)
+    
+    assert ejecutor.llamadas == 1
+    assert all(isinstance(resultado, ValueError) for resultado in resultados)
+    assert main.optimizaciones_en_curso == {}
+
+
+@pytest.mark.asyncio
+async def test_cancelar_la_primera_solicitud_no_corta_a_las_demas(entorno):
+    ejecutor = entorno()
+    
+    primera = asyncio.ensure_future(main.optimizar_una_vez(CLAVE, SOLICITUD))
+    segunda = asyncio.ensure_future(main.optimizar_una_vez(CLAVE, SOLICITUD))
+    await asyncio.sleep(0)
+    primera.cancel()
+    ejecutor.liberar.set()
+    
+    resultado, _ = await segunda
+    assert resultado.ganancia_total == 4
+    assert primera.cancelled()
+    assert ejecutor.llamadas == 1
@@ -0,0 +1,88 @@
+"""
+Formato columnar: validación en bloque y codificación binaria
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from columnar import codificar_binario, decodificar_binario, objetos_de_columnas, validar_columnas
+
+NOMBRES = ["a", "b-2", "c_3"]
+PESOS = [3, 5, 7]
+GANANCIAS = [4, 6, 9]
+
+
+def test_columnas_validas_se_convierten_a_int64():
+    nombres, pesos, ganancias = validar_columnas(NOMBRES, PESOS, GANANCIAS)
+    
+    assert nombres == NOMBRES
+    assert pesos.dtype == ganancias.dtype == np.int64
+    assert pesos.tolist() == PESOS and ganancias.tolist() == GANANCIAS
+
+
+@pytest.mark.parametrize("nombres, pesos, ganancias, mensaje", [
+    ([], [], [], "entre 1 y"),
+    (NOMBRES, PESOS[:2], GANANCIAS, "mismo largo"),
+    (NOMBRES, [3, 0, 7], GANANCIAS, "peso del objeto 1"),
+    (NOMBRES, PESOS, [4, 6, -9], "ganancia del objeto 2"),
+    (["a", "b c", "d"], PESOS, GANANCIAS, "objeto 1"),
+    (["a", "b\nc", "d"], PESOS, GANANCIAS, "Nombre inválido"),
+    (["a", "x" * 51, "d"], PESOS, GANANCIAS, "objeto 1"),
+    (["a", "b", "a"], PESOS, GANANCIAS, "duplicados"),
+    (NOMBRES, [3, 2**70, 7], GANANCIAS, "64 bits"),
+    (NOMBRES, PESOS, [2**62 - 2, 1, 1], "suma de las ganancias"),
+    (NOMBRES, PESOS, [2**62, 2**62, 2**62], "suma de las ganancias"),
+])
+def test_columnas_invalidas_se_rechazan(nombres, pesos, ganancias, mensaje):
+    with pytest.raises(ValueError, match=mensaje):
+        validar_columnas(nombres, pesos, ganancias)
+
+
+def test_el_formato_binario_ida_y_vuelta():
+    capacidad, nombres, pesos, ganancias = decodificar_binario(codificar_binario(10, NOMBRES, PESOS, GANANCIAS))
+    
+    assert capacidad == 10
+    assert nombres == NOMBRES
+    assert pesos.tolist() == PESOS and ganancias.tolist() == GANANCIAS
+
+
+@pytest.mark.parametrize("contenido", [
+    b"COLS",
+    b"XXXX" + codificar_binario(10, NOMBRES, PESOS, GANANCIAS)[4:],
+    codificar_binario(10, NOMBRES, PESOS, GANANCIAS)[:40],
+    codificar_binario(10, NOMBRES, PESOS, GANANCIAS)[:-3] + "ñ".encode(),
+])
+def test_binario_mal_formado_se_rechaza(contenido):
+    with pytest.raises(ValueError):
+        decodificar_binario(contenido)
+
+
+def test_los_objetos_de_columnas_tienen_la_interfaz_de_objeto():
+    objetos = objetos_de_columnas(*validar_columnas(NOMBRES, PESOS, GANANCIAS))
+    
+    assert [(obj.nombre, obj.peso, obj.ganancia) for obj in objetos] == list(zip(NOMBRES, PESOS, GANANCIAS))
+
+
+def test_los_tres_formatos_dan_el_mismo_resultado():
+    objetos = [{"nombre": n, "peso": p, "ganancia": g} for n, p, g in zip(NOMBRES, PESOS, GANANCIAS)]
+    
+    with TestClient(main.app) as cliente:
+        por_objetos = cliente.post("/optimizar", json={"capacidad": 10, "objetos": objetos}).json()
+        columnar = cliente.post(
+            "/optimizar/columnar", json={"capacidad": 10, "nombres": NOMBRES, "pesos": PESOS, "ganancias": GANANCIAS}
+        ).json()
+        binario = cliente.post(
+            "/optimizar/columnar/binario", content=codificar_binario(10, NOMBRES, PESOS, GANANCIAS),
+            headers={"Content-Type": "application/octet-stream"}
+        ).json()
+        invalido = cliente.post(
+            "/optimizar/columnar",
+            json={"capacidad": 10, "nombres": NOMBRES, "pesos": [3, 0, 7], "ganancias": GANANCIAS}
+        )
+    
+    for respuesta in (columnar, binario):
+        assert sorted(respuesta["seleccionados"]) == sorted(por_objetos["seleccionados"])
+        assert respuesta["ganancia_total"] == por_objetos["ganancia_total"]
+    assert invalido.status_code == 400
@@ -0,0 +1,126 @@
+"""
+Flujo NDJSON: división en líneas, errores por línea y concurrencia acotada
+"""
+
+import asyncio
+import json
+import random
+from typing import AsyncIterator, List
+
+import pytest
+
+from flujo_ndjson import LineaDemasiadoLarga, lineas_de_bloques, procesar_ndjson
+from models import ErrorResponse, ResultadoOptimizacion, SolicitudOptimizacion
+
+
+async def iterar(elementos) -> AsyncIterator:
+    for elemento in elementos:
+        yield elemento
+
+
+async def lineas(bloques: List[bytes], max_bytes: int = 1 << 20) -> List[bytes]:
+    return [linea async for linea in lineas_de_bloques(iterar(bloques), max_bytes)]
+
+
+def solicitud(identificador: str, capacidad: int = 10) -> bytes:
+    datos = {"id": identificador, "capacidad": capacidad, "objetos": [{"nombre": "a", "peso": 3, "ganancia": 4}]}
+    return json.dumps(datos).encode()
+
+
+async def resolver_directo(solicitud: SolicitudOptimizacion) -> ResultadoOptimizacion:
+    if solicitud.capacidad < 3:
+        raise ValueError("No cabe ningún objeto")
+    return ResultadoOptimizacion(seleccionados=["a"], ganancia_total=4, peso_total=3)
+
+
+def traducir_error(e: Exception) -> ErrorResponse:
+    return ErrorResponse(error="Error", detalle=str(e), codigo="VALIDATION_ERROR")
+
+
+async def salidas(entrada: List[bytes], resolver=resolver_directo, concurrencia: int = 2) -> List[dict]:
+    return [json.loads(linea) async for linea in procesar_ndjson(iterar(entrada), resolver, traducir_error,
+                                                                concurrencia)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("semilla", range(20))
+async def test_las_lineas_no_dependen_de_como_se_cortan_los_bloques(semilla):
+    azar = random.Random(semilla)
+    datos = bytes(azar.choice(b"ab\n") for _ in range(200))
+    cortes = sorted(azar.sample(range(1, len(datos)), azar.randint(0, 30)))
+    bloques = [datos[inicio:fin] for inicio, fin in zip([0] + cortes, cortes + [len(datos)])]
+    
+    esperadas = datos.split(b"\n")
+    if not esperadas[-1]:
+        esperadas.pop()
+    assert await lineas(bloques) == esperadas
+
+
+@pytest.mark.asyncio
+async def test_una_linea_repartida_en_muchos_bloques_se_une_entera():
+    assert await lineas([b"x"] * 1000 + [b"\nfin"]) == [b"x" * 1000, b"fin"]
+
+
+@pytest.mark.asyncio
+async def test_rechaza_una_linea_sin_terminar_demasiado_larga():
+    with pytest.raises(LineaDemasiadoLarga):
+        await lineas([b"ok\n", b"x" * 60, b"x" * 60], max_bytes=100)
+
+
+@pytest.mark.asyncio
+async def test_cada_linea_recibe_su_resultado_o_error():
+    entrada = [solicitud("r1"), b"", b"{no es json", b'{"id": "v", "capacidad": -1}', solicitud("r2", capacidad=1)]
+    
+    por_linea = {salida["linea"]: salida for salida in await salidas(entrada)}
+    
+    assert sorted(por_linea) == [1, 3, 4, 5]
+    assert por_linea[1]["id"] == "r1" and por_linea[1]["resultado"]["ganancia_total"] == 4
+    assert por_linea[3]["error"]["codigo"] == "INVALID_JSON"
+    assert por_linea[4]["id"] == "v" and por_linea[4]["error"]["codigo"] == "VALIDATION_ERROR"
+    assert por_linea[5]["error"]["detalle"] == "No cabe ningún objeto"
+
+
+@pytest.mark.asyncio
+async def test_no_lee_mas_lineas_que_la_concurrencia_permite():
+    leidas = 0
+    en_curso = 0
+    maximo_en_curso = 0
+    liberar = asyncio.Event()
+    
+    async def entrada():
+        nonlocal leidas
+        for i in range(10):
+            leidas += 1
+            yield solicitud(f"r{i}")
+    
+    async def resolver_lento(solicitud: SolicitudOptimizacion) -> ResultadoOptimizacion:
+        nonlocal en_curso, maximo_en_curso
+        en_curso += 1
+        maximo_en_curso = max(maximo_en_curso, en_curso)
+        await liberar.wait()
+        en_curso -= 1
+        return await resolver_directo(solicitud)
+    
+    flujo = procesar_ndjson(entrada(), resolver_lento, traducir_error, concurrencia=3)
+    primera = asyncio.ensure_future(flujo.__anext__())
+    await asyncio.sleep(0.01)
+    
+    # Con el cupo lleno el flujo espera a que termine alguna antes de seguir leyendo
+    assert leidas == 3
+    liberar.set()
+    resto = [await primera] + [linea async for linea in flujo]
+    
+    assert len(resto) == 10
+    assert maximo_en_curso == 3
+
+
+@pytest.mark.asyncio
+async def test_una_linea_demasiado_larga_termina_con_una_linea_de_error():
+    bloques = [solicitud("r1") + b"\n", solicitud("r2") + b"\n", b"x" * 80, b"x" * 80, b"\n" + solicitud("r3")]
+    entrada = lineas_de_bloques(iterar(bloques), max_bytes=100)
+    
+    salida = [json.loads(linea) async for linea in procesar_ndjson(entrada, resolver_directo, traducir_error, 2)]
+    
+    assert sorted(linea["id"] for linea in salida[:-1]) == ["r1", "r2"]
+    assert salida[-1]["linea"] == 3
+    assert salida[-1]["error"]["codigo"] == "LINE_TOO_LONG"
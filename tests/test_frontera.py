@@ -0,0 +1,72 @@
+"""
+Varias capacidades y frontera ganancia-presupuesto a partir de una sola tabla
+"""
+
+import itertools
+import random
+
+import pytest
+
+from models import Objeto
+from optimizer import CostoExcedido, OptimizadorPortafolio
+
+
+def objetos_aleatorios(semilla: int, n: int = 9):
+    azar = random.Random(semilla)
+    divisor = 1 + semilla % 3
+    return [Objeto(nombre=f"o{i}", peso=divisor * azar.randint(1, 12), ganancia=azar.randint(1, 20))
+            for i in range(n)]
+
+
+@pytest.fixture
+def optimizador():
+    return OptimizadorPortafolio()
+
+
+@pytest.mark.parametrize("semilla", range(8))
+def test_capacidades_coinciden_con_optimizar_cada_una(optimizador, semilla):
+    objetos = objetos_aleatorios(semilla)
+    capacidades = [5, 17, 30, sum(obj.peso for obj in objetos)]
+    
+    resultados = optimizador.optimizar_capacidades(capacidades, objetos)
+    
+    for capacidad, resultado in zip(capacidades, resultados):
+        referencia = optimizador.optimizar(capacidad, objetos, motor="dp_clasico", reducir=False)
+        assert resultado.ganancia_total == referencia.ganancia_total
+        assert resultado.peso_total <= capacidad
+
+
+@pytest.mark.parametrize("semilla", range(8))
+def test_la_frontera_da_la_ganancia_optima_de_cada_presupuesto(optimizador, semilla):
+    objetos = objetos_aleatorios(semilla)
+    _, puntos = optimizador.optimizar_frontera(objetos)
+    
+    assert puntos[0] == (0, 0)
+    for (capacidad, ganancia), (siguiente, ganancia_siguiente) in zip(puntos, puntos[1:]):
+        assert capacidad < siguiente and ganancia < ganancia_siguiente
+    
+    # Cada punto vale hasta el siguiente: la ganancia de un presupuesto es la del último punto que no lo supera
+    subconjuntos = [
+        (sum(obj.peso for obj in elegidos), sum(obj.ganancia for obj in elegidos))
+        for k in range(len(objetos) + 1) for elegidos in itertools.combinations(objetos, k)
+    ]
+    for presupuesto in range(sum(obj.peso for obj in objetos) + 1):
+        esperada = max(ganancia for peso, ganancia in subconjuntos if peso <= presupuesto)
+        assert max(g for c, g in puntos if c <= presupuesto) == esperada
+
+
+def test_la_frontera_reconstruye_las_capacidades_pedidas(optimizador):
+    objetos = objetos_aleatorios(1)
+    resultados, puntos = optimizador.optimizar_frontera(objetos, [10, 25])
+    
+    assert [resultado.ganancia_total for resultado in resultados] == [
+        max(g for c, g in puntos if c <= capacidad) for capacidad in (10, 25)
+    ]
+    assert puntos[-1][0] <= 25
+
+
+def test_la_frontera_rechaza_una_tabla_demasiado_grande(optimizador):
+    objetos = [Objeto(nombre=f"o{i}", peso=10**7 + i, ganancia=i + 1) for i in range(10)]
+    
+    with pytest.raises(CostoExcedido):
+        optimizador.optimizar_frontera(objetos)
@@ -0,0 +1,67 @@
+"""
+Métricas en formato Prometheus y etiqueta de ruta
+"""
+
+from fastapi.testclient import TestClient
+
+import main
+from metricas import Contador, Histograma, MetricasServicio
+from optimizer import InstanciaResuelta
+
+
+def lineas_de(texto: str, nombre: str):
+    return [linea for linea in texto.splitlines() if linea.startswith(nombre)]
+
+
+def test_el_histograma_acumula_los_intervalos():
+    histograma = Histograma("prueba_segundos", "Prueba", (0.1, 1.0), ("ruta",))
+    for valor in (0.05, 0.1, 0.5, 3.0):
+        histograma.observar(valor, "/x")
+    
+    assert histograma.exponer()[2:] == [
+        'prueba_segundos_bucket{ruta="/x",le="0.1"} 2',
+        'prueba_segundos_bucket{ruta="/x",le="1"} 3',
+        'prueba_segundos_bucket{ruta="/x",le="+Inf"} 4',
+        'prueba_segundos_sum{ruta="/x"} 3.65',
+        'prueba_segundos_count{ruta="/x"} 4',
+    ]
+
+
+def test_el_contador_escapa_las_etiquetas():
+    contador = Contador("prueba_total", "Prueba", ("motor",))
+    contador.incrementar(2, 'a"b')
+    
+    assert contador.exponer() == ["# HELP prueba_total Prueba", "# TYPE prueba_total counter",
+                                  'prueba_total{motor="a\\"b"} 2']
+
+
+def test_las_instancias_se_registran_por_motor():
+    metricas = MetricasServicio()
+    metricas.registrar_instancias([
+        InstanciaResuelta("dp_numpy", 10, 100, 1010),
+        InstanciaResuelta("dp_numpy", 20, 50, 1020),
+        InstanciaResuelta("branch_and_bound", 5, 10, 0),
+    ])
+    metricas.registrar_rss_pool(2048)
+    metricas.registrar_rss_pool(1024)
+    texto = metricas.exponer()
+    
+    assert 'portafolio_optimizaciones_total{motor="dp_numpy"} 2' in texto
+    assert 'portafolio_celdas_dp_total{motor="dp_numpy"} 2030' in texto
+    assert 'portafolio_optimizacion_objetos_count{motor="branch_and_bound"} 1' in texto
+    assert 'portafolio_rss_pico_bytes{proceso="pool"} 2048' in texto
+
+
+def test_la_latencia_se_etiqueta_con_la_plantilla_de_la_ruta():
+    with TestClient(main.app) as cliente:
+        # El valor del parámetro aparece también en el resto de la URL: no debe reemplazarse ahí
+        cliente.get("/sesiones/sesiones")
+        cliente.get("/health")
+        cliente.get("/no/existe")
+        texto = cliente.get("/metrics").text
+    
+    rutas = {linea.split('ruta="')[1].split('"')[0]
+             for linea in lineas_de(texto, "portafolio_http_solicitud_segundos_count")}
+    assert {"/sesiones/{id_sesion}", "/health", "sin_ruta"} <= rutas
+    assert not any("/no/" in ruta or ruta.startswith("/{") for ruta in rutas)
+    assert "# TYPE portafolio_cache_entradas gauge" in texto
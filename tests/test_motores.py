@@ -0,0 +1,210 @@
+"""
+Optimalidad de los motores frente a dp_clasico y a la fuerza bruta en instancias chicas
+"""
+
+import itertools
+import random
+import time
+from typing import List, Tuple
+
+import pytest
+
+import dp_paralelo
+from models import Objeto, SolicitudOptimizacion
+from optimizer import CostoExcedido, OptimizadorPortafolio
+
+MOTORES_EXACTOS = [motor for motor in OptimizadorPortafolio().motores if motor != "fptas"]
+SEMILLAS = range(12)
+
+
+def generar_instancia(semilla: int, n: int = 10) -> Tuple[int, List[Objeto]]:
+    """
+    Instancia aleatoria reproducible; el tipo cambia con la semilla.
+    
+    Alterna entre objetos no correlacionados, fuertemente correlacionados,
+    pesos múltiplos de 5 (la reducción divide por el MCD) y objetos repetidos
+    (dp_agrupado los agrupa).
+    """
+    azar = random.Random(semilla)
+    tipo = semilla % 4
+    objetos = []
+    for i in range(n):
+        if tipo == 0:
+            peso, ganancia = azar.randint(1, 30), azar.randint(1, 30)
+        elif tipo == 1:
+            peso = azar.randint(1, 30)
+            ganancia = peso + 10
+        elif tipo == 2:
+            peso, ganancia = 5 * azar.randint(1, 8), azar.randint(1, 40)
+        else:
+            peso, ganancia = azar.choice([(4, 7), (6, 9), (10, 16)])
+        objetos.append(Objeto(nombre=f"o{i}", peso=peso, ganancia=ganancia))
+    
+    capacidad = max(min(obj.peso for obj in objetos), sum(obj.peso for obj in objetos) // 2)
+    return capacidad, objetos
+
+
+def instancia_costosa(semilla: int, n: int = 100) -> Tuple[int, List[Objeto]]:
+    """Fuertemente correlacionada con pesos grandes: ninguna tabla cabe y branch and bound es exponencial"""
+    azar = random.Random(semilla)
+    objetos = []
+    for i in range(n):
+        peso = azar.randint(100_000, 1_000_000)
+        objetos.append(Objeto(nombre=f"o{i}", peso=peso, ganancia=peso + 100_000))
+    return sum(obj.peso for obj in objetos) // 3, objetos
+
+
+def fuerza_bruta(capacidad: int, objetos: List[Objeto]) -> int:
+    """Ganancia óptima probando todos los subconjuntos"""
+    mejor = 0
+    for incluidos in itertools.product((False, True), repeat=len(objetos)):
+        elegidos = [obj for obj, incluido in zip(objetos, incluidos) if incluido]
+        if sum(obj.peso for obj in elegidos) <= capacidad:
+            mejor = max(mejor, sum(obj.ganancia for obj in elegidos))
+    return mejor
+
+
+def verificar_seleccion(resultado, capacidad: int, objetos: List[Objeto]):
+    """La selección existe, no se repite, cabe en la capacidad y suma lo informado"""
+    por_nombre = {obj.nombre: obj for obj in objetos}
+    elegidos = [por_nombre[nombre] for nombre in resultado.seleccionados]
+    assert len(set(resultado.seleccionados)) == len(resultado.seleccionados)
+    assert resultado.peso_total == sum(obj.peso for obj in elegidos) <= capacidad
+    assert resultado.ganancia_total == sum(obj.ganancia for obj in elegidos)
+
+
+@pytest.fixture
+def optimizador():
+    return OptimizadorPortafolio()
+
+
+@pytest.mark.parametrize("semilla", SEMILLAS)
+def test_dp_clasico_coincide_con_fuerza_bruta(optimizador, semilla):
+    capacidad, objetos = generar_instancia(semilla)
+    resultado = optimizador.optimizar(capacidad, objetos, motor="dp_clasico", reducir=False)
+    
+    verificar_seleccion(resultado, capacidad, objetos)
+    assert resultado.ganancia_total == fuerza_bruta(capacidad, objetos)
+
+
+@pytest.mark.parametrize("semilla", SEMILLAS)
+@pytest.mark.parametrize("reducir", [True, False])
+@pytest.mark.parametrize("motor", MOTORES_EXACTOS + ["auto"])
+def test_motor_exacto_es_optimo(optimizador, motor, reducir, semilla):
+    capacidad, objetos = generar_instancia(semilla)
+    referencia = optimizador.optimizar(capacidad, objetos, motor="dp_clasico", reducir=False)
+    resultado = optimizador.optimizar(capacidad, objetos, motor=motor, reducir=reducir)
+    
+    verificar_seleccion(resultado, capacidad, objetos)
+    assert resultado.ganancia_total == referencia.ganancia_total == fuerza_bruta(capacidad, objetos)
+
+
+@pytest.mark.parametrize("semilla", range(6))
+@pytest.mark.parametrize("reducir", [True, False])
+def test_nucleo_expandido_es_optimo(optimizador, semilla, reducir):
+    # Con radio 1 el núcleo inicial casi nunca basta y la prueba de reducción lo expande
+    optimizador.RADIO_NUCLEO = 1
+    azar = random.Random(semilla)
+    objetos = []
+    for i in range(60):
+        peso = azar.randint(10, 100)
+        objetos.append(Objeto(nombre=f"o{i}", peso=peso, ganancia=peso + azar.randint(0, 10)))
+    capacidad = sum(obj.peso for obj in objetos) // 3
+    
+    referencia = optimizador.optimizar(capacidad, objetos, motor="dp_clasico", reducir=False)
+    resultado = optimizador.optimizar(capacidad, objetos, motor="nucleo", reducir=reducir)
+    
+    verificar_seleccion(resultado, capacidad, objetos)
+    assert resultado.ganancia_total == referencia.ganancia_total
+
+
+@pytest.mark.parametrize("semilla", SEMILLAS)
+@pytest.mark.parametrize("reducir", [True, False])
+@pytest.mark.parametrize("epsilon", [0.5, 0.1, 0.01])
+def test_fptas_respeta_su_cota(optimizador, epsilon, reducir, semilla):
+    capacidad, objetos = generar_instancia(semilla)
+    optimo = fuerza_bruta(capacidad, objetos)
+    resultado = optimizador.optimizar(capacidad, objetos, motor="fptas", reducir=reducir, epsilon=epsilon)
+    
+    verificar_seleccion(resultado, capacidad, objetos)
+    assert (1 - epsilon) * optimo <= resultado.ganancia_total <= optimo
+    if resultado.cota_superior is not None:
+        assert resultado.cota_superior >= optimo
+
+
+@pytest.mark.parametrize("motor", MOTORES_EXACTOS + ["auto"])
+def test_ganancias_que_desbordarian_int64_se_rechazan(optimizador, motor):
+    # Con estas ganancias las tablas int64 desbordaban y devolvían una selección equivocada
+    objetos = [Objeto(nombre=f"o{i}", peso=i + 1, ganancia=2**62 + i) for i in range(4)]
+    if motor == "dp_clasico":
+        resultado = optimizador.optimizar(5, objetos, motor=motor)
+        assert resultado.ganancia_total == fuerza_bruta(5, objetos)
+    else:
+        with pytest.raises(ValueError, match="suma de las ganancias"):
+            optimizador.optimizar(5, objetos, motor=motor)
+
+
+def test_solicitud_con_ganancias_que_desbordarian_int64_es_invalida():
+    objetos = [{"nombre": f"o{i}", "peso": i + 1, "ganancia": 2**64 + i} for i in range(4)]
+    with pytest.raises(ValueError, match="suma de las ganancias"):
+        SolicitudOptimizacion(capacidad=5, objetos=objetos)
+
+
+def test_branch_and_bound_elegido_por_auto_tiene_tiempo_maximo(optimizador):
+    optimizador.SEGUNDOS_BUSQUEDA_AUTO = 0.2
+    capacidad, objetos = instancia_costosa(0)
+    
+    inicio = time.perf_counter()
+    resultado = optimizador.optimizar(capacidad, objetos)
+    
+    assert time.perf_counter() - inicio < 2
+    assert resultado.motor == "branch_and_bound"
+    verificar_seleccion(resultado, capacidad, objetos)
+    assert resultado.optimo is False
+    assert resultado.cota_superior > resultado.ganancia_total
+    assert resultado.brecha > 0
+
+
+def test_nucleo_sin_tabla_que_quepa_usa_branch_and_bound_con_tiempo_maximo(optimizador):
+    # Antes el núcleo usaba la tabla más barata aunque superara LIMITE_CELDAS_DP
+    optimizador.SEGUNDOS_BUSQUEDA_AUTO = 0.3
+    capacidad, objetos = instancia_costosa(1, n=400)
+    assert optimizador._seleccionar_motor(capacidad, objetos[:50], permitir_nucleo=False) == "branch_and_bound"
+    
+    inicio = time.perf_counter()
+    resultado = optimizador.optimizar(capacidad, objetos)
+    
+    assert time.perf_counter() - inicio < 3
+    assert resultado.motor == "nucleo"
+    verificar_seleccion(resultado, capacidad, objetos)
+    assert resultado.optimo is False
+    assert resultado.cota_superior > resultado.ganancia_total
+
+
+def test_pareto_respeta_el_limite_de_estados(optimizador):
+    # Pesos grandes y correlacionados: casi todos los subconjuntos son estados no dominados
+    optimizador.LIMITE_ESTADOS_PARETO = 100_000
+    capacidad, objetos = instancia_costosa(0)
+    
+    with pytest.raises(CostoExcedido, match="100000 estados"):
+        optimizador.optimizar(capacidad, objetos, motor="pareto")
+
+
+@pytest.mark.parametrize("reducir", [True, False])
+def test_dp_paralelo_reparte_la_fila_entre_procesos(optimizador, monkeypatch, reducir):
+    # Los umbrales se bajan para que una tabla chica se reparta entre dos procesos
+    monkeypatch.setattr(dp_paralelo, "MIN_CELDAS_PARALELO", 0)
+    monkeypatch.setattr(dp_paralelo, "MIN_COLUMNAS_POR_PROCESO", 1)
+    optimizador.PROCESOS_PARALELO = 2
+    
+    azar = random.Random(7)
+    objetos = [Objeto(nombre=f"o{i}", peso=azar.randint(50, 900), ganancia=azar.randint(1, 500)) for i in range(25)]
+    capacidad = 4000
+    assert dp_paralelo.procesos_para(len(objetos), capacidad + 1, 2) == 2
+    
+    referencia = optimizador.optimizar(capacidad, objetos, motor="dp_clasico", reducir=False)
+    resultado = optimizador.optimizar(capacidad, objetos, motor="dp_paralelo", reducir=reducir)
+    
+    verificar_seleccion(resultado, capacidad, objetos)
+    assert resultado.ganancia_total == referencia.ganancia_total
+    assert optimizador.procesos_dp_paralelo == 2
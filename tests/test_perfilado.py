@@ -0,0 +1,102 @@
+"""
+Fases de la optimización y perfilado a demanda
+"""
+
+import importlib
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import configuracion
+import main
+from models import Objeto
+from optimizer import OptimizadorPortafolio
+from perfilado import encabezado_server_timing, ejecutar_perfilado
+
+OBJETOS = [Objeto(nombre=f"o{i}", peso=3 + i, ganancia=5 + 2 * i) for i in range(8)]
+SOLICITUD = {"capacidad": 20, "objetos": [obj.dict() for obj in OBJETOS]}
+
+
+def test_las_fases_anidadas_descuentan_su_tiempo():
+    optimizador = OptimizadorPortafolio()
+    with optimizador.fase("externa"):
+        time.sleep(0.02)
+        with optimizador.fase("interna"):
+            time.sleep(0.03)
+    
+    fases = optimizador.extraer_fases()
+    assert 0.015 <= fases["externa"] < 0.04
+    assert fases["interna"] >= 0.025
+    assert optimizador.extraer_fases() == {}
+
+
+def test_una_optimizacion_informa_sus_fases():
+    optimizador = OptimizadorPortafolio()
+    optimizador.optimizar(20, OBJETOS, motor="dp_numpy")
+    
+    fases = optimizador.extraer_fases()
+    assert {"ordenamiento", "reduccion", "llenado_dp", "reconstruccion"} <= set(fases)
+
+
+def test_el_perfil_de_cpu_devuelve_el_resultado_y_las_funciones():
+    resultado, informe = ejecutar_perfilado(lambda: sum(range(10_000)), "cpu", top=5)
+    
+    assert resultado == sum(range(10_000))
+    assert informe["modo"] == "cpu"
+    assert 0 < len(informe["funciones"]) <= 5
+
+
+def test_el_perfil_de_memoria_mide_el_pico():
+    resultado, informe = ejecutar_perfilado(lambda: len(bytearray(5_000_000)), "memoria")
+    
+    assert resultado == 5_000_000
+    assert informe["pico_bytes"] >= 5_000_000
+
+
+def test_modo_de_perfil_desconocido():
+    with pytest.raises(ValueError):
+        ejecutar_perfilado(lambda: None, "disco")
+
+
+def test_server_timing():
+    assert encabezado_server_timing({"pool": 1.5, "llenado_dp": 0.25}) == "pool;dur=1.500, llenado_dp;dur=0.250"
+
+
+def test_depurar_incluye_las_fases_en_la_respuesta():
+    with TestClient(main.app) as cliente:
+        respuesta = cliente.post("/optimizar?depurar=true", json=SOLICITUD)
+    
+    fases = respuesta.json()["depuracion"]["fases_ms"]
+    assert list(fases)[:2] == ["validacion", "pool"]
+    assert respuesta.headers["Server-Timing"].startswith("validacion;dur=")
+
+
+def test_perfil_por_encabezado_con_el_perfilado_habilitado(monkeypatch):
+    monkeypatch.setattr(main, "PERFILADO_HABILITADO", True)
+    
+    with TestClient(main.app) as cliente:
+        respuesta = cliente.post("/optimizar", json=SOLICITUD, headers={"X-Perfil": "cpu"})
+        desconocido = cliente.post("/optimizar?perfil=disco", json=SOLICITUD)
+    
+    assert respuesta.json()["depuracion"]["perfil"]["modo"] == "cpu"
+    assert desconocido.status_code == 400
+
+
+def test_perfil_rechazado_con_el_perfilado_desactivado(monkeypatch):
+    monkeypatch.setattr(main, "PERFILADO_HABILITADO", False)
+    
+    with TestClient(main.app) as cliente:
+        respuesta = cliente.post("/optimizar?perfil=memoria", json=SOLICITUD)
+    
+    assert respuesta.status_code == 403
+    assert "PROFILING_DISABLED" in respuesta.text
+
+
+def test_el_perfilado_esta_desactivado_por_defecto(monkeypatch):
+    monkeypatch.delenv("PERFILADO_HABILITADO", raising=False)
+    try:
+        assert importlib.reload(configuracion).PERFILADO_HABILITADO is False
+    finally:
+        monkeypatch.undo()
+        importlib.reload(configuracion)
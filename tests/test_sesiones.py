@@ -0,0 +1,131 @@
+"""
+Sesiones de re-optimización incremental
+"""
+
+import random
+
+import pytest
+
+import sesiones as modulo_sesiones
+from models import Objeto
+from optimizer import OptimizadorPortafolio
+from sesiones import GestorSesiones, SesionOptimizacion, extraer_instancias
+
+
+def objetos_aleatorios(semilla: int, n: int = 40, prefijo: str = "o"):
+    azar = random.Random(semilla)
+    return [Objeto(nombre=f"{prefijo}{i}", peso=azar.randint(1, 40), ganancia=azar.randint(1, 60)) for i in range(n)]
+
+
+def ganancia_optima(capacidad: int, objetos) -> int:
+    return OptimizadorPortafolio().optimizar(capacidad, objetos, motor="dp_clasico", reducir=False).ganancia_total
+
+
+def test_el_resultado_inicial_es_optimo():
+    objetos = objetos_aleatorios(0)
+    resultado, filas = SesionOptimizacion(300, objetos).resultado()
+    
+    assert resultado.ganancia_total == ganancia_optima(300, objetos)
+    assert filas == len(objetos)
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_las_ediciones_mantienen_la_optimalidad(semilla):
+    azar = random.Random(semilla)
+    objetos = objetos_aleatorios(semilla)
+    sesion = SesionOptimizacion(300, objetos)
+    sesion.resultado()
+    actuales = {obj.nombre: obj for obj in objetos}
+    
+    for paso in range(6):
+        nombres = sorted(actuales)
+        eliminar = [azar.choice(nombres)]
+        modificado = azar.choice([nombre for nombre in nombres if nombre not in eliminar])
+        modificar = [Objeto(nombre=modificado, peso=azar.randint(1, 40), ganancia=azar.randint(1, 60))]
+        agregar = [Objeto(nombre=f"n{paso}", peso=azar.randint(1, 40), ganancia=azar.randint(1, 60))]
+        
+        sesion.aplicar_cambios(agregar, modificar, eliminar)
+        for nombre in eliminar:
+            del actuales[nombre]
+        for obj in modificar + agregar:
+            actuales[obj.nombre] = obj
+        
+        resultado, _ = sesion.resultado()
+        assert resultado.ganancia_total == ganancia_optima(300, list(actuales.values()))
+        assert set(resultado.seleccionados) <= set(actuales)
+
+
+def test_editar_de_nuevo_el_mismo_objeto_recalcula_pocas_filas():
+    objetos = objetos_aleatorios(1, n=100)
+    sesion = SesionOptimizacion(500, objetos)
+    sesion.resultado()
+    
+    sesion.aplicar_cambios([], [Objeto(nombre="o3", peso=5, ganancia=50)], [])
+    sesion.resultado()
+    sesion.aplicar_cambios([], [Objeto(nombre="o3", peso=6, ganancia=55)], [])
+    _, filas = sesion.resultado()
+    
+    # El objeto editado quedó al final: solo se recalcula desde el último punto de control
+    assert filas <= SesionOptimizacion.INTERVALO_CONTROL
+
+
+@pytest.mark.parametrize("agregar, modificar, eliminar", [
+    ([Objeto(nombre="o0", peso=1, ganancia=1)], [], []),
+    ([], [Objeto(nombre="falta", peso=1, ganancia=1)], []),
+    ([], [], ["falta"]),
+    ([], [Objeto(nombre="o1", peso=1, ganancia=1)], ["o1"]),
+])
+def test_los_cambios_invalidos_no_se_aplican(agregar, modificar, eliminar):
+    objetos = objetos_aleatorios(2, n=5)
+    sesion = SesionOptimizacion(50, objetos)
+    
+    with pytest.raises(ValueError):
+        sesion.aplicar_cambios(agregar, modificar, eliminar)
+    assert [obj.nombre for obj in sesion.objetos] == [obj.nombre for obj in SesionOptimizacion(50, objetos).objetos]
+
+
+def test_publica_sus_instancias_para_las_metricas():
+    extraer_instancias()
+    SesionOptimizacion(100, objetos_aleatorios(3, n=10)).resultado()
+    
+    instancias = extraer_instancias()
+    assert [(instancia.motor, instancia.objetos, instancia.celdas) for instancia in instancias] == [
+        ("dp_incremental", 10, 10 * 101)
+    ]
+    assert extraer_instancias() == []
+
+
+def test_el_gestor_expulsa_la_menos_usada():
+    gestor = GestorSesiones(max_sesiones=2, max_bytes=1 << 30, ttl_segundos=60)
+    primera, _ = gestor.crear(50, objetos_aleatorios(0, n=5))
+    segunda, _ = gestor.crear(50, objetos_aleatorios(1, n=5))
+    gestor.obtener(primera)
+    
+    gestor.crear(50, objetos_aleatorios(2, n=5))
+    
+    assert gestor.obtener(segunda) is None
+    assert gestor.obtener(primera) is not None
+    assert gestor.estadisticas()["expulsiones"] == 1
+
+
+def test_el_gestor_respeta_el_limite_de_memoria():
+    gestor = GestorSesiones(max_sesiones=10, max_bytes=1, ttl_segundos=60)
+    gestor.crear(50, objetos_aleatorios(0, n=5))
+    ultima, _ = gestor.crear(50, objetos_aleatorios(1, n=5))
+    
+    gestor.ajustar_memoria()
+    
+    assert gestor.estadisticas()["abiertas"] == 1
+    assert gestor.obtener(ultima) is not None
+
+
+def test_las_sesiones_inactivas_expiran(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr(modulo_sesiones.time, "time", lambda: ahora[0])
+    gestor = GestorSesiones(max_sesiones=10, max_bytes=1 << 30, ttl_segundos=60)
+    id_sesion, _ = gestor.crear(50, objetos_aleatorios(0, n=5))
+    
+    ahora[0] += 61
+    
+    assert gestor.obtener(id_sesion) is None
+    assert gestor.estadisticas()["expiradas"] == 1